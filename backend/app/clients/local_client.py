@@ -0,0 +1,8 @@
+from openai import AsyncOpenAI
+
+from app.clients.registry import client_registry
+
+
+def get_local_client() -> AsyncOpenAI:
+    # OpenAI-compatible self-hosted server (LOCAL_BASE_URL); shared like the hosted clients
+    return client_registry.local_async()
@@ -1,7 +1,8 @@
 from mistralai import Mistral
-from app.config import settings
+
+from app.clients.registry import client_registry
+
 
 def get_mistral_client() -> Mistral:
-    if not settings.mistral_api_key:
-        pass # No error handling here
-    return Mistral(api_key=settings.mistral_api_key)
\ No newline at end of file
+    # Shared client; its connection pool is reused across calls
+    return client_registry.mistral()
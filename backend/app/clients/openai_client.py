@@ -1,13 +1,14 @@
-from openai import OpenAI
-from app.config import settings
+from openai import AsyncOpenAI, OpenAI
+
+from app.clients.registry import client_registry
 
 
 def get_openai_client() -> OpenAI:
     # The SDK reads OPENAI_API_KEY from env automatically.
-    # This function provides a single import point for services.
-    if not settings.openai_api_key:
-        # Still return a client; auth error will be raised on first call.
-        pass
-    return OpenAI()
+    # This function provides a single import point for services; the client
+    # and its connection pool are shared across calls.
+    return client_registry.openai()
 
 
+def get_async_openai_client() -> AsyncOpenAI:
+    return client_registry.openai_async()
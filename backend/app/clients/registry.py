@@ -0,0 +1,215 @@
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional, Union
+
+import httpx
+from mistralai import Mistral
+from openai import AsyncOpenAI, OpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Counts requests and whether each one opened or reused a connection."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self._seen = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def record(self, network_stream) -> None:
+        with self._lock:
+            self.requests += 1
+            if network_stream is None:
+                return
+            if network_stream in self._seen:
+                self.reused_connections += 1
+            else:
+                self._seen.add(network_stream)
+                self.new_connections += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            tracked = self.new_connections + self.reused_connections
+            return {
+                "requests": self.requests,
+                "newConnections": self.new_connections,
+                "reusedConnections": self.reused_connections,
+                "reuseRatio": round(self.reused_connections / tracked, 3) if tracked else None,
+            }
+
+
+class _TrackingTransport(httpx.HTTPTransport):
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = super().handle_request(request)
+        self._stats.record(response.extensions.get("network_stream"))
+        return response
+
+
+class _AsyncTrackingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle_async_request(request)
+        self._stats.record(response.extensions.get("network_stream"))
+        return response
+
+
+def _http2_enabled() -> bool:
+    if not settings.provider_http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("PROVIDER_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def provider_timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.provider_read_timeout, connect=settings.provider_connect_timeout)
+
+
+def _transport_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.provider_max_connections,
+            max_keepalive_connections=settings.provider_max_keepalive_connections,
+            keepalive_expiry=settings.provider_keepalive_expiry,
+        ),
+        "http2": _http2_enabled(),
+    }
+
+
+def create_http_client(stats: ConnectionStats) -> httpx.Client:
+    """Build a pooled httpx client configured from the PROVIDER_* settings."""
+    return httpx.Client(
+        transport=_TrackingTransport(stats, **_transport_options()),
+        timeout=provider_timeout(),
+    )
+
+
+def create_async_http_client(stats: ConnectionStats) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=_AsyncTrackingTransport(stats, **_transport_options()),
+        timeout=provider_timeout(),
+    )
+
+
+class ClientRegistry:
+    """Long-lived provider SDK clients sharing tuned, keep-alive connection pools.
+
+    Clients are created on first use (or by ``start`` for the configured
+    provider) and reused by every call until ``aclose``.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, ConnectionStats] = {
+            "openai": ConnectionStats(),
+            "mistral": ConnectionStats(),
+            "local": ConnectionStats(),
+        }
+        self._openai: Optional[OpenAI] = None
+        self._openai_async: Optional[AsyncOpenAI] = None
+        self._local_async: Optional[AsyncOpenAI] = None
+        self._mistral: Optional[Mistral] = None
+        self._http_clients: List[Union[httpx.Client, httpx.AsyncClient]] = []
+        self._lock = threading.Lock()
+
+    def openai(self) -> OpenAI:
+        with self._lock:
+            if self._openai is None:
+                http_client = create_http_client(self.stats["openai"])
+                # The SDK reads OPENAI_API_KEY from env; a missing key raises here
+                # Retries are handled by app.utils.resilience
+                self._openai = OpenAI(http_client=http_client, timeout=provider_timeout(), max_retries=0)
+                self._http_clients.append(http_client)
+                logger.debug("Created shared OpenAI client")
+            return self._openai
+
+    def openai_async(self) -> AsyncOpenAI:
+        with self._lock:
+            if self._openai_async is None:
+                http_client = create_async_http_client(self.stats["openai"])
+                self._openai_async = AsyncOpenAI(http_client=http_client, timeout=provider_timeout(), max_retries=0)
+                self._http_clients.append(http_client)
+                logger.debug("Created shared async OpenAI client")
+            return self._openai_async
+
+    def local_async(self) -> AsyncOpenAI:
+        """OpenAI SDK client for the self-hosted server at ``LOCAL_BASE_URL``."""
+        with self._lock:
+            if self._local_async is None:
+                http_client = create_async_http_client(self.stats["local"])
+                self._local_async = AsyncOpenAI(
+                    base_url=settings.local_base_url,
+                    api_key=settings.local_api_key,
+                    http_client=http_client,
+                    timeout=provider_timeout(),
+                    max_retries=0,
+                )
+                self._http_clients.append(http_client)
+                logger.debug(f"Created shared local client for {settings.local_base_url}")
+            return self._local_async
+
+    def mistral(self) -> Mistral:
+        # One client serves both sync calls and the ``*_async`` methods
+        with self._lock:
+            if self._mistral is None:
+                stats = self.stats["mistral"]
+                http_client = create_http_client(stats)
+                async_http_client = create_async_http_client(stats)
+                self._mistral = Mistral(
+                    api_key=settings.mistral_api_key,
+                    client=http_client,
+                    async_client=async_http_client,
+                    timeout_ms=int(settings.provider_read_timeout * 1000),
+                )
+                self._http_clients += [http_client, async_http_client]
+                logger.debug("Created shared Mistral client")
+            return self._mistral
+
+    def start(self) -> None:
+        """Create the configured provider's client up front."""
+        try:
+            if settings.provider == "openai":
+                self.openai()
+                self.openai_async()
+            elif settings.provider == "mistral":
+                self.mistral()
+            elif settings.provider == "local":
+                self.local_async()
+        except Exception as e:
+            logger.warning(f"Could not create {settings.provider} client at startup: {e}")
+
+    async def aclose(self) -> None:
+        with self._lock:
+            http_clients, self._http_clients = self._http_clients, []
+            self._openai = None
+            self._openai_async = None
+            self._local_async = None
+            self._mistral = None
+        for client in http_clients:
+            try:
+                if isinstance(client, httpx.AsyncClient):
+                    await client.aclose()
+                else:
+                    client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client: {e}")
+
+    def to_dict(self) -> dict:
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+client_registry = ClientRegistry()
@@ -7,6 +7,23 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    return int(raw) if raw else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    return float(raw) if raw else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
 class Settings:
     @property
     def openai_api_key(self) -> str:
@@ -29,6 +46,299 @@ class Settings:
     def provider(self) -> str:
         return os.environ.get("PROVIDER", "mistral")
 
+    @property
+    def upload_dir(self) -> str:
+        return os.environ.get("UPLOAD_DIR", "_tmp_uploads")
+
+    @property
+    def upload_chunk_size(self) -> int:
+        return _env_int("UPLOAD_CHUNK_SIZE", 1024 * 1024)
+
+    @property
+    def max_upload_file_bytes(self) -> int:
+        return _env_int("MAX_UPLOAD_FILE_BYTES", 500 * 1024 * 1024)
+
+    @property
+    def max_upload_request_bytes(self) -> int:
+        return _env_int("MAX_UPLOAD_REQUEST_BYTES", 2 * 1024 * 1024 * 1024)
+
+    @property
+    def io_thread_pool_size(self) -> int:
+        return _env_int("IO_THREAD_POOL_SIZE", 32)
+
+    @property
+    def cpu_process_pool_size(self) -> int:
+        return _env_int("CPU_PROCESS_POOL_SIZE", os.cpu_count() or 1)
+
+    @property
+    def chunked_transcription(self) -> bool:
+        return _env_bool("CHUNKED_TRANSCRIPTION", False)
+
+    @property
+    def chunk_target_seconds(self) -> float:
+        return _env_float("CHUNK_TARGET_SECONDS", 300.0)
+
+    @property
+    def chunk_overlap_seconds(self) -> float:
+        return _env_float("CHUNK_OVERLAP_SECONDS", 2.0)
+
+    @property
+    def chunk_concurrency(self) -> int:
+        return _env_int("CHUNK_CONCURRENCY", 4)
+
+    @property
+    def silence_noise_db(self) -> float:
+        return _env_float("SILENCE_NOISE_DB", -35.0)
+
+    @property
+    def silence_min_seconds(self) -> float:
+        return _env_float("SILENCE_MIN_SECONDS", 0.5)
+
+    @property
+    def silence_trim(self) -> bool:
+        return _env_bool("SILENCE_TRIM", False)
+
+    @property
+    def silence_trim_min_seconds(self) -> float:
+        # Silences longer than this are shortened to SILENCE_TRIM_KEEP_SECONDS
+        return _env_float("SILENCE_TRIM_MIN_SECONDS", 2.0)
+
+    @property
+    def silence_trim_keep_seconds(self) -> float:
+        return _env_float("SILENCE_TRIM_KEEP_SECONDS", 0.5)
+
+    @property
+    def letterhead_dir(self) -> str:
+        # Directory of .docx letterhead templates, selectable by file name on export; empty disables
+        return os.environ.get("LETTERHEAD_DIR", "")
+
+    @property
+    def export_batch_max_items(self) -> int:
+        return _env_int("EXPORT_BATCH_MAX_ITEMS", 500)
+
+    @property
+    def export_batch_concurrency(self) -> int:
+        # Documents rendered at once by POST /export/batch; also bounds the ones held in memory
+        return _env_int("EXPORT_BATCH_CONCURRENCY", 2 * max(1, self.cpu_process_pool_size))
+
+    @property
+    def transcript_store_enabled(self) -> bool:
+        return _env_bool("TRANSCRIPT_STORE_ENABLED", True)
+
+    @property
+    def transcript_store_dir(self) -> str:
+        return os.environ.get("TRANSCRIPT_STORE_DIR", "_transcripts")
+
+    @property
+    def transcript_store_max_bytes(self) -> int:
+        # Least recently used transcripts are removed past this size; 0 keeps them all
+        return _env_int("TRANSCRIPT_STORE_MAX_BYTES", 1024 * 1024 * 1024)
+
+    @property
+    def transcript_store_ttl_seconds(self) -> float:
+        return _env_float("TRANSCRIPT_STORE_TTL_SECONDS", 30 * 24 * 3600)
+
+    @property
+    def cache_dir(self) -> str:
+        return os.environ.get("CACHE_DIR", "_cache")
+
+    @property
+    def transcript_cache_enabled(self) -> bool:
+        return _env_bool("TRANSCRIPT_CACHE_ENABLED", True)
+
+    @property
+    def transcript_cache_memory_entries(self) -> int:
+        return _env_int("TRANSCRIPT_CACHE_MEMORY_ENTRIES", 256)
+
+    @property
+    def transcript_cache_disk_bytes(self) -> int:
+        return _env_int("TRANSCRIPT_CACHE_DISK_BYTES", 256 * 1024 * 1024)
+
+    @property
+    def transcript_cache_ttl_seconds(self) -> float:
+        return _env_float("TRANSCRIPT_CACHE_TTL_SECONDS", 30 * 24 * 3600)
+
+    @property
+    def format_cache_backend(self) -> str:
+        # "memory", "sqlite" or "none"
+        return os.environ.get("FORMAT_CACHE_BACKEND", "sqlite").lower()
+
+    @property
+    def format_cache_max_entries(self) -> int:
+        return _env_int("FORMAT_CACHE_MAX_ENTRIES", 1000)
+
+    @property
+    def format_cache_max_bytes(self) -> int:
+        return _env_int("FORMAT_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+    @property
+    def format_cache_ttl_seconds(self) -> float:
+        return _env_float("FORMAT_CACHE_TTL_SECONDS", 30 * 24 * 3600)
+
+    @property
+    def format_chunk_max_tokens(self) -> int:
+        # Longer transcripts are formatted in chunks of about this many tokens; 0 disables chunking
+        return _env_int("FORMAT_CHUNK_MAX_TOKENS", 2000)
+
+    @property
+    def format_chunk_context_tokens(self) -> int:
+        return _env_int("FORMAT_CHUNK_CONTEXT_TOKENS", 150)
+
+    @property
+    def format_chunk_concurrency(self) -> int:
+        return _env_int("FORMAT_CHUNK_CONCURRENCY", 4)
+
+    @property
+    def pipeline_formatting(self) -> bool:
+        # Format chunked transcriptions segment by segment while later chunks are transcribed
+        return _env_bool("PIPELINE_FORMATTING", True)
+
+    @property
+    def pipeline_queue_size(self) -> int:
+        return _env_int("PIPELINE_QUEUE_SIZE", 4)
+
+    @property
+    def concat_mode(self) -> str:
+        # "filter": single-pass ffmpeg concat filter; "convert": convert each file, then join
+        return os.environ.get("CONCAT_MODE", "filter").lower()
+
+    @property
+    def ffmpeg_concurrency(self) -> int:
+        return _env_int("FFMPEG_CONCURRENCY", os.cpu_count() or 1)
+
+    @property
+    def audio_profile(self) -> str:
+        # Encoding sent to the provider: "mp3", "opus", "flac", or "original" to keep supported uploads as-is
+        return os.environ.get("AUDIO_PROFILE", "mp3").lower()
+
+    @property
+    def audio_bitrate(self) -> str:
+        # Overrides the profile's bitrate (e.g. "24k"); empty keeps the profile default
+        return os.environ.get("AUDIO_BITRATE", "")
+
+    @property
+    def max_concurrent_pipelines(self) -> int:
+        return _env_int("MAX_CONCURRENT_PIPELINES", 2)
+
+    @property
+    def max_queued_jobs(self) -> int:
+        return _env_int("MAX_QUEUED_JOBS", 50)
+
+    @property
+    def job_retention(self) -> int:
+        return _env_int("JOB_RETENTION", 200)
+
+    @property
+    def provider_connect_timeout(self) -> float:
+        return _env_float("PROVIDER_CONNECT_TIMEOUT", 10.0)
+
+    @property
+    def provider_read_timeout(self) -> float:
+        # Long enough for a transcription of a full-length upload
+        return _env_float("PROVIDER_READ_TIMEOUT", 300.0)
+
+    @property
+    def provider_max_connections(self) -> int:
+        return _env_int("PROVIDER_MAX_CONNECTIONS", 100)
+
+    @property
+    def provider_max_keepalive_connections(self) -> int:
+        return _env_int("PROVIDER_MAX_KEEPALIVE_CONNECTIONS", 20)
+
+    @property
+    def provider_keepalive_expiry(self) -> float:
+        return _env_float("PROVIDER_KEEPALIVE_EXPIRY", 60.0)
+
+    @property
+    def provider_http2(self) -> bool:
+        # Requires the optional "h2" package
+        return _env_bool("PROVIDER_HTTP2", False)
+
+    @property
+    def retry_max_attempts(self) -> int:
+        return _env_int("RETRY_MAX_ATTEMPTS", 3)
+
+    @property
+    def retry_base_delay(self) -> float:
+        return _env_float("RETRY_BASE_DELAY", 0.5)
+
+    @property
+    def retry_max_delay(self) -> float:
+        # Longer Retry-After values fail over instead of waiting
+        return _env_float("RETRY_MAX_DELAY", 20.0)
+
+    @property
+    def hedge_percentile(self) -> float:
+        # 0 disables hedged requests
+        return _env_float("HEDGE_PERCENTILE", 0.0)
+
+    @property
+    def hedge_min_samples(self) -> int:
+        return _env_int("HEDGE_MIN_SAMPLES", 20)
+
+    @property
+    def circuit_failure_threshold(self) -> int:
+        return _env_int("CIRCUIT_FAILURE_THRESHOLD", 5)
+
+    @property
+    def circuit_reset_seconds(self) -> float:
+        return _env_float("CIRCUIT_RESET_SECONDS", 30.0)
+
+    @property
+    def provider_failover(self) -> bool:
+        return _env_bool("PROVIDER_FAILOVER", True)
+
+    def provider_requests_per_minute(self, provider: str) -> float:
+        # e.g. MISTRAL_REQUESTS_PER_MINUTE; 0 means unlimited
+        return _env_float(f"{provider.upper()}_REQUESTS_PER_MINUTE", 0.0)
+
+    def provider_audio_seconds_per_minute(self, provider: str) -> float:
+        # e.g. OPENAI_AUDIO_SECONDS_PER_MINUTE; 0 means unlimited
+        return _env_float(f"{provider.upper()}_AUDIO_SECONDS_PER_MINUTE", 0.0)
+
+    @property
+    def local_base_url(self) -> str:
+        # OpenAI-compatible server (vLLM, llama.cpp server, ...) used by the "local" engine
+        return os.environ.get("LOCAL_BASE_URL", "http://localhost:8001/v1")
+
+    @property
+    def local_api_key(self) -> str:
+        return os.environ.get("LOCAL_API_KEY", "") or "EMPTY"
+
+    @property
+    def local_transcription_model(self) -> str:
+        return os.environ.get("LOCAL_TRANSCRIPTION_MODEL", "mistralai/Voxtral-Mini-3B-2507")
+
+    @property
+    def local_formatting_model(self) -> str:
+        return os.environ.get("LOCAL_FORMATTING_MODEL", "mistralai/Mistral-Small-3.2-24B-Instruct-2506")
+
+    @property
+    def local_max_tokens(self) -> int:
+        # Output limit of local formatting, set on chat and batched completion requests alike
+        return _env_int("LOCAL_MAX_TOKENS", 4096)
+
+    @property
+    def local_batch_max_size(self) -> int:
+        # 1 disables batching of formatting requests
+        return _env_int("LOCAL_BATCH_MAX_SIZE", 8)
+
+    @property
+    def local_batch_window_ms(self) -> float:
+        return _env_float("LOCAL_BATCH_WINDOW_MS", 10.0)
+
+    @property
+    def provider_concurrency_initial(self) -> int:
+        return _env_int("PROVIDER_CONCURRENCY_INITIAL", 8)
+
+    @property
+    def provider_concurrency_min(self) -> int:
+        return _env_int("PROVIDER_CONCURRENCY_MIN", 1)
+
+    @property
+    def provider_concurrency_max(self) -> int:
+        return _env_int("PROVIDER_CONCURRENCY_MAX", 32)
+
 
 settings = Settings()
 
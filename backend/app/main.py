@@ -1,16 +1,40 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.clients.registry import client_registry
 from app.config import settings
+from app.routers.engines import router as engines_router
 from app.routers.export import router as export_router
+from app.routers.format import router as format_router
 from app.routers.health import router as health_router
+from app.routers.metrics import router as metrics_router
 from app.routers.transcribe import router as transcribe_router
+from app.routers.transcripts import router as transcripts_router
+from app.services.exporter import load_letterheads
+from app.services.jobs import job_manager
+from app.services.uploads import UploadSizeLimitMiddleware
+from app.utils.execution import run_io, shutdown_executors
 from app.utils.logging import setup_logging
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    client_registry.start()
+    # Before the process pool starts, so forked workers inherit them
+    await run_io(load_letterheads)
+    yield
+    await job_manager.shutdown()
+    await client_registry.aclose()
+    shutdown_executors()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Audio Transcriber API")
+    app = FastAPI(title="Audio Transcriber API", lifespan=lifespan)
 
+    # Inside CORS, so browsers can read the 413
+    app.add_middleware(UploadSizeLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.allowed_origins,
@@ -22,6 +46,10 @@ def create_app() -> FastAPI:
     app.include_router(health_router)
     app.include_router(transcribe_router)
     app.include_router(export_router)
+    app.include_router(format_router)
+    app.include_router(metrics_router)
+    app.include_router(engines_router)
+    app.include_router(transcripts_router)
     return app
 
 
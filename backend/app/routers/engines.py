@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from app.services.engines import engines_info
+from app.services.formatter import get_formatting_engine
+from app.services.transcriber import get_transcription_engine
+
+
+router = APIRouter(prefix="/engines", tags=["engines"])
+
+
+@router.get("")
+def engines() -> dict:
+    return {
+        "defaults": {
+            "transcription": get_transcription_engine().name,
+            "formatting": get_formatting_engine().name,
+        },
+        **engines_info(),
+    }
@@ -1,46 +1,180 @@
+import hashlib
 import logging
-import tempfile
-import uuid
-from pathlib import Path
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
-from app.services.exporter import export_md_to_docx
+from app.config import settings
+from app.routers.transcripts import load_stored_transcript
+from app.services.batch_export import BatchExportItem, export_batch_zip
+from app.services.exporter import UnknownLetterheadError, export_etag, export_md_to_docx_bytes, letterhead_names
+from app.services.store import StoredTranscript, TranscriptNotFoundError, TranscriptStore
+from app.utils.execution import run_cpu, run_io
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/export", tags=["export"])
 
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
 
 class ExportRequest(BaseModel):
-    content: str
+    # The formatted text, or the id of a stored transcript
+    content: Optional[str] = None
+    transcript_id: Optional[str] = None
+    language: str = "fr-FR"
+    letterhead: Optional[str] = None
+
+
+class BatchExportRequestItem(BaseModel):
+    name: str
+    content: Optional[str] = None
+    transcript_id: Optional[str] = None
+    language: str = "fr-FR"
+    letterhead: Optional[str] = None
+
+
+class BatchExportRequest(BaseModel):
+    items: List[BatchExportRequestItem]
+
+
+def _check_letterhead(letterhead: Optional[str]) -> None:
+    if letterhead is not None and letterhead not in letterhead_names():
+        raise HTTPException(status_code=400, detail=f"Unknown letterhead: {letterhead!r}")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or f'"{etag}"' in tags
+
+
+def _stored_text(store: TranscriptStore, transcript: StoredTranscript) -> str:
+    # Export the formatted text when there is one, else the raw transcript
+    formatted = store.read_formatted(transcript.id)
+    return formatted if formatted is not None else store.read_text(transcript.id)
+
+
+def _stored_text_and_sha256(store: TranscriptStore, transcript: StoredTranscript) -> Tuple[str, str]:
+    # Hashed from the text actually read: the metadata may predate a concurrent re-format
+    content = _stored_text(store, transcript)
+    return content, hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _docx_response(data: bytes, headers: dict) -> Response:
+    # Content-Length is set from the body
+    return Response(
+        content=data,
+        media_type=DOCX_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="transcript.docx"', **headers},
+    )
+
+
+async def _render(content: str, language: str, letterhead: Optional[str]) -> bytes:
+    try:
+        # Build the DOCX in memory (CPU-bound, runs in the process pool); nothing touches the disk
+        return await run_cpu(export_md_to_docx_bytes, content, language, letterhead)
+    except UnknownLetterheadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Export request failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Export failed: {e}")
+
+
+async def _export_stored(
+    transcript_id: str, language: str, letterhead: Optional[str], if_none_match: Optional[str]
+) -> Response:
+    """Export a stored transcript; the DOCX is kept with it and served with an ETag."""
+    store, transcript = await load_stored_transcript(transcript_id)
+    try:
+        content, content_sha256 = await run_io(_stored_text_and_sha256, store, transcript)
+    except (TranscriptNotFoundError, FileNotFoundError):
+        # Deleted or evicted since its metadata was read
+        raise HTTPException(status_code=404, detail=f"Unknown transcript: {transcript_id}")
+    etag = export_etag(content_sha256, language, letterhead)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Artifacts are keyed by the text they were rendered from, so a stale one is never served
+    data = await run_io(store.get_artifact, transcript_id, etag)
+    if data is None:
+        data = await _render(content, language, letterhead)
+        await run_io(store.put_artifact, transcript_id, etag, data)
+    else:
+        logger.info(f"Serving stored export of transcript {transcript_id}")
+    return _docx_response(data, headers)
 
 
 @router.post("")
 async def export(
     request: ExportRequest,
-) -> FileResponse:
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     logger.info(
         f"Received export request, "
-        f"content_size: {len(request.content)}"
+        f"content_size: {len(request.content or '')}, transcript: {request.transcript_id}"
+    )
+    _check_letterhead(request.letterhead)
+    if request.transcript_id is not None:
+        return await _export_stored(request.transcript_id, request.language, request.letterhead, if_none_match)
+    if request.content is None:
+        raise HTTPException(status_code=400, detail="Either content or transcript_id is required")
+
+    content_sha256 = hashlib.sha256(request.content.encode("utf-8")).hexdigest()
+    etag = export_etag(content_sha256, request.language, request.letterhead)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return _docx_response(await _render(request.content, request.language, request.letterhead), headers)
+
+
+@router.get("/{transcript_id}")
+async def export_transcript(
+    transcript_id: str,
+    language: str = "fr-FR",
+    letterhead: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """Download a stored transcript as DOCX; repeated downloads revalidate with If-None-Match."""
+    _check_letterhead(letterhead)
+    return await _export_stored(transcript_id, language, letterhead, if_none_match)
+
+
+@router.post("/batch")
+async def export_batch(request: BatchExportRequest) -> StreamingResponse:
+    """Render every item to DOCX and stream them back as one ZIP archive.
+
+    Items that fail are listed with their error in the archive's
+    ``manifest.json`` instead of failing the whole batch.
+    """
+    logger.info(f"Received batch export request, items: {len(request.items)}")
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to export")
+    max_items = settings.export_batch_max_items
+    if len(request.items) > max_items:
+        raise HTTPException(status_code=400, detail=f"Too many items: {len(request.items)} (maximum {max_items})")
+
+    items = []
+    for item in request.items:
+        content, error = item.content, None
+        if item.transcript_id is not None:
+            # A transcript that cannot be loaded is reported in the manifest like a failed render
+            try:
+                store, transcript = await load_stored_transcript(item.transcript_id)
+                content = await run_io(_stored_text, store, transcript)
+            except HTTPException as e:
+                content, error = "", e.detail
+            except (TranscriptNotFoundError, FileNotFoundError):
+                content, error = "", f"Unknown transcript: {item.transcript_id}"
+        elif content is None:
+            raise HTTPException(status_code=400, detail=f"Item {item.name!r} needs content or transcript_id")
+        items.append(BatchExportItem(item.name, content, item.language, item.letterhead, error=error))
+    return StreamingResponse(
+        export_batch_zip(items),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="transcripts.zip"'},
     )
-    try:
-        # Create a temporary file for the DOCX output
-        tmp_dir = Path(tempfile.gettempdir())
-        tmp_dir.mkdir(exist_ok=True)
-        output_path = tmp_dir / f"export_{uuid.uuid4().hex}.docx"
-        
-        # Export markdown to DOCX
-        export_md_to_docx(request.content, str(output_path))
-        
-        # Return the file
-        return FileResponse(
-            path=str(output_path),
-            filename="transcript.docx",
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-    except Exception as e:
-        logger.error(f"Export request failed: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Export failed: {e}")
@@ -0,0 +1,124 @@
+import json
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.services.engines import EngineSelectionError
+from app.routers.transcripts import load_stored_transcript, run_on_stored
+from app.services.formatter import FormatStream, format_transcript_cached_async, get_formatting_engine
+from app.services.store import get_transcript_store
+from app.utils.resilience import ProviderUnavailableError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/format", tags=["format"])
+
+
+class FormatRequest(BaseModel):
+    # The text to format, or the id of a stored transcript to re-format
+    text: Optional[str] = None
+    transcript_id: Optional[str] = None
+    engine: Optional[str] = None
+    model: Optional[str] = None
+    use_cache: bool = True
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _request_text(request: FormatRequest) -> str:
+    if request.transcript_id is not None:
+        store, _ = await load_stored_transcript(request.transcript_id)
+        return await run_on_stored(request.transcript_id, store.read_text, request.transcript_id)
+    if request.text is None:
+        raise HTTPException(status_code=400, detail="Either text or transcript_id is required")
+    return request.text
+
+
+async def _store_formatted(request: FormatRequest, formatted: str, *, engine: str, model: str) -> None:
+    # A stored transcript keeps its latest formatting; exports are then rebuilt from it
+    if request.transcript_id is None or not formatted:
+        return
+    store = get_transcript_store()
+    metadata = {"formatEngine": engine, "formatModel": model}
+    await run_on_stored(
+        request.transcript_id, store.set_formatted, request.transcript_id, formatted, metadata=metadata
+    )
+
+
+@router.post("")
+async def format_text(request: FormatRequest) -> dict:
+    text = await _request_text(request)
+    logger.info(
+        f"Received format request, text_size: {len(text)}, transcript: {request.transcript_id}, engine: {request.engine}"
+    )
+    try:
+        selected = get_formatting_engine(request.engine)
+        model = selected.resolve_model(request.model)
+        formatted = await format_transcript_cached_async(
+            text, use_cache=request.use_cache, engine=selected.name, model=model
+        )
+    except EngineSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ProviderUnavailableError as e:
+        logger.error(f"Format request failed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Format request failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Formatting failed: {e}")
+    await _store_formatted(request, formatted, engine=selected.name, model=model)
+    if request.transcript_id is not None:
+        return {"id": request.transcript_id, "formattedText": formatted}
+    return {"formattedText": formatted}
+
+
+@router.post("/stream")
+async def format_text_stream(request: FormatRequest) -> StreamingResponse:
+    """Stream the formatted text as server-sent events.
+
+    Events: ``start`` (engine and model), one ``delta`` per chunk of text,
+    then ``done`` with the full text, whether it came from the cache, and
+    the time to first token; or ``error`` if formatting fails midway.
+    A stored transcript's formatted text is replaced before ``done``.
+    """
+    text = await _request_text(request)
+    logger.info(
+        f"Received streaming format request, text_size: {len(text)}, "
+        f"transcript: {request.transcript_id}, engine: {request.engine}"
+    )
+    try:
+        stream = FormatStream(text, use_cache=request.use_cache, engine=request.engine, model=request.model)
+    except EngineSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        yield _sse("start", {"engine": stream.engine.name, "model": stream.model})
+        try:
+            async for delta in stream.deltas():
+                yield _sse("delta", {"text": delta})
+        except Exception as e:
+            logger.error(f"Streaming format request failed: {str(e)}", exc_info=True)
+            yield _sse("error", {"detail": f"Formatting failed: {e}"})
+            return
+        try:
+            await _store_formatted(request, stream.text, engine=stream.engine.name, model=stream.model)
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail})
+            return
+        yield _sse("done", {
+            "formattedText": stream.text,
+            "cached": stream.cached,
+            "timeToFirstToken": stream.time_to_first_token,
+            "elapsed": stream.elapsed,
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
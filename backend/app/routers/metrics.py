@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from app.clients.registry import client_registry
+from app.services.formatter import format_stream_stats, get_format_cache, get_local_batcher
+from app.services.store import get_transcript_store
+from app.services.transcriber import get_transcript_cache
+from app.utils.limiter import limiter_stats
+from app.utils.resilience import breaker_stats
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+def metrics() -> dict:
+    transcript_cache = get_transcript_cache()
+    format_cache = get_format_cache()
+    local_batcher = get_local_batcher()
+    transcript_store = get_transcript_store()
+    return {
+        "transcriptCache": transcript_cache.to_dict() if transcript_cache else None,
+        "formatCache": format_cache.to_dict() if format_cache else None,
+        "connections": client_registry.to_dict(),
+        "circuitBreakers": breaker_stats(),
+        "limiters": limiter_stats(),
+        "localBatching": local_batcher.to_dict() if local_batcher else None,
+        "formatStreaming": format_stream_stats(),
+        "transcriptStore": transcript_store.to_dict() if transcript_store else None,
+    }
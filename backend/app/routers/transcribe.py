@@ -1,12 +1,20 @@
 import logging
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
 
-from app.services.preprocessor import preprocess
-from app.services.transcriber import transcribe_audio_file
-from app.services.formatter import format_transcript
+from app.services.engines import EngineSelectionError
+from app.services.formatter import get_formatting_engine
+from app.services.jobs import JobQueueFullError, job_manager
+from app.services.pipeline import run_pipeline, store_result
+from app.services.transcriber import get_transcription_engine
+from app.services.uploads import (
+    UploadTooLargeError,
+    cleanup_request_dir,
+    create_request_dir,
+    save_uploads,
+)
+from app.utils.resilience import ProviderUnavailableError
 
 logger = logging.getLogger(__name__)
 
@@ -14,42 +22,145 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/transcribe", tags=["transcribe"])
 
 
+def _check_engines(
+    engine: Optional[str], model: Optional[str], format_engine: Optional[str], format_model: Optional[str]
+) -> None:
+    """Reject an unknown engine or model before the upload is saved."""
+    try:
+        get_transcription_engine(engine).resolve_model(model)
+        get_formatting_engine(format_engine).resolve_model(format_model)
+    except EngineSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("")
 async def transcribe(
     files: list[UploadFile] = File(...),
     format_output: bool = True,
     language: Optional[str] = None,
+    chunked: Optional[bool] = None,
+    use_cache: bool = True,
+    trim_silence: Optional[bool] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    format_engine: Optional[str] = None,
+    format_model: Optional[str] = None,
 ) -> dict:
     filenames = [f.filename for f in files]
     logger.info(
         f"Received transcription request: filenames={filenames}, format_output={format_output}, language={language}"
     )
+    _check_engines(engine, model, format_engine, format_model)
+    request_dir = create_request_dir()
     try:
-        tmp_dir = Path.cwd() / "_tmp_uploads"
-        tmp_dir.mkdir(exist_ok=True)
-
-        src_paths = []
-        for file in files:
-            data = await file.read()
-            src_path = tmp_dir / file.filename
-            src_path.write_bytes(data)
-            src_paths.append(src_path)
-
-        # Preprocess (concatenate if multiple and ensure compatible)
-        prepared_path = preprocess(src_paths)
+        uploads = await save_uploads(files, request_dir)
+        src_paths = [u.path for u in uploads]
 
-        # Transcribe 
-        text = transcribe_audio_file(prepared_path, language=language, temperature=0.0)
-
-        # Optional formatting 
-        formatted = None
-        if format_output and text:
-            formatted = format_transcript(text)
+        # Shares MAX_CONCURRENT_PIPELINES with the queued jobs
+        async with job_manager.pipeline_slots():
+            result = await run_pipeline(
+                src_paths,
+                language=language,
+                format_output=format_output,
+                chunked=chunked,
+                use_cache=use_cache,
+                trim_silence=trim_silence,
+                engine=engine,
+                model=model,
+                format_engine=format_engine,
+                format_model=format_model,
+                src_sha256s=[u.sha256 for u in uploads],
+            )
 
         logger.info(f"Transcription request completed successfully for: {filenames}")
-        return {"text": text, "formattedText": formatted}
+        transcript_id = await store_result(
+            result,
+            filenames=filenames,
+            language=language,
+            engine=engine,
+            model=model,
+            format_engine=format_engine,
+            format_model=format_model,
+        )
+        response = {"id": transcript_id, "text": result.text, "formattedText": result.formatted}
+        if result.chunks:
+            response["chunks"] = result.chunks
+        if result.audio:
+            response["audio"] = result.audio
+        if result.silence_removed_seconds:
+            response["silenceRemovedSeconds"] = result.silence_removed_seconds
+        return response
+    except UploadTooLargeError as e:
+        logger.warning(f"Rejected oversized upload for {filenames}: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except EngineSelectionError as e:
+        logger.warning(f"Transcription request rejected for {filenames}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except ProviderUnavailableError as e:
+        logger.error(f"Transcription request failed for {filenames}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Transcription request failed for {filenames}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
+    finally:
+        cleanup_request_dir(request_dir)
+
+
+@router.post("/jobs", status_code=202)
+async def create_transcription_job(
+    files: list[UploadFile] = File(...),
+    format_output: bool = True,
+    language: Optional[str] = None,
+    chunked: Optional[bool] = None,
+    use_cache: bool = True,
+    trim_silence: Optional[bool] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    format_engine: Optional[str] = None,
+    format_model: Optional[str] = None,
+) -> dict:
+    filenames = [f.filename for f in files]
+    logger.info(
+        f"Received transcription job: filenames={filenames}, format_output={format_output}, language={language}"
+    )
+    _check_engines(engine, model, format_engine, format_model)
+    request_dir = create_request_dir()
+    try:
+        uploads = await save_uploads(files, request_dir)
+        job = job_manager.submit(
+            [u.path for u in uploads],
+            request_dir,
+            filenames=filenames,
+            language=language,
+            format_output=format_output,
+            chunked=chunked,
+            use_cache=use_cache,
+            trim_silence=trim_silence,
+            engine=engine,
+            model=model,
+            format_engine=format_engine,
+            format_model=format_model,
+            src_sha256s=[u.sha256 for u in uploads],
+        )
+    except UploadTooLargeError as e:
+        cleanup_request_dir(request_dir)
+        logger.warning(f"Rejected oversized upload for {filenames}: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except JobQueueFullError as e:
+        cleanup_request_dir(request_dir)
+        logger.warning(f"Rejected transcription job for {filenames}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        cleanup_request_dir(request_dir)
+        logger.error(f"Failed to create transcription job for {filenames}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to create job: {e}")
+
+    return {"id": job.id, "status": job.status.value}
 
 
+@router.get("/jobs/{job_id}")
+def get_transcription_job(job_id: str) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
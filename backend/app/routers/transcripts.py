@@ -0,0 +1,44 @@
+import logging
+from typing import Any, Callable, Tuple, TypeVar
+
+from fastapi import APIRouter, HTTPException
+
+from app.services.store import StoredTranscript, TranscriptNotFoundError, TranscriptStore, get_transcript_store
+from app.utils.execution import run_io
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/transcripts", tags=["transcripts"])
+
+T = TypeVar("T")
+
+
+async def load_stored_transcript(transcript_id: str) -> Tuple[TranscriptStore, StoredTranscript]:
+    """The store and the metadata of ``transcript_id``, or the matching HTTP error."""
+    store = get_transcript_store()
+    if store is None:
+        raise HTTPException(status_code=400, detail="The transcript store is disabled")
+    return store, await run_on_stored(transcript_id, store.get, transcript_id)
+
+
+async def run_on_stored(transcript_id: str, call: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a store call about ``transcript_id`` on the I/O pool; 404 if it was deleted or evicted meanwhile."""
+    try:
+        return await run_io(call, *args, **kwargs)
+    except (TranscriptNotFoundError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=f"Unknown transcript: {transcript_id}")
+
+
+@router.get("/{transcript_id}")
+async def get_transcript(transcript_id: str) -> dict:
+    store, transcript = await load_stored_transcript(transcript_id)
+    text = await run_on_stored(transcript_id, store.read_text, transcript_id)
+    formatted = await run_on_stored(transcript_id, store.read_formatted, transcript_id)
+    return {**transcript.to_dict(), "text": text, "formattedText": formatted}
+
+
+@router.delete("/{transcript_id}", status_code=204)
+async def delete_transcript(transcript_id: str) -> None:
+    store, _ = await load_stored_transcript(transcript_id)
+    await run_io(store.delete, transcript_id)
+    logger.info(f"Deleted transcript {transcript_id}")
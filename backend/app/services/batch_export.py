@@ -0,0 +1,153 @@
+"""Batch DOCX export streamed as one ZIP archive.
+
+Items are rendered with export_md_to_docx_bytes on the process pool, a
+bounded number at a time, and each document is appended to the archive as
+soon as it and the items before it are done. The archive is written to a
+buffer that is drained after every entry, so only the documents in flight
+are held in memory. A ``manifest.json`` at the end of the archive lists
+every item with its file name, or the error that kept it out.
+"""
+import asyncio
+import io
+import json
+import logging
+import re
+import time
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.services.exporter import UnknownLetterheadError, export_md_to_docx_bytes
+from app.utils.execution import run_cpu
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+_UNSAFE_NAME = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+@dataclass
+class BatchExportItem:
+    name: str
+    content: str
+    language: str = "fr-FR"
+    letterhead: Optional[str] = None
+    # Set when the item could not be resolved (e.g. an unknown transcript); it is listed, not rendered
+    error: Optional[str] = None
+
+
+def entry_names(names: Sequence[str]) -> List[str]:
+    """Safe, unique ``.docx`` file names for the archive, in the order given."""
+    used = set()
+    result = []
+    for index, name in enumerate(names):
+        stem = _UNSAFE_NAME.sub("_", name).strip(" .")
+        if stem.lower().endswith(".docx"):
+            stem = stem[:-5].rstrip(" .")
+        stem = stem or f"transcript_{index + 1}"
+        candidate, copy = f"{stem}.docx", 2
+        while candidate.lower() in used:
+            candidate, copy = f"{stem} ({copy}).docx", copy + 1
+        used.add(candidate.lower())
+        result.append(candidate)
+    return result
+
+
+class _ZipOutput(io.RawIOBase):
+    """Write-only sink for ZipFile; written bytes are collected until drained.
+
+    It cannot seek or tell, so ZipFile writes each entry's sizes in a data
+    descriptor after its content instead of going back to patch the header.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def export_batch_zip(items: Sequence[BatchExportItem]) -> AsyncIterator[bytes]:
+    """Yield a ZIP archive of ``items`` rendered to DOCX, chunk by chunk.
+
+    Up to ``EXPORT_BATCH_CONCURRENCY`` documents are rendered at once.
+    Entries keep the order of ``items``; an item that fails is listed in the
+    manifest with its error and the batch carries on.
+    """
+    start = time.perf_counter()
+    names = entry_names([item.name for item in items])
+    window = max(1, settings.export_batch_concurrency)
+    output = _ZipOutput()
+    archive = zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_STORED)
+    manifest = []
+    in_flight: Deque[Tuple[int, "Optional[asyncio.Future[bytes]]"]] = deque()
+    queued = iter(enumerate(items))
+
+    def start_next() -> None:
+        for index, item in queued:
+            if item.error is not None:
+                in_flight.append((index, None))
+                continue
+            task = asyncio.ensure_future(
+                run_cpu(export_md_to_docx_bytes, item.content, item.language, item.letterhead)
+            )
+            in_flight.append((index, task))
+            return
+
+    try:
+        for _ in range(window):
+            start_next()
+        while in_flight:
+            index, task = in_flight.popleft()
+            entry = {"name": items[index].name}
+            try:
+                if task is None:
+                    data, entry["error"] = None, items[index].error
+                else:
+                    data = await task
+            except UnknownLetterheadError as e:
+                data, entry["error"] = None, str(e)
+            except Exception as e:
+                logger.error(f"Batch export of item {index} ({items[index].name!r}) failed: {e}", exc_info=True)
+                data, entry["error"] = None, f"Export failed: {e}"
+            start_next()
+
+            if data is not None:
+                # DOCX files are already compressed; storing them costs only a CRC
+                archive.writestr(zipfile.ZipInfo(names[index], time.localtime()[:6]), data)
+                entry["file"] = names[index]
+            manifest.append(entry)
+            chunk = output.drain()
+            if chunk:
+                yield chunk
+
+        archive.writestr(
+            MANIFEST_NAME,
+            json.dumps({"items": manifest}, ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+        archive.close()
+        yield output.drain()
+    finally:
+        tasks = [task for _, task in in_flight if task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    failed = sum(1 for entry in manifest if "error" in entry)
+    logger.info(
+        f"Batch export of {len(items)} items completed in {time.perf_counter() - start:.2f}s ({failed} failed)"
+    )
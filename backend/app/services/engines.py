@@ -0,0 +1,124 @@
+"""Registry of transcription and formatting engines.
+
+An engine wraps one provider API: the models it accepts, what it can do
+(upload size and formats, streaming, timestamps), an async ``call`` and,
+for engines that can stream, a ``stream`` of text deltas.
+The transcriber and formatter register their engines at import time
+(load_builtin_engines imports both); requests pick one by name, optionally with a model, instead of the
+process-wide ``PROVIDER``.
+"""
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION = "transcription"
+FORMATTING = "formatting"
+
+
+class EngineSelectionError(ValueError):
+    """Raised for an unknown engine, or a model the engine does not offer."""
+
+
+@dataclass(frozen=True)
+class EngineCapabilities:
+    max_upload_bytes: Optional[int] = None
+    formats: FrozenSet[str] = frozenset()
+    streaming: bool = False
+    timestamps: bool = False
+
+    def accepts(self, path: Path, size: Optional[int] = None) -> bool:
+        """Whether a file with this suffix (and ``size`` in bytes) can be sent as-is."""
+        if self.formats and path.suffix.lower().lstrip(".") not in self.formats:
+            return False
+        if self.max_upload_bytes is not None and size is not None and size > self.max_upload_bytes:
+            return False
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            "maxUploadBytes": self.max_upload_bytes,
+            "formats": sorted(self.formats),
+            "streaming": self.streaming,
+            "timestamps": self.timestamps,
+        }
+
+
+@dataclass(frozen=True)
+class Engine:
+    name: str
+    kind: str
+    # A callable is read on every use, e.g. a model named in the environment
+    default_model: Union[str, Callable[[], str]]
+    call: Callable[..., Awaitable[str]] = field(compare=False)
+    models: Tuple[str, ...] = ()
+    capabilities: EngineCapabilities = EngineCapabilities()
+    # Key for the limiter, circuit breaker and failover; several engines may share one provider
+    provider: Optional[str] = None
+    stream: Optional[Callable[..., AsyncIterator[str]]] = field(default=None, compare=False)
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider or self.name
+
+    def resolve_model(self, model: Optional[str]) -> str:
+        if not model:
+            return self.default_model() if callable(self.default_model) else self.default_model
+        if self.models and model not in self.models:
+            raise EngineSelectionError(
+                f"Model {model!r} is not available for {self.kind} engine {self.name!r} "
+                f"(choose from: {', '.join(self.models)})"
+            )
+        return model
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "provider": self.provider_name,
+            "defaultModel": self.resolve_model(None),
+            "models": list(self.models or (self.resolve_model(None),)),
+            "capabilities": self.capabilities.to_dict(),
+        }
+
+
+_engines: Dict[str, Dict[str, Engine]] = {TRANSCRIPTION: {}, FORMATTING: {}}
+
+
+def register_engine(engine: Engine) -> Engine:
+    """Add ``engine`` to the registry, replacing any engine of the same kind and name."""
+    if engine.kind not in _engines:
+        raise ValueError(f"Unknown engine kind: {engine.kind}")
+    if engine.models and isinstance(engine.default_model, str) and engine.default_model not in engine.models:
+        raise ValueError(f"Default model {engine.default_model!r} of {engine.name!r} is not in its models")
+    _engines[engine.kind][engine.name] = engine
+    logger.debug(f"Registered {engine.kind} engine {engine.name!r} (default model {engine.resolve_model(None)})")
+    return engine
+
+
+def get_engine(kind: str, name: str) -> Engine:
+    try:
+        return _engines[kind][name]
+    except KeyError:
+        available = ", ".join(sorted(_engines.get(kind, {})))
+        raise EngineSelectionError(f"Unknown provider: {name!r} (available {kind} engines: {available})") from None
+
+
+def find_engine(kind: str, name: str) -> Optional[Engine]:
+    return _engines.get(kind, {}).get(name)
+
+
+def list_engines(kind: str) -> List[Engine]:
+    return list(_engines[kind].values())
+
+
+def load_builtin_engines() -> None:
+    """Register the built-in engines, defined next to the provider calls they wrap."""
+    # Imported here: both modules import this one
+    import app.services.formatter  # noqa: F401
+    import app.services.transcriber  # noqa: F401
+
+
+def engines_info() -> dict:
+    return {kind: [engine.to_dict() for engine in engines.values()] for kind, engines in _engines.items()}
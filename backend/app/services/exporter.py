@@ -1,14 +1,230 @@
+"""Markdown to DOCX export.
+
+The formatted transcript is tokenized in one pass into a small block/inline
+AST (headings, bullet items and paragraphs made of bold/italic spans), then
+rendered with python-docx. The document language is set once in the style
+defaults of a cached base template (optionally a firm's letterhead), so
+runs carry no language of their own.
+"""
+import functools
+import hashlib
+import io
 import logging
+import os
 import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
 from docx import Document
 from docx.oxml.shared import OxmlElement, qn
 
+from app.config import settings
+from app.services.cache import make_cache_key
+
 logger = logging.getLogger(__name__)
 
-def export_md_to_docx(md_text: str, output_path: str, language_code: str = 'fr-FR') -> str:
-    logger.info(f"Exporting markdown to DOCX: {output_path}")
-    
-    doc = Document()
+# Bump when rendering changes, so cached DOCX files and their ETags are not reused
+EXPORT_VERSION = 2
+
+HEADING = 'heading'
+LIST_ITEM = 'list_item'
+PARAGRAPH = 'paragraph'
+
+_HEADING = re.compile(r'(#{1,6})\s+(.+)')
+# A heading marker alone on its line takes the next line as its text
+_EMPTY_HEADING = re.compile(r'#{1,6}')
+_LIST_MARKER = re.compile(r'[\*\-\+]\s+|\d+\.\s+')
+_BOLD = re.compile(r'(\*\*|__)(.+?)\1')
+# Matched within the text between bold runs, so a bold run's closing
+# delimiter does not count as the character before an italic one
+_ITALIC = re.compile(r'(?<!\*)(?<![a-zA-Z0-9_])(\*|_)([^*_\s]+?)\1(?![*_])')
+
+
+@dataclass
+class Span:
+    text: str
+    bold: bool = False
+    italic: bool = False
+
+
+@dataclass
+class Block:
+    kind: str
+    spans: List[Span] = field(default_factory=list)
+    level: int = 0
+
+
+def _append_span(spans: List[Span], text: str, bold: bool, italic: bool) -> None:
+    # Adjacent spans with the same formatting become one run
+    if not text:
+        return
+    if spans and spans[-1].bold == bold and spans[-1].italic == italic:
+        spans[-1].text += text
+    else:
+        spans.append(Span(text, bold, italic))
+
+
+def _parse_italic(text: str, bold: bool, spans: List[Span]) -> None:
+    if '*' not in text and '_' not in text:
+        _append_span(spans, text, bold, False)
+        return
+    last_end = 0
+    for match in _ITALIC.finditer(text):
+        _append_span(spans, text[last_end:match.start()], bold, False)
+        _append_span(spans, match.group(2), bold, True)
+        last_end = match.end()
+    _append_span(spans, text[last_end:], bold, False)
+
+
+def parse_inline(text: str) -> List[Span]:
+    """Split ``text`` into spans for ``**bold**``/``__bold__`` and ``*italic*``/``_italic_`` (single words)."""
+    spans: List[Span] = []
+    last_end = 0
+    for match in _BOLD.finditer(text):
+        _parse_italic(text[last_end:match.start()], False, spans)
+        _parse_italic(match.group(2), True, spans)
+        last_end = match.end()
+    _parse_italic(text[last_end:], False, spans)
+    return spans
+
+
+def parse_markdown(md_text: str) -> List[Block]:
+    """Tokenize ``md_text`` line by line into heading, list item and paragraph blocks.
+
+    Blank lines separate blocks. A heading line is a block of its own; a
+    heading marker with no text takes the next line of its block as the
+    heading. The other lines of a block are bullet items when every one of
+    them starts with a list marker, otherwise a single paragraph keeping its
+    line breaks and the whitespace inside them.
+    """
+    blocks: List[Block] = []
+    lines: List[str] = []
+    items: Optional[List[str]] = []
+    # The level and line of a heading marker waiting for its text
+    empty_heading: Optional[Tuple[int, str]] = None
+
+    def flush() -> None:
+        nonlocal items, empty_heading
+        if empty_heading is not None:
+            # Nothing followed the marker: it is text
+            lines.append(empty_heading[1])
+            items = None
+            empty_heading = None
+        if items:
+            blocks.extend(Block(LIST_ITEM, parse_inline(item)) for item in items)
+        elif lines:
+            blocks.append(Block(PARAGRAPH, parse_inline('\n'.join(lines).strip())))
+        lines.clear()
+        items = []
+
+    for raw_line in md_text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            flush()
+            continue
+        if empty_heading is not None:
+            level = empty_heading[0]
+            empty_heading = None
+            flush()
+            blocks.append(Block(HEADING, [Span(line)], level=level))
+            continue
+        heading = _HEADING.fullmatch(line)
+        if heading:
+            flush()
+            blocks.append(Block(HEADING, [Span(heading.group(2).strip())], level=len(heading.group(1))))
+            continue
+        if _EMPTY_HEADING.fullmatch(line):
+            empty_heading = (len(line), raw_line)
+            continue
+        lines.append(raw_line)
+        if items is not None:
+            marker = _LIST_MARKER.match(line)
+            if marker:
+                items.append(line[marker.end():])
+            else:
+                # One line without a marker makes the whole block a paragraph
+                items = None
+    flush()
+    return blocks
+
+
+class UnknownLetterheadError(ValueError):
+    """Raised for a letterhead that is not in ``LETTERHEAD_DIR``."""
+
+
+_letterheads: Optional[Dict[str, bytes]] = None
+
+
+def load_letterheads(directory: Optional[str] = None) -> Dict[str, bytes]:
+    """Read the letterhead templates (``*.docx`` in ``LETTERHEAD_DIR``) into memory.
+
+    Called at startup; a worker process that did not inherit them loads them
+    on first use. The file name without its suffix is the letterhead name.
+    Files python-docx cannot open are skipped.
+    """
+    global _letterheads
+    directory = settings.letterhead_dir if directory is None else directory
+    letterheads: Dict[str, bytes] = {}
+    if directory:
+        for path in sorted(Path(directory).glob('*.docx')):
+            data = path.read_bytes()
+            try:
+                Document(io.BytesIO(data))
+            except Exception as e:
+                logger.error(f"Skipping letterhead {path}: {e}")
+                continue
+            letterheads[path.stem] = data
+        logger.info(f"Loaded {len(letterheads)} letterhead(s) from {directory}")
+    _letterheads = letterheads
+    get_base_template.cache_clear()
+    return letterheads
+
+
+def letterhead_names() -> List[str]:
+    if _letterheads is None:
+        load_letterheads()
+    return sorted(_letterheads)
+
+
+def export_etag(content_sha256: str, language_code: str = 'fr-FR', letterhead: Optional[str] = None) -> str:
+    """Identify the DOCX built from a text (by its SHA-256) with these options.
+
+    Covers the letterhead file's content and ``EXPORT_VERSION``, so a new
+    letterhead or a change in rendering yields a new tag.
+    """
+    letterhead_sha256 = None
+    if letterhead is not None:
+        if _letterheads is None:
+            load_letterheads()
+        if letterhead in _letterheads:
+            letterhead_sha256 = hashlib.sha256(_letterheads[letterhead]).hexdigest()
+    return make_cache_key(
+        'docx',
+        content=content_sha256,
+        language=language_code,
+        letterhead=letterhead,
+        letterhead_sha256=letterhead_sha256,
+        version=EXPORT_VERSION,
+    )[:32]
+
+
+@functools.lru_cache(maxsize=32)
+def get_base_template(language_code: str = 'fr-FR', letterhead: Optional[str] = None) -> bytes:
+    """The serialized starting document for ``language_code`` (and ``letterhead``).
+
+    The default template, or the letterhead, is opened and given the
+    document language once; exports then open a copy of these bytes instead
+    of unpacking and editing the template every time.
+    """
+    if letterhead is None:
+        doc = Document()
+    else:
+        if _letterheads is None:
+            load_letterheads()
+        if letterhead not in _letterheads:
+            raise UnknownLetterheadError(f"Unknown letterhead: {letterhead!r}")
+        doc = Document(io.BytesIO(_letterheads[letterhead]))
 
     # 1. Set Global Document Language Defaults
     _set_document_language(doc, language_code)
@@ -17,119 +233,99 @@ def export_md_to_docx(md_text: str, output_path: str, language_code: str = 'fr-F
     if 'Normal' in doc.styles:
         doc.styles['Normal'].font.language_id = language_code
 
-    # Split text into blocks
-    blocks = re.split(r'\n\s*\n', md_text.strip())
-    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def export_md_to_docx(
+    md_text: str,
+    output: Union[str, os.PathLike, BinaryIO],
+    language_code: str = 'fr-FR',
+    letterhead: Optional[str] = None,
+):
+    """Write ``md_text`` as a DOCX document to ``output``, a path or a writable binary stream.
+
+    The document starts from the cached base template for ``language_code``
+    and, when given, the named ``letterhead``, after its existing content.
+    """
+    logger.info(f"Exporting markdown to DOCX: {output if isinstance(output, (str, os.PathLike)) else 'stream'}")
+
+    doc = Document(io.BytesIO(get_base_template(language_code, letterhead)))
+    _render_blocks(doc, parse_markdown(md_text))
+
+    doc.save(output)
+    return output
+
+
+def export_md_to_docx_bytes(md_text: str, language_code: str = 'fr-FR', letterhead: Optional[str] = None) -> bytes:
+    """export_md_to_docx into memory; the bytes can be returned from a worker process."""
+    buffer = io.BytesIO()
+    export_md_to_docx(md_text, buffer, language_code, letterhead)
+    return buffer.getvalue()
+
+
+def _render_blocks(doc, blocks: List[Block]) -> None:
+    # python-docx resolves a style name on every paragraph; look each id up once instead
+    style_ids = {}
+
+    def style_id(name: str) -> str:
+        if name not in style_ids:
+            style_ids[name] = doc.styles[name].style_id
+        return style_ids[name]
+
     for block in blocks:
-        block = block.strip()
-        if not block:
-            continue
-        
-        # Headings
-        heading_match = re.match(r'^(#{1,6})\s+(.+)$', block, re.MULTILINE)
-        if heading_match:
-            level = len(heading_match.group(1))
-            text = heading_match.group(2).strip()
-            heading = doc.add_heading(text, level=min(level, 6))
-            for run in heading.runs:
-                run.font.language_id = language_code
-            continue
-        
-        # Lists
-        lines = [line.strip() for line in block.split('\n') if line.strip()]
-        if lines:
-            is_list = all(re.match(r'^[\*\-\+]\s+|\d+\.\s+', line) for line in lines)
-            if is_list:
-                for line in lines:
-                    list_item = re.sub(r'^[\*\-\+]\s+|\d+\.\s+', '', line)
-                    para = doc.add_paragraph(style='List Bullet')
-                    _add_formatted_text(para, list_item, language_code)
-                continue
-        
-        # Regular paragraph
         para = doc.add_paragraph()
-        _add_formatted_text(para, block, language_code)
-    
-    doc.save(output_path)
-    return output_path
+        if block.kind == HEADING:
+            para._p.style = style_id(f'Heading {block.level}')
+        elif block.kind == LIST_ITEM:
+            para._p.style = style_id('List Bullet')
+        for span in block.spans:
+            run = para.add_run()
+            if '\n' in span.text or '\t' in span.text:
+                # Converted to w:br / w:tab elements
+                run.text = span.text
+            else:
+                run._r.add_t(span.text)
+            if span.bold:
+                run.bold = True
+            if span.italic:
+                run.italic = True
+
 
 def _set_document_language(doc, lang_code):
     """
     Fixed version: Navigates the XML tree step-by-step to avoid qn() path errors.
     """
     styles_element = doc.styles.element
-    
+
     # 1. Find or create w:docDefaults
     doc_defaults = styles_element.find(qn('w:docDefaults'))
     if doc_defaults is None:
         doc_defaults = OxmlElement('w:docDefaults')
         styles_element.insert(0, doc_defaults)
-    
+
     # 2. Find or create w:rPrDefault
     r_pr_default = doc_defaults.find(qn('w:rPrDefault'))
     if r_pr_default is None:
         r_pr_default = OxmlElement('w:rPrDefault')
         doc_defaults.append(r_pr_default)
-    
+
     # 3. Find or create w:rPr
     r_pr = r_pr_default.find(qn('w:rPr'))
     if r_pr is None:
         r_pr = OxmlElement('w:rPr')
         r_pr_default.append(r_pr)
-    
+
     # 4. Create and set the w:lang element
     lang = OxmlElement('w:lang')
     lang.set(qn('w:val'), lang_code)
     lang.set(qn('w:eastAsia'), lang_code)
     lang.set(qn('w:bidi'), lang_code)
-    
+
     # Remove any existing lang tags to avoid duplicates
     existing_lang = r_pr.find(qn('w:lang'))
     if existing_lang is not None:
         r_pr.remove(existing_lang)
-        
-    r_pr.append(lang)
-
-def _add_formatted_text(paragraph, text: str, lang_code: str):
-    bold_pattern = r'(\*\*|__)(.+?)\1'
-    italic_pattern = r'(?<!\*)(?<![a-zA-Z0-9_])(\*|_)([^*_\s]+?)\1(?![*_])'
 
-    parts = []
-    last_end = 0
-    for match in re.finditer(bold_pattern, text):
-        if match.start() > last_end:
-            parts.append(('text', text[last_end:match.start()]))
-        parts.append(('bold', match.group(2)))
-        last_end = match.end()
-    
-    if last_end < len(text):
-        parts.append(('text', text[last_end:]))
-    if not parts:
-        parts = [('text', text)]
-
-    for part_type, part_text in parts:
-        is_bold = (part_type == 'bold')
-        italic_matches = list(re.finditer(italic_pattern, part_text))
-        
-        if not italic_matches:
-            run = paragraph.add_run(part_text)
-            run.bold = is_bold
-            run.font.language_id = lang_code
-        else:
-            last_italic_end = 0
-            for it_match in italic_matches:
-                if it_match.start() > last_italic_end:
-                    run = paragraph.add_run(part_text[last_italic_end:it_match.start()])
-                    run.bold = is_bold
-                    run.font.language_id = lang_code
-                
-                run = paragraph.add_run(it_match.group(2))
-                run.bold = is_bold
-                run.italic = True
-                run.font.language_id = lang_code
-                last_italic_end = it_match.end()
-            
-            if last_italic_end < len(part_text):
-                run = paragraph.add_run(part_text[last_italic_end:])
-                run.bold = is_bold
-                run.font.language_id = lang_code
\ No newline at end of file
+    r_pr.append(lang)
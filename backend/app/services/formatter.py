@@ -1,13 +1,31 @@
+import asyncio
 import logging
-from typing import Optional
+import time
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
-from app.clients.openai_client import get_openai_client
+import openai
+
+from app.clients.local_client import get_local_client
+from app.clients.openai_client import get_async_openai_client
 from app.clients.mistral_client import get_mistral_client
 from app.config import settings
+from app.services.cache import Cache, LRUCache, SQLiteCache, make_cache_key
+from app.services.engines import FORMATTING, Engine, EngineCapabilities, find_engine, get_engine, register_engine
+from app.services.text_chunking import TextChunk, merge_formatted_chunks, split_text, text_tail
+from app.services.tokens import get_token_counter
+from app.utils.batching import MicroBatcher
+from app.utils.execution import gather_or_cancel, run_io, run_sync
+from app.utils.limiter import ProviderLimiter, get_limiter, run_limited
+from app.utils.resilience import LatencyTracker, call_with_resilience, is_transient, provider_candidates
 
 logger = logging.getLogger(__name__)
 
-PROVIDER = settings.provider
+OPENAI_FORMATTING_MODEL = "gpt-4o-mini"
+MISTRAL_FORMATTING_MODEL = "mistral-medium-latest"
+
+OPENAI_FORMATTING_MODELS = ("gpt-4o-mini", "gpt-4o", "gpt-4.1-mini", "gpt-4.1")
+MISTRAL_FORMATTING_MODELS = ("mistral-medium-latest", "mistral-small-latest", "mistral-large-latest")
 
 SYSTEM_INSTRUCTION = (
     "You are a professional notary making an observation. "
@@ -19,61 +37,814 @@ SYSTEM_INSTRUCTION = (
     "- If content is in French, respond in French."
 )
 
-def format_transcript_openai(raw_text: str, *, model: str = "gpt-4o-mini", temperature: float = 0.2) -> str:
+def format_transcript_openai(raw_text: str, *, model: str = OPENAI_FORMATTING_MODEL, temperature: float = 0.2) -> str:
+    return run_sync(format_transcript_openai_async(raw_text, model=model, temperature=temperature))
+
+
+def format_transcript_mistral(raw_text: str, *, temperature: float = 0.2) -> str:
+    return run_sync(format_transcript_mistral_async(raw_text, temperature=temperature))
+
+def format_transcript(raw_text: str, *, temperature: float = 0.2):
+    return run_sync(format_transcript_async(raw_text, temperature=temperature))
+
+
+# Prepended to each part when a long transcript is formatted in chunks
+CHUNK_INSTRUCTION = (
+    "This is part {part} of a longer transcript. The parts are formatted separately "
+    "and joined afterwards. Format only the text under \"Part to format\". {headings}"
+)
+FIRST_CHUNK_HEADINGS = "Begin the observation as usual."
+NEXT_CHUNK_HEADINGS = (
+    "Do not add a title or an introduction; continue the observation in the same style. "
+    "The text under \"Preceding text\" is already formatted: use it for context only and do not repeat it."
+)
+
+
+def _messages(raw_text: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_INSTRUCTION},
+        {"role": "user", "content": raw_text},
+    ]
+
+
+def _response_content(resp) -> str:
+    content: Optional[str] = None
+    if resp and resp.choices and resp.choices[0].message:
+        content = resp.choices[0].message.content
+    return content or ""
+
+
+async def format_transcript_openai_async(
+    raw_text: str, *, model: str = OPENAI_FORMATTING_MODEL, temperature: float = 0.2
+) -> str:
     if not raw_text or not raw_text.strip():
         logger.debug("Empty text provided, skipping formatting")
         return ""
 
     logger.info(f"Starting OpenAI formatting (model={model}, input_length={len(raw_text)} chars)")
-    client = get_openai_client()
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": SYSTEM_INSTRUCTION},
-            {"role": "user", "content": raw_text},
-        ],
-        temperature=temperature,
-    )
-    content: Optional[str] = None
-    if resp and resp.choices and resp.choices[0].message:
-        content = resp.choices[0].message.content
-    formatted = content or ""
+    client = get_async_openai_client()
+    resp = await client.chat.completions.create(model=model, messages=_messages(raw_text), temperature=temperature)
+    formatted = _response_content(resp)
     logger.info(f"OpenAI formatting completed. Output length: {len(formatted)} characters")
     return formatted
 
 
-
-def format_transcript_mistral(raw_text: str, *, temperature: float = 0.2) -> str:
+async def format_transcript_mistral_async(
+    raw_text: str, *, model: str = MISTRAL_FORMATTING_MODEL, temperature: float = 0.2
+) -> str:
     if not raw_text or not raw_text.strip():
         logger.debug("Empty text provided, skipping formatting")
         return ""
 
-    model = "mistral-medium-latest"
     logger.info(f"Starting Mistral formatting (model={model}, input_length={len(raw_text)} chars)")
     client = get_mistral_client()
+    resp = await client.chat.complete_async(model=model, messages=_messages(raw_text), temperature=temperature)
+    formatted = _response_content(resp)
+    logger.info(f"Mistral formatting completed. Output length: {len(formatted)} characters")
+    return formatted
+
+
+def _delta_text(content) -> str:
+    # Mistral deltas may be a list of content chunks rather than a string
+    if isinstance(content, str):
+        return content
+    return "".join(getattr(chunk, "text", None) or "" for chunk in content or ())
+
+
+async def _stream_openai_compatible(
+    client, raw_text: str, *, model: str, temperature: float, **options
+) -> AsyncIterator[str]:
+    stream = await client.chat.completions.create(
+        model=model, messages=_messages(raw_text), temperature=temperature, stream=True, **options
+    )
+    async with stream:
+        async for chunk in stream:
+            if chunk.choices:
+                text = _delta_text(chunk.choices[0].delta.content)
+                if text:
+                    yield text
+
+
+def format_transcript_openai_stream(
+    raw_text: str, *, model: str = OPENAI_FORMATTING_MODEL, temperature: float = 0.2
+) -> AsyncIterator[str]:
+    logger.info(f"Starting OpenAI streaming formatting (model={model}, input_length={len(raw_text)} chars)")
+    return _stream_openai_compatible(get_async_openai_client(), raw_text, model=model, temperature=temperature)
+
+
+async def format_transcript_mistral_stream(
+    raw_text: str, *, model: str = MISTRAL_FORMATTING_MODEL, temperature: float = 0.2
+) -> AsyncIterator[str]:
+    logger.info(f"Starting Mistral streaming formatting (model={model}, input_length={len(raw_text)} chars)")
+    client = get_mistral_client()
+    stream = await client.chat.stream_async(model=model, messages=_messages(raw_text), temperature=temperature)
+    async with stream:
+        async for event in stream:
+            if event.data.choices:
+                text = _delta_text(event.data.choices[0].delta.content)
+                if text:
+                    yield text
+
+
+# Cleared once the local server turns out not to offer a usable /tokenize or /completions
+_local_completions_batching = True
+_local_batcher: Optional[MicroBatcher] = None
+
 
-    resp = client.chat.complete(
+async def _format_local_chat(raw_text: str, *, model: str, temperature: float) -> str:
+    client = get_local_client()
+    resp = await client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system", "content": SYSTEM_INSTRUCTION},
-            {"role": "user", "content": raw_text},
-        ],
+        messages=_messages(raw_text),
         temperature=temperature,
+        max_tokens=settings.local_max_tokens,
     )
-    content: Optional[str] = None
-    if resp and resp.choices and resp.choices[0].message:
-        content = resp.choices[0].message.content
-    formatted = content or ""
-    logger.info(f"Mistral formatting completed. Output length: {len(formatted)} characters")
-    return formatted
+    return _response_content(resp)
 
-def format_transcript(raw_text: str, *, temperature: float = 0.2):
-    logger.debug(f"Formatting transcript with provider: {PROVIDER}")
-    if PROVIDER == "mistral":
-        return format_transcript_mistral(raw_text, temperature=temperature)
-    elif PROVIDER == "openai":
-        return format_transcript_openai(raw_text, temperature=temperature)
+
+def _local_server_url(path: str) -> str:
+    # /tokenize is served next to /v1 rather than under it (vLLM)
+    base = str(get_local_client().base_url).rstrip("/")
+    return f"{base[:-3] if base.endswith('/v1') else base}{path}"
+
+
+async def _chat_prompt_tokens(raw_text: str, *, model: str) -> List[int]:
+    """The prompt of a chat request for ``raw_text``, as tokens rendered by the server's chat template."""
+    resp = await get_local_client().post(
+        _local_server_url("/tokenize"),
+        cast_to=object,
+        body={"model": model, "messages": _messages(raw_text), "add_generation_prompt": True},
+    )
+    # The request body is vLLM's; other servers may answer with something else
+    tokens = resp.get("tokens") if isinstance(resp, dict) else None
+    if not isinstance(tokens, list) or not all(isinstance(token, int) for token in tokens):
+        raise ValueError(f"Unexpected /tokenize response from the local server: {str(resp)[:200]}")
+    return tokens
+
+
+async def _format_local_batch(key: Tuple[str, float], texts: List[str]) -> List[Union[str, BaseException]]:
+    """Format ``texts`` with one /completions request, or one chat request each.
+
+    The batched prompts are the chat requests' prompts, rendered by the
+    server's chat template, with the same ``max_tokens``: a transcript is
+    formatted the same whichever way it is sent, so both share cache
+    entries. Texts the batch does not answer are sent as chat requests.
+    """
+    global _local_completions_batching
+    model, temperature = key
+    outputs: List[Optional[str]] = [None] * len(texts)
+    if len(texts) > 1 and _local_completions_batching:
+        client = get_local_client()
+        prompts: Optional[List[List[int]]] = None
+        try:
+            prompts = await gather_or_cancel(_chat_prompt_tokens(text, model=model) for text in texts)
+        except Exception as e:
+            if is_transient(e):
+                logger.warning(
+                    f"Tokenizing a local batch failed ({e}), formatting the {len(texts)} transcripts one by one"
+                )
+            else:
+                logger.warning(f"Local server has no usable /tokenize endpoint ({e}), formatting requests one by one")
+                _local_completions_batching = False
+        if prompts is not None:
+            try:
+                resp = await client.completions.create(
+                    model=model,
+                    prompt=prompts,
+                    temperature=temperature,
+                    max_tokens=settings.local_max_tokens,
+                )
+            except openai.NotFoundError:
+                logger.warning("Local server has no /completions endpoint, formatting requests one by one")
+                _local_completions_batching = False
+            except Exception as e:
+                logger.warning(
+                    f"Batched local formatting failed ({e}), formatting the {len(texts)} transcripts one by one"
+                )
+            else:
+                for choice in resp.choices:
+                    if 0 <= choice.index < len(texts):
+                        outputs[choice.index] = choice.text or ""
+                logger.info(f"Formatted a batch of {len(texts)} transcripts in one local request")
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    if missing:
+        results = await asyncio.gather(
+            *(_format_local_chat(texts[i], model=model, temperature=temperature) for i in missing),
+            return_exceptions=True,
+        )
+        for i, result in zip(missing, results):
+            outputs[i] = result
+    return outputs
+
+
+def get_local_batcher() -> Optional[MicroBatcher]:
+    """Return the shared batcher for local formatting, or None when batching is disabled."""
+    global _local_batcher
+    if settings.local_batch_max_size <= 1:
+        return None
+    if _local_batcher is None:
+        _local_batcher = MicroBatcher(
+            _format_local_batch,
+            max_size=settings.local_batch_max_size,
+            window_seconds=settings.local_batch_window_ms / 1000,
+        )
+    return _local_batcher
+
+
+async def format_transcript_local_async(raw_text: str, *, model: Optional[str] = None, temperature: float = 0.2) -> str:
+    """Format on the self-hosted OpenAI-compatible server at ``LOCAL_BASE_URL``.
+
+    Concurrent calls are gathered for ``LOCAL_BATCH_WINDOW_MS`` and sent as
+    one batched /completions request of chat-templated prompts when the
+    server supports it (see _format_local_batch).
+    """
+    if not raw_text or not raw_text.strip():
+        logger.debug("Empty text provided, skipping formatting")
+        return ""
+
+    model = model or settings.local_formatting_model
+    logger.info(f"Starting local formatting (model={model}, input_length={len(raw_text)} chars)")
+    batcher = get_local_batcher()
+    if batcher is None:
+        formatted = await _format_local_chat(raw_text, model=model, temperature=temperature)
     else:
-        logger.error(f"Unknown provider: {PROVIDER}")
-        raise ValueError(f"Unknown provider: {PROVIDER}")
+        formatted = await batcher.submit((model, temperature), raw_text)
+    logger.info(f"Local formatting completed. Output length: {len(formatted)} characters")
+    return formatted
+
+
+def format_transcript_local_stream(
+    raw_text: str, *, model: Optional[str] = None, temperature: float = 0.2
+) -> AsyncIterator[str]:
+    # Streams bypass the batcher: each one is its own chat request
+    model = model or settings.local_formatting_model
+    logger.info(f"Starting local streaming formatting (model={model}, input_length={len(raw_text)} chars)")
+    return _stream_openai_compatible(
+        get_local_client(), raw_text, model=model, temperature=temperature, max_tokens=settings.local_max_tokens
+    )
+
+
+# Late-bound like the transcription engines, so reassigned module functions are used
+register_engine(Engine(
+    name="openai",
+    kind=FORMATTING,
+    default_model=OPENAI_FORMATTING_MODEL,
+    models=OPENAI_FORMATTING_MODELS,
+    capabilities=EngineCapabilities(streaming=True),
+    call=lambda *args, **kwargs: format_transcript_openai_async(*args, **kwargs),
+    stream=lambda *args, **kwargs: format_transcript_openai_stream(*args, **kwargs),
+))
+register_engine(Engine(
+    name="mistral",
+    kind=FORMATTING,
+    default_model=MISTRAL_FORMATTING_MODEL,
+    models=MISTRAL_FORMATTING_MODELS,
+    capabilities=EngineCapabilities(streaming=True),
+    call=lambda *args, **kwargs: format_transcript_mistral_async(*args, **kwargs),
+    stream=lambda *args, **kwargs: format_transcript_mistral_stream(*args, **kwargs),
+))
+register_engine(Engine(
+    name="local",
+    kind=FORMATTING,
+    default_model=lambda: settings.local_formatting_model,
+    capabilities=EngineCapabilities(streaming=True),
+    call=lambda *args, **kwargs: format_transcript_local_async(*args, **kwargs),
+    stream=lambda *args, **kwargs: format_transcript_local_stream(*args, **kwargs),
+))
+
+
+def get_formatting_engine(name: Optional[str] = None) -> Engine:
+    """The named formatting engine, or the configured ``PROVIDER``'s."""
+    return get_engine(FORMATTING, name or settings.provider)
+
+
+async def format_transcript_async(
+    raw_text: str,
+    *,
+    temperature: float = 0.2,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+) -> str:
+    """Native async counterpart of format_transcript.
+
+    ``engine`` and ``model`` select the formatting engine for this call
+    (default: ``PROVIDER`` and its default model). Calls go through the
+    provider's limiter; transient failures are retried and may fail over to
+    another provider's engine with its default model (see
+    app.utils.resilience).
+    """
+    text, _, _ = await _format_async(raw_text, temperature=temperature, engine=engine, model=model)
+    return text
+
+
+async def _format_async(
+    raw_text: str,
+    *,
+    temperature: float = 0.2,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Tuple[str, str, str]:
+    # format_transcript_async, also returning the engine and model that answered
+    primary = get_formatting_engine(engine)
+    primary_model = primary.resolve_model(model)
+    logger.debug(f"Formatting transcript with engine: {primary.name} (model={primary_model})")
+    candidates = []
+    for provider in provider_candidates(primary.provider_name):
+        candidate = primary if provider == primary.provider_name else find_engine(FORMATTING, provider)
+        if candidate is None:
+            continue
+        candidate_model = primary_model if candidate is primary else candidate.resolve_model(None)
+
+        async def call(candidate=candidate, candidate_model=candidate_model) -> Tuple[str, str, str]:
+            text = await run_limited(
+                candidate.provider_name,
+                lambda: candidate.call(raw_text, model=candidate_model, temperature=temperature),
+            )
+            return text, candidate.name, candidate_model
+        candidates.append((candidate.provider_name, call))
+    return await call_with_resilience("format", candidates)
+
+
+_format_cache: Optional[Cache] = None
+
+
+def get_format_cache() -> Optional[Cache]:
+    """Return the shared formatting cache for the configured backend, or None."""
+    global _format_cache
+    backend = settings.format_cache_backend
+    if backend == "none":
+        return None
+    if _format_cache is None:
+        if backend == "memory":
+            _format_cache = LRUCache(
+                settings.format_cache_max_entries,
+                max_bytes=settings.format_cache_max_bytes,
+                ttl_seconds=settings.format_cache_ttl_seconds,
+            )
+        elif backend == "sqlite":
+            _format_cache = SQLiteCache(
+                Path(settings.cache_dir) / "formatting.sqlite3",
+                max_entries=settings.format_cache_max_entries,
+                max_bytes=settings.format_cache_max_bytes,
+                ttl_seconds=settings.format_cache_ttl_seconds,
+            )
+        else:
+            raise ValueError(f"Unknown format cache backend: {backend}")
+    return _format_cache
+
+
+def format_cache_key(raw_text: str, *, provider: str, model: str, temperature: float) -> str:
+    # The system prompt is part of the key, so editing it invalidates old entries
+    return make_cache_key(
+        "format",
+        text=raw_text,
+        system=SYSTEM_INSTRUCTION,
+        provider=provider,
+        model=model,
+        temperature=temperature,
+    )
+
+
+def split_for_formatting(raw_text: str, *, engine: Engine, model: str) -> List[TextChunk]:
+    """Split ``raw_text`` into chunks under ``FORMAT_CHUNK_MAX_TOKENS`` for ``model``.
+
+    Returns a single chunk when the text fits or chunking is disabled.
+    """
+    max_tokens = settings.format_chunk_max_tokens
+    if max_tokens <= 0:
+        return [TextChunk(0, raw_text)]
+    count_tokens = get_token_counter(engine.provider_name, model)
+    if count_tokens(raw_text) <= max_tokens:
+        return [TextChunk(0, raw_text)]
+    return split_text(
+        raw_text,
+        max_tokens=max_tokens,
+        count_tokens=count_tokens,
+        context_tokens=settings.format_chunk_context_tokens,
+    )
+
+
+def _chunk_prompt(chunk: TextChunk) -> str:
+    headings = FIRST_CHUNK_HEADINGS if chunk.index == 0 else NEXT_CHUNK_HEADINGS
+    parts = [CHUNK_INSTRUCTION.format(part=chunk.index + 1, headings=headings)]
+    if chunk.context:
+        parts.append(f"Preceding text:\n{chunk.context}")
+    parts.append(f"Part to format:\n{chunk.text}")
+    return "\n\n".join(parts)
+
+
+def _answered_by(results: List[Tuple[str, Optional[str], Optional[str]]]) -> Tuple[Optional[str], Optional[str]]:
+    # The engine and model that formatted every chunk; None when failover mixed them
+    answered = {(engine, model) for _, engine, model in results}
+    return answered.pop() if len(answered) == 1 else (None, None)
+
+
+def _start_chunks(
+    chunks: List[TextChunk], *, temperature: float, use_cache: bool, engine: Engine, model: str
+) -> List["asyncio.Future[Tuple[str, Optional[str], Optional[str]]]"]:
+    concurrency = max(1, settings.format_chunk_concurrency)
+    logger.info(f"Formatting transcript in {len(chunks)} chunks (concurrency={concurrency})")
+    slots = asyncio.Semaphore(concurrency)
+
+    async def format_chunk(chunk: TextChunk) -> Tuple[str, Optional[str], Optional[str]]:
+        async with slots:
+            return await _format_cached_async(
+                _chunk_prompt(chunk),
+                temperature=temperature,
+                use_cache=use_cache,
+                engine=engine.name,
+                model=model,
+                chunked=False,
+            )
+
+    return [asyncio.ensure_future(format_chunk(chunk)) for chunk in chunks]
+
+
+async def _format_chunks(
+    chunks: List[TextChunk], *, temperature: float, use_cache: bool, engine: Engine, model: str
+) -> Tuple[str, Optional[str], Optional[str]]:
+    results = await gather_or_cancel(
+        _start_chunks(chunks, temperature=temperature, use_cache=use_cache, engine=engine, model=model)
+    )
+    return (merge_formatted_chunks([text for text, _, _ in results]), *_answered_by(results))
+
+
+async def format_transcript_cached_async(
+    raw_text: str,
+    *,
+    temperature: float = 0.2,
+    use_cache: bool = True,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    chunked: bool = True,
+) -> str:
+    """format_transcript_async behind the formatting cache.
+
+    Cache lookups run on the I/O pool; the provider call is awaited directly.
+    Results are keyed on the engine and model that answered, which after a
+    failover are not the selected ones. With ``chunked``,
+    text over ``FORMAT_CHUNK_MAX_TOKENS`` is split at paragraph or sentence
+    boundaries, the chunks are formatted concurrently (each cached on its
+    own) and merged.
+    """
+    formatted, _, _ = await _format_cached_async(
+        raw_text, temperature=temperature, use_cache=use_cache, engine=engine, model=model, chunked=chunked
+    )
+    return formatted
+
+
+async def _format_cached_async(
+    raw_text: str,
+    *,
+    temperature: float = 0.2,
+    use_cache: bool = True,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    chunked: bool = True,
+) -> Tuple[str, Optional[str], Optional[str]]:
+    # format_transcript_cached_async, also returning the engine and model that
+    # answered (None when failover had chunks formatted by different engines)
+    selected = get_formatting_engine(engine)
+    model = selected.resolve_model(model)
+
+    async def produce() -> Tuple[str, Optional[str], Optional[str]]:
+        if chunked and raw_text and raw_text.strip():
+            chunks = split_for_formatting(raw_text, engine=selected, model=model)
+            if len(chunks) > 1:
+                return await _format_chunks(
+                    chunks, temperature=temperature, use_cache=use_cache, engine=selected, model=model
+                )
+        return await _format_async(raw_text, temperature=temperature, engine=selected.name, model=model)
+
+    cache = get_format_cache()
+    if cache is None or not raw_text or not raw_text.strip():
+        return await produce()
+
+    key = format_cache_key(raw_text, provider=selected.name, model=model, temperature=temperature)
+    if use_cache:
+        cached = await run_io(cache.get, key)
+        if cached is not None:
+            logger.info(f"Formatting cache hit ({len(cached)} characters)")
+            return cached, selected.name, model
+
+    formatted, answered_engine, answered_model = await produce()
+    await _cache_formatted(
+        cache, raw_text, formatted, temperature=temperature, engine=answered_engine, model=answered_model
+    )
+    return formatted, answered_engine, answered_model
+
+
+async def _cache_formatted(
+    cache: Cache, raw_text: str, formatted: str, *, temperature: float, engine: Optional[str], model: Optional[str]
+) -> None:
+    # Keyed on the engine that answered, so a failover result is never served
+    # as the requested engine's
+    if not formatted:
+        return
+    if engine is None:
+        logger.info("Chunks were formatted by different engines, not caching the result")
+        return
+    key = format_cache_key(raw_text, provider=engine, model=model, temperature=temperature)
+    await run_io(cache.set, key, formatted)
+
+
+class SegmentFormatter:
+    """Formats a transcript while it is still being transcribed.
+
+    Segments are passed to ``add`` in order. Whenever the pending text
+    exceeds ``FORMAT_CHUNK_MAX_TOKENS``, the complete chunks are formatted
+    in the background, at most ``FORMAT_CHUNK_CONCURRENCY`` at a time;
+    ``add`` waits for a free slot, which holds back the producer. ``finish``
+    formats the remainder and returns the merged text, which is stored in
+    the formatting cache like a whole-text result. A transcript that never
+    outgrows one chunk is formatted in a single call.
+    """
+
+    def __init__(
+        self,
+        *,
+        temperature: float = 0.2,
+        use_cache: bool = True,
+        engine: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        self.temperature = temperature
+        self.use_cache = use_cache
+        self.engine = get_formatting_engine(engine)
+        self.model = self.engine.resolve_model(model)
+        self._count_tokens = get_token_counter(self.engine.provider_name, self.model)
+        self._slots = asyncio.Semaphore(max(1, settings.format_chunk_concurrency))
+        self._segments: List[str] = []
+        self._pending: List[str] = []
+        self._previous = ""
+        self._tasks: List["asyncio.Future[Tuple[str, Optional[str], Optional[str]]]"] = []
+
+    @property
+    def received(self) -> int:
+        return len(self._segments)
+
+    async def add(self, segment: str) -> None:
+        for task in self._tasks:
+            # Fail fast rather than formatting the rest of a transcript that cannot complete
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        segment = segment.strip()
+        if not segment:
+            return
+        self._segments.append(segment)
+        self._pending.append(segment)
+        max_tokens = settings.format_chunk_max_tokens
+        pending = " ".join(self._pending)
+        if max_tokens <= 0 or self._count_tokens(pending) <= max_tokens:
+            return
+        chunks = split_text(pending, max_tokens=max_tokens, count_tokens=self._count_tokens)
+        # The last chunk may still grow with the next segments
+        for chunk in chunks[:-1]:
+            await self._dispatch(chunk.text)
+        self._pending = [chunks[-1].text]
+
+    async def _dispatch(self, text: str) -> None:
+        await self._slots.acquire()
+        context = text_tail(self._previous, settings.format_chunk_context_tokens, self._count_tokens)
+        chunk = TextChunk(len(self._tasks), text, context=context)
+        self._previous = text
+        logger.debug(f"Formatting segment chunk {chunk.index} ({len(text)} characters)")
+        task = asyncio.ensure_future(
+            _format_cached_async(
+                _chunk_prompt(chunk),
+                temperature=self.temperature,
+                use_cache=self.use_cache,
+                engine=self.engine.name,
+                model=self.model,
+                chunked=False,
+            )
+        )
+        task.add_done_callback(lambda _: self._slots.release())
+        self._tasks.append(task)
+
+    async def finish(self) -> str:
+        text = " ".join(self._segments)
+        if not self._tasks:
+            return await format_transcript_cached_async(
+                text, temperature=self.temperature, use_cache=self.use_cache, engine=self.engine.name, model=self.model
+            )
+        if self._pending:
+            await self._dispatch(" ".join(self._pending))
+            self._pending = []
+        logger.info(f"Formatted transcript in {len(self._tasks)} chunks while transcribing")
+        results = await gather_or_cancel(self._tasks)
+        formatted = merge_formatted_chunks([chunk_text for chunk_text, _, _ in results])
+        cache = get_format_cache()
+        if cache is not None:
+            engine, model = _answered_by(results)
+            await _cache_formatted(cache, text, formatted, temperature=self.temperature, engine=engine, model=model)
+        return formatted
+
+    async def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+_stream_ttft = LatencyTracker()
+
+
+class _OpenedStream:
+    """A provider stream whose first delta has arrived (``first`` is None if it ended at once).
+
+    The rest of the deltas are read with ``async for``. The stream holds its
+    provider's limiter slot until ``aclose``, which closes the provider
+    response and reports the outcome to the limiter; hedging calls it on a
+    stream that lost the race.
+    """
+
+    def __init__(self, deltas: AsyncIterator[str], limiter: ProviderLimiter, *, engine: str, model: str):
+        self.first: Optional[str] = None
+        self.engine = engine
+        self.model = model
+        self._deltas = deltas
+        self._limiter: Optional[ProviderLimiter] = limiter
+        self._error: Optional[BaseException] = None
+
+    def __aiter__(self) -> "_OpenedStream":
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            return await self._deltas.__anext__()
+        except StopAsyncIteration:
+            raise
+        except BaseException as e:
+            self._error = e
+            raise
+
+    async def aclose(self) -> None:
+        if self._limiter is None:
+            return
+        limiter, self._limiter = self._limiter, None
+        try:
+            await self._deltas.aclose()
+        finally:
+            limiter.release(self._error)
+
+
+async def _open_format_stream(primary: Engine, model: str, raw_text: str, temperature: float) -> _OpenedStream:
+    """Start a stream and wait for its first delta.
+
+    Retries, hedging and failover apply until the first delta arrives; an
+    error after that is raised to the reader. The provider's limiter admits
+    the stream and keeps its slot taken until the stream is closed.
+    """
+    candidates = []
+    for provider in provider_candidates(primary.provider_name):
+        candidate = primary if provider == primary.provider_name else find_engine(FORMATTING, provider)
+        if candidate is None or candidate.stream is None:
+            continue
+        candidate_model = model if candidate is primary else candidate.resolve_model(None)
+
+        async def open_stream(candidate=candidate, candidate_model=candidate_model) -> _OpenedStream:
+            limiter = get_limiter(candidate.provider_name)
+            await limiter.acquire()
+            try:
+                deltas = candidate.stream(raw_text, model=candidate_model, temperature=temperature)
+            except BaseException as e:
+                limiter.release(e)
+                raise
+            opened = _OpenedStream(deltas, limiter, engine=candidate.name, model=candidate_model)
+            try:
+                opened.first = await opened.__anext__()
+            except StopAsyncIteration:
+                pass
+            except BaseException:
+                await opened.aclose()
+                raise
+            return opened
+
+        candidates.append((candidate.provider_name, open_stream))
+    return await call_with_resilience("format", candidates)
+
+
+class FormatStream:
+    """Formatted text delivered as deltas, read with ``async for delta in stream.deltas()``.
+
+    A cache hit arrives as a single delta. Engines that cannot stream are
+    called normally and their result arrives as one delta. Text over
+    ``FORMAT_CHUNK_MAX_TOKENS`` is formatted in chunks as by
+    format_transcript_cached_async, each chunk arriving as one delta once
+    it and the chunks before it are done. Once the stream
+    is read to the end, ``text`` holds the whole result, which is stored in
+    the formatting cache; ``time_to_first_token`` and ``elapsed`` are in
+    seconds.
+    """
+
+    def __init__(
+        self,
+        raw_text: str,
+        *,
+        temperature: float = 0.2,
+        use_cache: bool = True,
+        engine: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        self.raw_text = raw_text
+        self.temperature = temperature
+        self.use_cache = use_cache
+        self.engine = get_formatting_engine(engine)
+        self.model = self.engine.resolve_model(model)
+        self.text = ""
+        self.cached = False
+        self.time_to_first_token: Optional[float] = None
+        self.elapsed: Optional[float] = None
+
+    async def deltas(self) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        parts: List[str] = []
+
+        def received(delta: str) -> str:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = round(time.perf_counter() - start, 3)
+            parts.append(delta)
+            return delta
+
+        if not self.raw_text or not self.raw_text.strip():
+            self.elapsed = 0.0
+            return
+
+        cache = get_format_cache()
+        if cache is not None:
+            key = format_cache_key(self.raw_text, provider=self.engine.name, model=self.model, temperature=self.temperature)
+            cached = await run_io(cache.get, key) if self.use_cache else None
+            if cached is not None:
+                logger.info(f"Formatting cache hit ({len(cached)} characters)")
+                self.cached = True
+                yield received(cached)
+                self.text = cached
+                self.elapsed = round(time.perf_counter() - start, 3)
+                return
+
+        answered_engine, answered_model = self.engine.name, self.model
+        chunks = split_for_formatting(self.raw_text, engine=self.engine, model=self.model)
+        if len(chunks) > 1:
+            tasks = _start_chunks(
+                chunks, temperature=self.temperature, use_cache=self.use_cache, engine=self.engine, model=self.model
+            )
+            results: List[Tuple[str, Optional[str], Optional[str]]] = []
+            merged = ""
+            try:
+                for task in tasks:
+                    results.append(await task)
+                    # Merging is prefix-stable, so each chunk only appends to the text sent so far
+                    text = merge_formatted_chunks([chunk_text for chunk_text, _, _ in results])
+                    if len(text) > len(merged):
+                        yield received(text[len(merged):])
+                    merged = text
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            answered_engine, answered_model = _answered_by(results)
+        elif self.engine.stream is None:
+            formatted, answered_engine, answered_model = await _format_async(
+                self.raw_text, temperature=self.temperature, engine=self.engine.name, model=self.model
+            )
+            if formatted:
+                yield received(formatted)
+        else:
+            opened = await _open_format_stream(self.engine, self.model, self.raw_text, self.temperature)
+            answered_engine, answered_model = opened.engine, opened.model
+            try:
+                if opened.first is not None:
+                    _stream_ttft.record(time.perf_counter() - start)
+                    yield received(opened.first)
+                    async for delta in opened:
+                        yield received(delta)
+            finally:
+                # Closes the provider response if the reader stops early
+                await opened.aclose()
+
+        self.text = "".join(parts)
+        self.elapsed = round(time.perf_counter() - start, 3)
+        logger.info(
+            f"Streaming formatting completed. Output length: {len(self.text)} characters "
+            f"(first token after {self.time_to_first_token}s, total {self.elapsed}s)"
+        )
+        if cache is not None:
+            await _cache_formatted(
+                cache,
+                self.raw_text,
+                self.text,
+                temperature=self.temperature,
+                engine=answered_engine,
+                model=answered_model,
+            )
+
 
+def format_stream_stats() -> dict:
+    """Time to first token of recent streamed formatting calls, in seconds."""
+    p50 = _stream_ttft.percentile(50)
+    p95 = _stream_ttft.percentile(95)
+    return {
+        "samples": len(_stream_ttft),
+        "ttftP50": round(p50, 3) if p50 is not None else None,
+        "ttftP95": round(p95, 3) if p95 is not None else None,
+    }
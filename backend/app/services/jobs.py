@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from app.config import settings
+from app.services.pipeline import run_pipeline, store_result
+from app.services.uploads import cleanup_request_dir
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker."""
+
+
+@dataclass
+class Job:
+    id: str
+    filenames: List[str]
+    language: Optional[str]
+    format_output: bool
+    chunked: Optional[bool] = None
+    use_cache: bool = True
+    trim_silence: Optional[bool] = None
+    engine: Optional[str] = None
+    model: Optional[str] = None
+    format_engine: Optional[str] = None
+    format_model: Optional[str] = None
+    status: JobStatus = JobStatus.QUEUED
+    stage: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "stage": self.stage,
+            "filenames": self.filenames,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "timings": dict(self.timings),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs transcription pipelines as background tasks on the event loop.
+
+    At most ``max_workers`` pipelines run at once; further jobs wait for a
+    slot, up to ``max_queued`` before submissions are refused. Finished jobs
+    are kept for polling, oldest evicted past ``retention``.
+    """
+
+    def __init__(self, max_workers: int, max_queued: int, retention: int):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def pipeline_slots(self) -> asyncio.Semaphore:
+        """The semaphore capping running pipelines; synchronous requests hold a slot too."""
+        # Semaphores bind to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def submit(
+        self,
+        src_paths: List[Path],
+        request_dir: Path,
+        *,
+        filenames: List[str],
+        language: Optional[str] = None,
+        format_output: bool = True,
+        chunked: Optional[bool] = None,
+        use_cache: bool = True,
+        trim_silence: Optional[bool] = None,
+        engine: Optional[str] = None,
+        model: Optional[str] = None,
+        format_engine: Optional[str] = None,
+        format_model: Optional[str] = None,
+        src_sha256s: Optional[List[str]] = None,
+    ) -> Job:
+        """Queue a pipeline run. Must be called from the event loop."""
+        queued = sum(1 for j in self._jobs.values() if j.status == JobStatus.QUEUED)
+        if queued >= self.max_queued:
+            raise JobQueueFullError(f"Too many queued jobs ({queued})")
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            filenames=filenames,
+            language=language,
+            format_output=format_output,
+            chunked=chunked,
+            use_cache=use_cache,
+            trim_silence=trim_silence,
+            engine=engine,
+            model=model,
+            format_engine=format_engine,
+            format_model=format_model,
+        )
+        self._jobs[job.id] = job
+        self._evict_finished()
+
+        task = asyncio.get_running_loop().create_task(self._run(job, src_paths, request_dir, src_sha256s))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Queued transcription job {job.id} for {filenames}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _evict_finished(self) -> None:
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.is_finished][:excess]:
+            del self._jobs[job_id]
+
+    def _set_stage(self, job: Job, stage: str) -> None:
+        job.stage = stage
+
+    async def _run(
+        self, job: Job, src_paths: List[Path], request_dir: Path, src_sha256s: Optional[List[str]] = None
+    ) -> None:
+        status = JobStatus.FAILED
+        try:
+            async with self.pipeline_slots():
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                logger.info(f"Starting transcription job {job.id}")
+                result = await run_pipeline(
+                    src_paths,
+                    language=job.language,
+                    format_output=job.format_output,
+                    chunked=job.chunked,
+                    use_cache=job.use_cache,
+                    trim_silence=job.trim_silence,
+                    engine=job.engine,
+                    model=job.model,
+                    format_engine=job.format_engine,
+                    format_model=job.format_model,
+                    timings=job.timings,
+                    on_stage=lambda stage: self._set_stage(job, stage),
+                    src_sha256s=src_sha256s,
+                )
+            transcript_id = await store_result(
+                result,
+                filenames=job.filenames,
+                language=job.language,
+                engine=job.engine,
+                model=job.model,
+                format_engine=job.format_engine,
+                format_model=job.format_model,
+            )
+            job.result = {
+                "id": transcript_id,
+                "text": result.text,
+                "formattedText": result.formatted,
+                "chunks": result.chunks,
+                "audio": result.audio,
+                "silenceRemovedSeconds": result.silence_removed_seconds,
+            }
+            status = JobStatus.COMPLETED
+            logger.info(f"Transcription job {job.id} completed")
+        except asyncio.CancelledError:
+            job.error = "Job cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Transcription job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+        finally:
+            cleanup_request_dir(request_dir)
+            # Publish the final status last so pollers never see a finished
+            # job whose uploads are still on disk.
+            job.stage = None
+            job.finished_at = time.time()
+            job.status = status
+
+
+job_manager = JobManager(
+    max_workers=settings.max_concurrent_pipelines,
+    max_queued=settings.max_queued_jobs,
+    retention=settings.job_retention,
+)
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from app.config import settings
+from app.services.formatter import SegmentFormatter, format_transcript_cached_async
+from app.services.preprocessor import prepare_audio_async
+from app.services.store import get_transcript_store
+from app.services.transcriber import TranscriptionResult, transcribe_audio_file_cached_async
+from app.utils.execution import gather_or_cancel, run_io
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class PipelineResult:
+    text: str
+    formatted: Optional[str]
+    timings: Dict[str, float] = field(default_factory=dict)
+    chunks: List[dict] = field(default_factory=list)
+    cached: bool = False
+    audio: Optional[dict] = None
+    silence_removed_seconds: float = 0.0
+    # The transcription engine and model that answered (after any failover)
+    engine: Optional[str] = None
+    model: Optional[str] = None
+
+
+async def _transcribe_into(
+    segment_formatter: SegmentFormatter,
+    transcribe: Callable[..., Awaitable[TranscriptionResult]],
+) -> TranscriptionResult:
+    """Run ``transcribe`` while feeding its segments to ``segment_formatter``.
+
+    Segments pass through a queue of ``PIPELINE_QUEUE_SIZE``: a formatter
+    that falls behind holds back transcription instead of buffering text.
+    If either side fails the other is cancelled.
+    """
+    segments: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=max(1, settings.pipeline_queue_size))
+
+    async def produce() -> TranscriptionResult:
+        result = await transcribe(on_segment=segments.put)
+        await segments.put(None)
+        return result
+
+    async def consume() -> None:
+        while (segment := await segments.get()) is not None:
+            await segment_formatter.add(segment)
+
+    try:
+        transcription, _ = await gather_or_cancel([produce(), consume()])
+    except BaseException:
+        await segment_formatter.cancel()
+        raise
+    return transcription
+
+
+async def run_pipeline(
+    src_paths: List[Path],
+    *,
+    language: Optional[str] = None,
+    format_output: bool = True,
+    chunked: Optional[bool] = None,
+    use_cache: bool = True,
+    trim_silence: Optional[bool] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    format_engine: Optional[str] = None,
+    format_model: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    src_sha256s: Optional[List[str]] = None,
+) -> PipelineResult:
+    """Run preprocess -> transcribe -> (optional) format on uploaded files.
+
+    ffmpeg runs as an asyncio subprocess and provider calls go through the
+    SDKs' async clients, so the event loop stays free throughout.
+    Stage durations in seconds are recorded into ``timings`` as each stage
+    finishes, so callers holding the dict can observe progress.
+
+    ``chunked`` (default: ``CHUNKED_TRANSCRIPTION``) transcribes long
+    recordings as silence-aligned chunks in parallel. ``use_cache=False``
+    bypasses the transcript and formatting caches for this run.
+    ``trim_silence`` (default: ``SILENCE_TRIM``) shortens long silences
+    before transcription; chunk offsets are mapped back to the original
+    recording. ``engine``/``model`` and ``format_engine``/``format_model``
+    pick the transcription and formatting engines (see app.services.engines).
+    ``src_sha256s``, the uploads' digests computed while saving them, spare
+    hashing the files again to probe them.
+    With ``PIPELINE_FORMATTING``, chunked transcriptions stream their text
+    through a bounded queue into a SegmentFormatter, so formatting overlaps
+    transcription and the "format" stage only covers the remaining chunks.
+    """
+    timings = {} if timings is None else timings
+    chunked = settings.chunked_transcription if chunked is None else chunked
+
+    async def stage(name: str, awaitable: Awaitable[T]) -> T:
+        if on_stage is not None:
+            on_stage(name)
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+
+    # Preprocess (concatenate if multiple and ensure compatible)
+    prepared = await stage(
+        "preprocess", prepare_audio_async(src_paths, trim_silence=trim_silence, sha256s=src_sha256s)
+    )
+
+    # Transcribe (served from the transcript cache when possible)
+    def transcribe(**kwargs) -> Awaitable[TranscriptionResult]:
+        return stage(
+            "transcribe",
+            transcribe_audio_file_cached_async(
+                prepared.path,
+                language=language,
+                temperature=0.0,
+                chunked=chunked,
+                use_cache=use_cache,
+                audio_sha256=prepared.sha256,
+                duration=prepared.duration,
+                engine=engine,
+                model=model,
+                **kwargs,
+            ),
+        )
+
+    # Chunked transcriptions are formatted segment by segment as they arrive
+    segment_formatter: Optional[SegmentFormatter] = None
+    if format_output and chunked and settings.pipeline_formatting and settings.format_chunk_max_tokens > 0:
+        segment_formatter = SegmentFormatter(use_cache=use_cache, engine=format_engine, model=format_model)
+
+    try:
+        if segment_formatter is None:
+            transcription = await transcribe()
+        else:
+            transcription = await _transcribe_into(segment_formatter, transcribe)
+    finally:
+        prepared.cleanup()
+    text = transcription.text
+
+    # Optional formatting; after a pipelined transcription this only waits for the last chunks
+    formatted = None
+    if format_output and text:
+        if segment_formatter is not None and segment_formatter.received:
+            try:
+                formatted = await stage("format", segment_formatter.finish())
+            except BaseException:
+                await segment_formatter.cancel()
+                raise
+        else:
+            formatted = await stage(
+                "format",
+                format_transcript_cached_async(text, use_cache=use_cache, engine=format_engine, model=format_model),
+            )
+
+    chunks = transcription.chunks
+    if prepared.time_map is not None:
+        to_original = prepared.time_map.to_original
+        chunks = [replace(c, start=to_original(c.start), end=to_original(c.end)) for c in chunks]
+
+    logger.debug(f"Pipeline timings: {timings}")
+    return PipelineResult(
+        text=text,
+        formatted=formatted,
+        timings=timings,
+        chunks=[c.to_dict() for c in chunks],
+        cached=transcription.cached,
+        audio=prepared.info.to_dict() if prepared.info is not None else None,
+        silence_removed_seconds=prepared.removed_seconds,
+        engine=transcription.engine,
+        model=transcription.model,
+    )
+
+
+async def store_result(
+    result: PipelineResult,
+    *,
+    filenames: List[str],
+    language: Optional[str] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    format_engine: Optional[str] = None,
+    format_model: Optional[str] = None,
+) -> Optional[str]:
+    """Save a pipeline result in the transcript store and return its id.
+
+    Returns None when the store is disabled or the write fails; the
+    transcript is still returned to the caller in that case.
+    """
+    store = get_transcript_store()
+    if store is None:
+        return None
+    metadata = {
+        "engine": result.engine or engine,
+        "model": result.model or model,
+        "formatEngine": format_engine,
+        "formatModel": format_model,
+        "audio": result.audio,
+        "timings": dict(result.timings),
+    }
+    try:
+        stored = await run_io(
+            store.create,
+            result.text,
+            result.formatted,
+            filenames=filenames,
+            language=language,
+            metadata=metadata,
+        )
+    except Exception as e:
+        logger.error(f"Could not store transcript for {filenames}: {e}", exc_info=True)
+        return None
+    return stored.id
@@ -1,9 +1,19 @@
+import asyncio
+import bisect
 import logging
+import math
+import re
 import shutil
 import subprocess
 import tempfile
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Tuple, List
+from typing import Collection, Dict, Optional, Tuple, List
+
+from app.config import settings
+from app.services.cache import sha256_file
+from app.services.probe import AudioInfo, probe_audio
+from app.utils.execution import gather_or_cancel, run_io, run_subprocess
 
 logger = logging.getLogger(__name__)
 
@@ -17,36 +27,118 @@ def is_supported_audio(path: Path) -> bool:
     return path.suffix.lower() in SUPPORTED_AUDIO_EXTS
 
 
-def ensure_supported_or_convert_to_mp3(src: Path) -> Path:
+@dataclass(frozen=True)
+class EncodingProfile:
+    name: str
+    suffix: str
+    # Codec name as reported by ffprobe, and the ffmpeg encoder producing it
+    codec: str
+    encoder: str
+    bitrate: Optional[str] = None
+    sample_rate: int = 16000
+    channels: int = 1
+    # False when the container reports a fixed rate whatever was encoded: Ogg Opus always says 48 kHz
+    reports_sample_rate: bool = True
+
+    def encode_args(self) -> List[str]:
+        args = ["-ar", str(self.sample_rate), "-ac", str(self.channels), "-c:a", self.encoder]
+        if self.bitrate:
+            args += ["-b:a", self.bitrate]
+        return args
+
+    def matches(self, info: AudioInfo) -> bool:
+        """True when ``info`` is already at or below this profile's quality."""
+        if info.codec != self.codec or info.channels != self.channels:
+            return False
+        if self.reports_sample_rate and info.sample_rate > self.sample_rate:
+            return False
+        target = _parse_bitrate(self.bitrate)
+        # Tolerate VBR and container overhead, but not a much fatter stream
+        return not (target and info.bit_rate and info.bit_rate > target * 1.5)
+
+
+def _parse_bitrate(bitrate: Optional[str]) -> Optional[int]:
+    if not bitrate:
+        return None
+    value = bitrate.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        value, multiplier = value[:-1], 1000
+    elif value.endswith("m"):
+        value, multiplier = value[:-1], 1000000
+    return int(float(value) * multiplier)
+
+
+# 16 kHz mono targets accepted by both providers, smallest first
+ENCODING_PROFILES: Dict[str, EncodingProfile] = {
+    "opus": EncodingProfile("opus", ".ogg", "opus", "libopus", "24k", reports_sample_rate=False),
+    "mp3": EncodingProfile("mp3", ".mp3", "mp3", "libmp3lame", "32k"),
+    "flac": EncodingProfile("flac", ".flac", "flac", "flac"),
+}
+
+# Used when converting unsupported formats with AUDIO_PROFILE=original
+_FALLBACK_MP3 = EncodingProfile("mp3", ".mp3", "mp3", "libmp3lame", "128k")
+
+
+def get_encoding_profile() -> Optional[EncodingProfile]:
+    """Return the configured AUDIO_PROFILE, or None for "original"."""
+    name = settings.audio_profile
+    if name == "original":
+        return None
+    profile = ENCODING_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown audio profile: {name}")
+    if settings.audio_bitrate and profile.bitrate:
+        profile = replace(profile, bitrate=settings.audio_bitrate)
+    return profile
+
+
+async def ensure_supported_or_convert_to_mp3_async(
+    src: Path, *, info: Optional[AudioInfo] = None, formats: Optional[Collection[str]] = None
+) -> Path:
+    """Return ``src`` if its extension is supported, else an MP3 copy of it.
+
+    ``formats`` (extensions without the dot, as in an engine's capabilities)
+    replaces ``SUPPORTED_AUDIO_EXTS``. When ``info`` shows the audio stream
+    is already MP3, it is remuxed into an ``.mp3`` container instead of
+    being decoded and re-encoded.
+    """
     suffix = src.suffix.lower()
-    if suffix in SUPPORTED_AUDIO_EXTS:
+    supported = suffix in SUPPORTED_AUDIO_EXTS if formats is None else suffix.lstrip(".") in formats
+    if supported:
         logger.debug(f"Audio format {suffix} is already supported, no conversion needed")
         return src
 
-    logger.info(f"Audio format {suffix} not supported, converting to MP3")
     if shutil.which("ffmpeg") is None:
         raise RuntimeError("ffmpeg not found on PATH. Install ffmpeg to enable conversion.")
 
     tmp_dir = Path(tempfile.mkdtemp(prefix="audio_convert_"))
     dst = tmp_dir / (src.stem + ".mp3")
-    logger.debug(f"Converting {src} to {dst}")
 
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", str(src),
-        "-ar", "16000",
-        "-ac", "1",
-        "-c:a", "libmp3lame",
-        "-b:a", "128k",
-        str(dst),
-    ]
+    if info is not None and info.codec == "mp3":
+        logger.info(f"Audio container {suffix} not supported, remuxing its MP3 stream")
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", str(src),
+            "-map", "0:a:0",
+            "-c:a", "copy",
+            str(dst),
+        ]
+    else:
+        logger.info(f"Audio format {suffix} not supported, converting to MP3")
+        cmd = ["ffmpeg", "-y", "-i", str(src), *_FALLBACK_MP3.encode_args(), str(dst)]
+    logger.debug(f"Converting {src} to {dst}")
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        await run_subprocess(cmd)
         logger.info(f"Audio conversion completed: {src} -> {dst}")
     except subprocess.CalledProcessError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
         error_msg = e.stderr.decode(errors='ignore')
         logger.error(f"ffmpeg conversion failed: {error_msg}")
         raise RuntimeError(f"ffmpeg conversion failed: {error_msg}")
+    except asyncio.CancelledError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
 
     if not dst.exists():
         logger.error("Conversion reported success but output file not found")
@@ -54,15 +146,29 @@ def ensure_supported_or_convert_to_mp3(src: Path) -> Path:
     return dst
 
 
+def ensure_supported_or_convert_to_mp3(src: Path) -> Path:
+    """Blocking wrapper around ensure_supported_or_convert_to_mp3_async.
 
+    Must not be called from a running event loop.
+    """
+    return asyncio.run(ensure_supported_or_convert_to_mp3_async(src))
 
-def concatenate_multi_files(sources: List[Path]) -> Path:
-    """Concatenate multiple audio files into a single MP3 file.
+
+async def concatenate_multi_files_async(sources: List[Path], *, sha256s: Optional[List[str]] = None) -> Path:
+    """Concatenate multiple audio files into a single file.
 
     - If only one source is provided, returns it unchanged.
-    - Converts inputs to MP3 first to ensure consistent formats, then uses ffmpeg
-      concat demuxer to join them. Tries a copy-based concat first, falls back
-      to re-encoding if needed.
+    - ``CONCAT_MODE=filter`` (default): probes the inputs, joins them with a
+      stream-copy concat when they are stream-compatible and already match
+      the encoding profile, and otherwise decodes, resamples and encodes
+      every input to the profile in a single ffmpeg run with the ``concat``
+      filter.
+    - ``CONCAT_MODE=convert``: converts inputs to MP3 first, then uses the
+      ffmpeg concat demuxer to join them, trying a copy-based concat before
+      re-encoding.
+
+    ``sha256s``, the content hashes of ``sources`` when already known (from
+    the upload), spares hashing them again to probe them.
     """
     if not sources:
         raise ValueError("No source files provided for concatenation.")
@@ -72,23 +178,117 @@ def concatenate_multi_files(sources: List[Path]) -> Path:
         return sources[0]
 
     logger.info(f"Concatenating {len(sources)} files")
+    if settings.concat_mode == "convert":
+        return await _concat_convert_then_join(sources)
+    return await _concat_single_pass(sources, get_encoding_profile() or _FALLBACK_MP3, sha256s)
 
-    # Ensure each source is MP3 (convert when necessary)
-    mp3_paths: List[Path] = []
-    converted_tmp_dirs: List[Path] = []
+
+def _write_concat_list(paths: List[Path], list_file: Path) -> None:
+    # Write concat demuxer file
+    with list_file.open("w", encoding="utf-8") as f:
+        for p in paths:
+            f.write(f"file '{p.resolve().as_posix()}'\n")
+
+
+def _concat_filter_cmd(sources: List[Path], dst: Path, profile: EncodingProfile) -> List[str]:
+    cmd = ["ffmpeg", "-y"]
     for src in sources:
-        mp3 = ensure_supported_or_convert_to_mp3(src)
-        mp3_paths.append(mp3)
+        cmd += ["-i", str(src)]
+    # Normalize each input, then join them in one decode/encode pass
+    layout = "mono" if profile.channels == 1 else "stereo"
+    normalize = "".join(
+        f"[{i}:a:0]aresample={profile.sample_rate},aformat=channel_layouts={layout}[a{i}];"
+        for i in range(len(sources))
+    )
+    joined = "".join(f"[a{i}]" for i in range(len(sources)))
+    cmd += [
+        "-filter_complex", f"{normalize}{joined}concat=n={len(sources)}:v=0:a=1[out]",
+        "-map", "[out]",
+        *profile.encode_args(),
+        str(dst),
+    ]
+    return cmd
+
+
+async def _concat_single_pass(
+    sources: List[Path], profile: EncodingProfile, sha256s: Optional[List[str]] = None
+) -> Path:
+    tmp_dir = Path(tempfile.mkdtemp(prefix="audio_concat_"))
+    try:
+        return await _concat_single_pass_into(tmp_dir, sources, profile, sha256s)
+    except BaseException:
+        _remove_dirs([tmp_dir])
+        raise
+
+
+async def _concat_single_pass_into(
+    tmp_dir: Path, sources: List[Path], profile: EncodingProfile, sha256s: Optional[List[str]]
+) -> Path:
+    hashes = sha256s if sha256s is not None and len(sha256s) == len(sources) else [None] * len(sources)
+    infos = await gather_or_cancel(
+        probe_audio(src, content_hash=content_hash) for src, content_hash in zip(sources, hashes)
+    )
+    if infos[0] is not None and profile.matches(infos[0]) and all(
+        info is not None and info.stream_signature == infos[0].stream_signature for info in infos
+    ):
+        dst = tmp_dir / f"concatenated{sources[0].suffix.lower()}"
+        list_file = tmp_dir / "inputs.txt"
+        _write_concat_list(sources, list_file)
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(list_file),
+            "-c", "copy",
+            str(dst),
+        ]
+        try:
+            await run_subprocess(cmd)
+            if dst.exists():
+                logger.info(f"Concatenation (stream copy) completed: {dst}")
+                return dst
+        except subprocess.CalledProcessError as e:
+            error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
+            logger.warning(f"Stream-copy concat failed, re-encoding instead: {error_msg}")
+
+    dst = tmp_dir / f"concatenated{profile.suffix}"
+    try:
+        await run_subprocess(_concat_filter_cmd(sources, dst, profile))
+        logger.info(f"Concatenation (single-pass filter) completed: {dst}")
+    except subprocess.CalledProcessError as e:
+        error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
+        logger.error(f"ffmpeg concatenation failed: {error_msg}")
+        raise RuntimeError(f"ffmpeg concatenation failed: {error_msg}")
+
+    if not dst.exists():
+        logger.error("Concatenation reported success but output file not found")
+        raise RuntimeError("Concatenation reported success but output file not found.")
+    return dst
+
+
+async def _concat_convert_then_join(sources: List[Path]) -> Path:
+    # Ensure each source is MP3 (convert when necessary), in parallel. At
+    # most FFMPEG_CONCURRENCY conversions run at once; if one fails the
+    # others are cancelled and their outputs removed.
+    slots = asyncio.Semaphore(max(1, settings.ffmpeg_concurrency))
+    converted_tmp_dirs: List[Path] = []
+
+    async def convert(src: Path) -> Path:
+        async with slots:
+            mp3 = await ensure_supported_or_convert_to_mp3_async(src)
         if mp3.parent.name.startswith("audio_convert_"):
             converted_tmp_dirs.append(mp3.parent)
+        return mp3
+
+    try:
+        mp3_paths = await gather_or_cancel(convert(src) for src in sources)
+    except BaseException:
+        _remove_dirs(converted_tmp_dirs)
+        raise
 
     tmp_dir = Path(tempfile.mkdtemp(prefix="audio_concat_"))
     list_file = tmp_dir / "inputs.txt"
-
-    # Write concat demuxer file
-    with list_file.open("w", encoding="utf-8") as f:
-        for p in mp3_paths:
-            f.write(f"file '{p.resolve().as_posix()}'\n")
+    _write_concat_list(mp3_paths, list_file)
 
     dst = tmp_dir / "concatenated.mp3"
 
@@ -102,7 +302,7 @@ def concatenate_multi_files(sources: List[Path]) -> Path:
         str(dst),
     ]
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        await run_subprocess(cmd)
         logger.info(f"Concatenation completed: {dst}")
     except subprocess.CalledProcessError:
         # Fallback to re-encoding
@@ -118,7 +318,7 @@ def concatenate_multi_files(sources: List[Path]) -> Path:
             str(dst),
         ]
         try:
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            await run_subprocess(cmd)
             logger.info(f"Concatenation (re-encode) completed: {dst}")
         except subprocess.CalledProcessError as e:
             error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
@@ -130,19 +330,461 @@ def concatenate_multi_files(sources: List[Path]) -> Path:
         raise RuntimeError("Concatenation reported success but output file not found.")
 
     # Cleanup any intermediate conversion directories we created
-    for d in converted_tmp_dirs:
+    _remove_dirs(converted_tmp_dirs)
+
+    return dst
+
+
+def _remove_dirs(dirs: List[Path]) -> None:
+    for d in dirs:
         try:
             shutil.rmtree(d)
         except Exception:
             logger.warning(f"Failed to remove temporary dir {d}")
 
-    return dst
 
+def concatenate_multi_files(sources: List[Path]) -> Path:
+    """Blocking wrapper around concatenate_multi_files_async.
+
+    Must not be called from a running event loop.
+    """
+    return asyncio.run(concatenate_multi_files_async(sources))
 
-def preprocess(srcs: List[Path]) -> Path:
+
+async def preprocess_async(srcs: List[Path]) -> Path:
     """Prepare uploaded files for transcription: concatenate (if needed) and
     ensure the result is a supported MP3 file.
+
+    ffmpeg runs as an asyncio subprocess, so awaiting this never blocks the
+    event loop.
     """
-    concatenated = concatenate_multi_files(srcs)
-    compatible_audio = ensure_supported_or_convert_to_mp3(concatenated)
+    concatenated = await concatenate_multi_files_async(srcs)
+    compatible_audio = await ensure_supported_or_convert_to_mp3_async(concatenated)
     return compatible_audio
+
+
+def preprocess(srcs: List[Path]) -> Path:
+    """Blocking wrapper around preprocess_async.
+
+    Must not be called from a running event loop.
+    """
+    return asyncio.run(preprocess_async(srcs))
+
+
+async def normalize_audio_async(src: Path, profile: EncodingProfile, *, info: Optional[AudioInfo] = None) -> Path:
+    """Encode ``src`` to ``profile`` unless ``info`` shows it already matches.
+
+    A matching stream in another container is remuxed without re-encoding.
+    """
+    if info is not None and profile.matches(info):
+        if src.suffix.lower() == profile.suffix:
+            logger.debug(f"{src.name} already matches the {profile.name} profile")
+            return src
+        args = ["-c:a", "copy"]
+        logger.info(f"{src.name} matches the {profile.name} profile, remuxing to {profile.suffix}")
+    else:
+        args = profile.encode_args()
+        logger.info(f"Encoding {src.name} to the {profile.name} profile")
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="audio_normalize_"))
+    dst = tmp_dir / f"{src.stem}{profile.suffix}"
+    cmd = ["ffmpeg", "-y", "-i", str(src), "-map", "0:a:0", "-vn", *args, str(dst)]
+    try:
+        await run_subprocess(cmd)
+    except subprocess.CalledProcessError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
+        logger.error(f"ffmpeg normalization failed: {error_msg}")
+        raise RuntimeError(f"ffmpeg normalization failed: {error_msg}")
+    except asyncio.CancelledError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if not dst.exists():
+        logger.error("Normalization reported success but output file not found")
+        raise RuntimeError("Normalization reported success but output file not found.")
+    return dst
+
+
+@dataclass
+class PreparedAudio:
+    path: Path
+    sha256: str
+    info: Optional[AudioInfo] = None
+    # Temporary directories holding intermediate and prepared files
+    temp_dirs: List[Path] = field(default_factory=list)
+    # Set when long silences were trimmed out of the audio
+    time_map: Optional["TimeMap"] = None
+    removed_seconds: float = 0.0
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.info.duration if self.info is not None else None
+
+    def cleanup(self) -> None:
+        _remove_dirs(self.temp_dirs)
+        self.temp_dirs = []
+
+
+def _total_size(paths: List[Path]) -> int:
+    total = 0
+    for p in paths:
+        try:
+            total += p.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+async def prepare_audio_async(
+    srcs: List[Path], *, trim_silence: Optional[bool] = None, sha256s: Optional[List[str]] = None
+) -> PreparedAudio:
+    """Concatenate the uploads and normalize them to the AUDIO_PROFILE encoding.
+
+    Inputs already matching the profile (per ffprobe) are passed through.
+    With ``AUDIO_PROFILE=original``, or when ffmpeg is unavailable, this
+    falls back to the extension check of preprocess_async. ``trim_silence``
+    (default: ``SILENCE_TRIM``) shortens long silences first, see
+    trim_silences_async. ``sha256s`` are the uploads' content hashes when
+    already known. Callers should ``cleanup()`` the result once the audio is
+    no longer needed.
+    """
+    profile = get_encoding_profile()
+    trim_silence = settings.silence_trim if trim_silence is None else trim_silence
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+
+    concatenated = await concatenate_multi_files_async(srcs, sha256s=sha256s)
+    temp_dirs = [] if concatenated in srcs else [concatenated.parent]
+    source = concatenated
+    trimmed: Optional[TrimmedAudio] = None
+    try:
+        if trim_silence and has_ffmpeg:
+            trimmed = await trim_silences_async(
+                concatenated,
+                profile or _FALLBACK_MP3,
+                noise_db=settings.silence_noise_db,
+                max_silence=settings.silence_trim_min_seconds,
+                keep_gap=settings.silence_trim_keep_seconds,
+            )
+            if trimmed is not None:
+                source = trimmed.path
+                temp_dirs.append(source.parent)
+
+        if source == srcs[0] and sha256s:
+            sha256 = sha256s[0]
+        else:
+            sha256 = await run_io(sha256_file, source)
+        info = await probe_audio(source, content_hash=sha256)
+
+        if profile is not None and has_ffmpeg:
+            prepared = await normalize_audio_async(source, profile, info=info)
+        else:
+            if profile is not None or trim_silence:
+                logger.warning("ffmpeg not found on PATH, sending audio without normalization")
+            prepared = await ensure_supported_or_convert_to_mp3_async(source, info=info)
+        if prepared != source:
+            temp_dirs.append(prepared.parent)
+            sha256 = await run_io(sha256_file, prepared)
+            info = await probe_audio(prepared, content_hash=sha256)
+    except BaseException:
+        _remove_dirs(temp_dirs)
+        raise
+
+    original_bytes = _total_size(srcs)
+    prepared_bytes = _total_size([prepared])
+    ratio = prepared_bytes / original_bytes if original_bytes else 1.0
+    logger.info(
+        f"Prepared audio {prepared.name}: {original_bytes} -> {prepared_bytes} bytes ({ratio:.1%})"
+        + (
+            f", codec={info.codec}, sample_rate={info.sample_rate}, channels={info.channels}, "
+            f"bit_rate={info.bit_rate}, duration={info.duration}"
+            if info is not None else ""
+        )
+    )
+    return PreparedAudio(
+        path=prepared,
+        sha256=sha256,
+        info=info,
+        temp_dirs=temp_dirs,
+        time_map=trimmed.time_map if trimmed is not None else None,
+        removed_seconds=trimmed.removed_seconds if trimmed is not None else 0.0,
+    )
+
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?\d+(?:\.\d+)?)")
+
+
+@dataclass
+class SilenceMap:
+    duration: float
+    silences: List[Tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class ChunkSpan:
+    start: float
+    end: float
+    # True when the span starts inside the previous one (hard cut, no silence)
+    overlaps_previous: bool = False
+
+
+def parse_silencedetect_output(stderr: str) -> SilenceMap:
+    """Parse the duration and silence intervals from ffmpeg silencedetect logs."""
+    duration = 0.0
+    match = _DURATION_RE.search(stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    silences: List[Tuple[float, float]] = []
+    start: Optional[float] = None
+    for line in stderr.splitlines():
+        start_match = _SILENCE_START_RE.search(line)
+        if start_match:
+            start = max(0.0, float(start_match.group(1)))
+            continue
+        end_match = _SILENCE_END_RE.search(line)
+        if end_match and start is not None:
+            silences.append((start, float(end_match.group(1))))
+            start = None
+    if start is not None and duration:
+        # Trailing silence runs to the end of the file
+        silences.append((start, duration))
+    return SilenceMap(duration=duration, silences=silences)
+
+
+async def detect_silences_async(
+    src: Path,
+    *,
+    noise_db: float = -35.0,
+    min_silence: float = 0.5,
+) -> SilenceMap:
+    """Run ffmpeg silencedetect over ``src`` and return its silence map."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found on PATH. Install ffmpeg to enable silence detection.")
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", str(src),
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-",
+    ]
+    try:
+        result = await run_subprocess(cmd)
+    except subprocess.CalledProcessError as e:
+        error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
+        logger.error(f"ffmpeg silence detection failed: {error_msg}")
+        raise RuntimeError(f"ffmpeg silence detection failed: {error_msg}")
+
+    silence_map = parse_silencedetect_output(result.stderr.decode(errors='ignore'))
+    logger.debug(
+        f"Detected {len(silence_map.silences)} silences in {src} "
+        f"(duration={silence_map.duration:.1f}s)"
+    )
+    return silence_map
+
+
+def plan_chunks(
+    silence_map: SilenceMap,
+    *,
+    target_seconds: float,
+    overlap_seconds: float = 0.0,
+) -> List[ChunkSpan]:
+    """Split the timeline into chunks of roughly ``target_seconds``.
+
+    Each cut is placed at the middle of the silence closest to the target
+    position, searching between half and one and a half targets from the
+    chunk start. When no silence is found there the cut is hard, and the
+    next chunk starts ``overlap_seconds`` earlier so no words are lost.
+    """
+    duration = silence_map.duration
+    if duration <= 0:
+        return []
+
+    # Keep the overlap well under the target so every chunk makes progress
+    overlap_seconds = min(overlap_seconds, target_seconds / 2)
+    spans: List[ChunkSpan] = []
+    cursor = 0.0
+    overlaps = False
+    while duration - cursor > target_seconds * 1.25:
+        ideal = cursor + target_seconds
+        lo = cursor + target_seconds * 0.5
+        hi = cursor + target_seconds * 1.5
+        candidates = [(a + b) / 2 for a, b in silence_map.silences if lo <= (a + b) / 2 <= hi]
+        if candidates:
+            cut = min(candidates, key=lambda c: abs(c - ideal))
+            spans.append(ChunkSpan(cursor, cut, overlaps))
+            cursor, overlaps = cut, False
+        else:
+            spans.append(ChunkSpan(cursor, ideal, overlaps))
+            cursor, overlaps = ideal - overlap_seconds, overlap_seconds > 0
+    spans.append(ChunkSpan(cursor, duration, overlaps))
+    return spans
+
+
+async def split_audio_async(src: Path, spans: List[ChunkSpan], dest_dir: Path) -> List[Path]:
+    """Cut ``src`` into one file per span without re-encoding."""
+    async def cut(index: int, span: ChunkSpan) -> Path:
+        dst = dest_dir / f"chunk_{index:04d}{src.suffix}"
+        cmd = [
+            "ffmpeg", "-y", "-hide_banner",
+            "-ss", f"{span.start:.3f}",
+            "-i", str(src),
+            "-t", f"{span.end - span.start:.3f}",
+            "-c", "copy",
+            str(dst),
+        ]
+        try:
+            await run_subprocess(cmd)
+        except subprocess.CalledProcessError as e:
+            error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
+            logger.error(f"ffmpeg split failed: {error_msg}")
+            raise RuntimeError(f"ffmpeg split failed: {error_msg}")
+        return dst
+
+    return await gather_or_cancel(cut(i, span) for i, span in enumerate(spans))
+
+
+@dataclass
+class TimeMap:
+    """Maps offsets in trimmed audio back to the original recording."""
+    # (trimmed start, original start) of each kept segment, in order
+    segments: List[Tuple[float, float]] = field(default_factory=lambda: [(0.0, 0.0)])
+
+    def to_original(self, offset: float) -> float:
+        starts = [trimmed for trimmed, _ in self.segments]
+        index = max(0, bisect.bisect_right(starts, offset) - 1)
+        trimmed_start, original_start = self.segments[index]
+        return original_start + (offset - trimmed_start)
+
+
+@dataclass
+class TrimmedAudio:
+    path: Path
+    time_map: TimeMap
+    original_duration: float
+    removed_seconds: float
+
+
+def plan_silence_cuts(
+    silence_map: SilenceMap,
+    *,
+    max_silence: float,
+    keep_gap: float,
+) -> List[Tuple[float, float]]:
+    """Return the (start, end) ranges to cut so no silence exceeds ``keep_gap``.
+
+    Only silences longer than ``max_silence`` are shortened; half of
+    ``keep_gap`` is left on each side so speech onsets are not clipped.
+    """
+    keep_gap = min(keep_gap, max_silence)
+    cuts: List[Tuple[float, float]] = []
+    for start, end in silence_map.silences:
+        if end - start > max_silence:
+            cuts.append((start + keep_gap / 2, end - keep_gap / 2))
+    return cuts
+
+
+# Silence trimming splits the audio into frames of this many samples per
+# second of sample rate (10 ms), so cuts fall on known sample boundaries
+TRIM_FRAMES_PER_SECOND = 100
+
+
+def align_cuts_to_frames(
+    cuts: List[Tuple[float, float]], *, sample_rate: int, frame_samples: int
+) -> List[Tuple[int, int]]:
+    """The ``[first, last)`` ranges of whole frames lying inside each cut.
+
+    Cuts shorter than a frame are dropped.
+    """
+    frames: List[Tuple[int, int]] = []
+    for start, end in cuts:
+        first = math.ceil(start * sample_rate / frame_samples)
+        last = math.floor(end * sample_rate / frame_samples)
+        if last > first:
+            frames.append((first, last))
+    return frames
+
+
+def build_time_map(frames: List[Tuple[int, int]], *, frame_seconds: float) -> TimeMap:
+    """The TimeMap of audio with the ``[first, last)`` frame ranges removed.
+
+    Segment starts are counted in whole frames, so they equal the trimmed
+    offsets exactly.
+    """
+    segments = [(0.0, 0.0)]
+    removed = 0
+    for first, last in frames:
+        removed += last - first
+        segments.append(((last - removed) * frame_seconds, last * frame_seconds))
+    return TimeMap(segments)
+
+
+async def trim_silences_async(
+    src: Path,
+    profile: EncodingProfile,
+    *,
+    noise_db: float = -35.0,
+    max_silence: float = 2.0,
+    keep_gap: float = 0.5,
+) -> Optional[TrimmedAudio]:
+    """Shorten every silence longer than ``max_silence`` down to ``keep_gap``.
+
+    Silences are found with silencedetect and removed with an ``aselect``
+    filter in one encode to ``profile``. The audio is resampled and
+    regrouped into fixed 10 ms frames first and whole frames are dropped by
+    index, so the time map is built from the exact cut points rather than
+    the detected ones. Returns None when nothing needs trimming.
+    """
+    silence_map = await detect_silences_async(src, noise_db=noise_db, min_silence=max_silence)
+    frame_samples = profile.sample_rate // TRIM_FRAMES_PER_SECOND
+    frames = align_cuts_to_frames(
+        plan_silence_cuts(silence_map, max_silence=max_silence, keep_gap=keep_gap),
+        sample_rate=profile.sample_rate,
+        frame_samples=frame_samples,
+    )
+    if not frames:
+        logger.debug(f"No silence longer than {max_silence}s in {src}")
+        return None
+
+    frame_seconds = frame_samples / profile.sample_rate
+    time_map = build_time_map(frames, frame_seconds=frame_seconds)
+    removed = sum(last - first for first, last in frames) * frame_seconds
+    drop = "+".join(f"between(n,{first},{last - 1})" for first, last in frames)
+    tmp_dir = Path(tempfile.mkdtemp(prefix="audio_trim_"))
+    dst = tmp_dir / f"{src.stem}_trimmed{profile.suffix}"
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", str(src),
+        "-map", "0:a:0",
+        "-af", (
+            f"aresample={profile.sample_rate},asetnsamples=n={frame_samples}:p=0,"
+            f"aselect='not({drop})',asetpts=N/SR/TB"
+        ),
+        *profile.encode_args(),
+        str(dst),
+    ]
+    try:
+        await run_subprocess(cmd)
+    except subprocess.CalledProcessError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        error_msg = e.stderr.decode(errors='ignore') if getattr(e, 'stderr', None) else ""
+        logger.error(f"ffmpeg silence trimming failed: {error_msg}")
+        raise RuntimeError(f"ffmpeg silence trimming failed: {error_msg}")
+    except asyncio.CancelledError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    share = removed / silence_map.duration if silence_map.duration else 0.0
+    logger.info(
+        f"Trimmed {removed:.1f}s of silence from {silence_map.duration:.1f}s "
+        f"({share:.1%}) in {len(frames)} cuts"
+    )
+    return TrimmedAudio(
+        path=dst,
+        time_map=time_map,
+        original_duration=silence_map.duration,
+        removed_seconds=round(removed, 3),
+    )
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.services.cache import LRUCache, sha256_file
+from app.utils.execution import run_io, run_subprocess
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AudioInfo:
+    container: str
+    codec: str
+    sample_rate: int
+    channels: int
+    bit_rate: Optional[int] = None
+    duration: Optional[float] = None
+    size: Optional[int] = None
+
+    @property
+    def stream_signature(self) -> Tuple[str, str, int, int]:
+        """Fields that must match for inputs to be joined with a stream copy."""
+        return (self.container, self.codec, self.sample_rate, self.channels)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _optional_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _optional_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_ffprobe_output(output: bytes) -> AudioInfo:
+    """Build an AudioInfo from ``ffprobe -of json`` stream and format output."""
+    data = json.loads(output)
+    streams = data.get("streams") or []
+    if not streams:
+        raise ValueError("No audio stream found")
+    stream = streams[0]
+    fmt = data.get("format") or {}
+    return AudioInfo(
+        container=fmt.get("format_name", ""),
+        codec=stream["codec_name"],
+        sample_rate=int(stream["sample_rate"]),
+        channels=int(stream["channels"]),
+        bit_rate=_optional_int(stream.get("bit_rate")) or _optional_int(fmt.get("bit_rate")),
+        duration=_optional_float(fmt.get("duration")),
+        size=_optional_int(fmt.get("size")),
+    )
+
+
+# Probe results keyed by content hash; the values are JSON-encoded AudioInfo
+_probe_cache = LRUCache(1024)
+
+
+async def probe_audio(path: Path, *, content_hash: Optional[str] = None) -> Optional[AudioInfo]:
+    """Describe the first audio stream of ``path`` with a single ffprobe call.
+
+    Results are cached by content hash, computed here when not supplied.
+    Returns None when the file cannot be probed (missing ffprobe, no audio
+    stream, unreadable file).
+    """
+    if content_hash is None:
+        try:
+            content_hash = await run_io(sha256_file, path)
+        except OSError as e:
+            logger.debug(f"Could not hash {path} for probing: {e}")
+            return None
+
+    cached = _probe_cache.get(content_hash)
+    if cached is not None:
+        return AudioInfo(**json.loads(cached))
+
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels,bit_rate:format=format_name,duration,bit_rate,size",
+        "-of", "json",
+        str(path),
+    ]
+    try:
+        result = await run_subprocess(cmd)
+        info = parse_ffprobe_output(result.stdout)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.debug(f"Could not probe {path}: {e}")
+        return None
+
+    _probe_cache.set(content_hash, json.dumps(info.to_dict()))
+    return info
@@ -0,0 +1,362 @@
+"""Server-side store of transcripts and their DOCX exports.
+
+Each transcript gets an id when ``/transcribe`` finishes. Its metadata
+lives in a SQLite table; the raw and formatted texts, and the DOCX files
+generated from them, live under a content directory. Export and format
+requests can then name the id instead of sending the text back.
+
+Like DiskCache, the store is bounded: transcripts older than
+``TRANSCRIPT_STORE_TTL_SECONDS`` are dropped, and once the content grows
+past ``TRANSCRIPT_STORE_MAX_BYTES`` the least recently used transcripts are
+removed until it is back under 90% of the limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RAW_NAME = "raw.txt"
+FORMATTED_NAME = "formatted.md"
+EXPORTS_DIR = "exports"
+
+_ID = re.compile(r"[0-9a-f]{32}")
+_ARTIFACT_KEY = re.compile(r"[0-9a-f]{16,64}")
+
+
+class TranscriptNotFoundError(KeyError):
+    """Raised for an id that is not in the store."""
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _tree_size(directory: Path) -> int:
+    size = 0
+    for path in directory.rglob("*"):
+        try:
+            if path.is_file():
+                size += path.stat().st_size
+        except OSError:
+            continue
+    return size
+
+
+@dataclass
+class StoredTranscript:
+    id: str
+    created_at: float
+    updated_at: float
+    filenames: List[str] = field(default_factory=list)
+    language: Optional[str] = None
+    raw_sha256: str = ""
+    formatted_sha256: Optional[str] = None
+    # Engines, models, audio info, stage timings...
+    metadata: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+            "filenames": self.filenames,
+            "language": self.language,
+            "formatted": self.formatted_sha256 is not None,
+            "metadata": self.metadata,
+        }
+
+
+class TranscriptStore:
+    """Transcripts in ``root``: metadata in ``transcripts.sqlite3``, texts under ``content/``.
+
+    A transcript's directory mtime records its last use: writes into it
+    change it and reads refresh it. ``max_bytes``/``ttl_seconds`` of 0 keep
+    transcripts regardless of size/age.
+    """
+
+    def __init__(self, root: Path, *, max_bytes: int = 0, ttl_seconds: float = 0):
+        self.root = Path(root)
+        self.content_dir = self.root / "content"
+        self.content_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self.expirations = 0
+        self._bytes: Optional[int] = None
+        self._size_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "transcripts.sqlite3"), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "id TEXT PRIMARY KEY, created REAL NOT NULL, updated REAL NOT NULL, "
+                "filenames TEXT NOT NULL, language TEXT, raw_sha256 TEXT NOT NULL, "
+                "formatted_sha256 TEXT, metadata TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS transcripts_created ON transcripts (created)")
+
+    def _dir(self, transcript_id: str) -> Path:
+        if not _ID.fullmatch(transcript_id):
+            raise TranscriptNotFoundError(transcript_id)
+        return self.content_dir / transcript_id[:2] / transcript_id
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> int:
+        """Write ``data`` to ``path`` atomically; returns the change in stored bytes."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)
+        return len(data) - replaced
+
+    def _touch(self, transcript_id: str) -> None:
+        try:
+            os.utime(self._dir(transcript_id))
+        except OSError:
+            pass
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def _account(self, delta: int, *, keep: str) -> None:
+        """Count ``delta`` bytes of content; past ``max_bytes``, evict all but ``keep``."""
+        if not self.max_bytes:
+            return
+        with self._size_lock:
+            if self._bytes is None:
+                self._bytes = _tree_size(self.content_dir)
+            else:
+                self._bytes += delta
+            if self._bytes > self.max_bytes:
+                self._evict(keep)
+
+    def _evict(self, keep: str) -> None:
+        # Caller holds the size lock
+        directories = []
+        for directory in self.content_dir.glob("*/*"):
+            try:
+                if directory.is_dir():
+                    directories.append((directory.stat().st_mtime, _tree_size(directory), directory))
+            except OSError:
+                continue
+        directories.sort()
+        total = sum(size for _, size, _ in directories)
+        target = int(self.max_bytes * 0.9)
+        for _, size, directory in directories:
+            if total <= target:
+                break
+            if directory.name == keep:
+                continue
+            self._remove(directory.name, directory)
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+    def _remove(self, transcript_id: str, directory: Path) -> int:
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM transcripts WHERE id = ?", (transcript_id,)).rowcount
+        shutil.rmtree(directory, ignore_errors=True)
+        return deleted
+
+    def _expire(self, transcript_ids: Iterable[str]) -> None:
+        removed = 0
+        for transcript_id in transcript_ids:
+            directory = self._dir(transcript_id)
+            size = _tree_size(directory)
+            self._remove(transcript_id, directory)
+            removed += size
+            self.expirations += 1
+        if removed:
+            with self._size_lock:
+                if self._bytes is not None:
+                    self._bytes -= removed
+
+    def purge_expired(self) -> int:
+        """Drop the transcripts older than ``ttl_seconds``; returns how many."""
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM transcripts WHERE created < ?", (time.time() - self.ttl_seconds,)
+            ).fetchall()
+        self._expire(row[0] for row in rows)
+        return len(rows)
+
+    def create(
+        self,
+        text: str,
+        formatted: Optional[str] = None,
+        *,
+        filenames: Optional[List[str]] = None,
+        language: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> StoredTranscript:
+        now = time.time()
+        transcript = StoredTranscript(
+            id=uuid.uuid4().hex,
+            created_at=now,
+            updated_at=now,
+            filenames=list(filenames or []),
+            language=language,
+            raw_sha256=_sha256(text),
+            formatted_sha256=_sha256(formatted) if formatted is not None else None,
+            metadata=dict(metadata or {}),
+        )
+        self.purge_expired()
+        directory = self._dir(transcript.id)
+        # Content first, so a row always points at complete files
+        written = self._write(directory / RAW_NAME, text.encode("utf-8"))
+        if formatted is not None:
+            written += self._write(directory / FORMATTED_NAME, formatted.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    transcript.id,
+                    transcript.created_at,
+                    transcript.updated_at,
+                    json.dumps(transcript.filenames, ensure_ascii=False),
+                    transcript.language,
+                    transcript.raw_sha256,
+                    transcript.formatted_sha256,
+                    json.dumps(transcript.metadata, ensure_ascii=False),
+                ),
+            )
+        logger.info(f"Stored transcript {transcript.id} ({len(text)} characters)")
+        self._account(written, keep=transcript.id)
+        return transcript
+
+    def get(self, transcript_id: str) -> StoredTranscript:
+        if not _ID.fullmatch(transcript_id):
+            raise TranscriptNotFoundError(transcript_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, created, updated, filenames, language, raw_sha256, formatted_sha256, metadata "
+                "FROM transcripts WHERE id = ?",
+                (transcript_id,),
+            ).fetchone()
+        if row is None:
+            raise TranscriptNotFoundError(transcript_id)
+        if self._expired(row[1]):
+            self._expire([transcript_id])
+            raise TranscriptNotFoundError(transcript_id)
+        return StoredTranscript(
+            id=row[0],
+            created_at=row[1],
+            updated_at=row[2],
+            filenames=json.loads(row[3]),
+            language=row[4],
+            raw_sha256=row[5],
+            formatted_sha256=row[6],
+            metadata=json.loads(row[7]),
+        )
+
+    def read_text(self, transcript_id: str) -> str:
+        self.get(transcript_id)
+        self._touch(transcript_id)
+        return (self._dir(transcript_id) / RAW_NAME).read_text(encoding="utf-8")
+
+    def read_formatted(self, transcript_id: str) -> Optional[str]:
+        if self.get(transcript_id).formatted_sha256 is None:
+            return None
+        self._touch(transcript_id)
+        return (self._dir(transcript_id) / FORMATTED_NAME).read_text(encoding="utf-8")
+
+    def set_formatted(self, transcript_id: str, formatted: str, *, metadata: Optional[dict] = None) -> StoredTranscript:
+        """Replace the formatted text (after a re-format); exports of the old text are dropped."""
+        transcript = self.get(transcript_id)
+        directory = self._dir(transcript_id)
+        written = self._write(directory / FORMATTED_NAME, formatted.encode("utf-8"))
+        transcript.formatted_sha256 = _sha256(formatted)
+        transcript.updated_at = time.time()
+        transcript.metadata.update(metadata or {})
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE transcripts SET formatted_sha256 = ?, updated = ?, metadata = ? WHERE id = ?",
+                (
+                    transcript.formatted_sha256,
+                    transcript.updated_at,
+                    json.dumps(transcript.metadata, ensure_ascii=False),
+                    transcript_id,
+                ),
+            )
+        written -= _tree_size(directory / EXPORTS_DIR)
+        shutil.rmtree(directory / EXPORTS_DIR, ignore_errors=True)
+        self._account(written, keep=transcript_id)
+        return transcript
+
+    def get_artifact(self, transcript_id: str, key: str) -> Optional[bytes]:
+        if not _ARTIFACT_KEY.fullmatch(key):
+            return None
+        try:
+            data = (self._dir(transcript_id) / EXPORTS_DIR / f"{key}.docx").read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(transcript_id)
+        return data
+
+    def put_artifact(self, transcript_id: str, key: str, data: bytes) -> None:
+        if not _ARTIFACT_KEY.fullmatch(key):
+            raise ValueError(f"Invalid artifact key: {key!r}")
+        written = self._write(self._dir(transcript_id) / EXPORTS_DIR / f"{key}.docx", data)
+        self._account(written, keep=transcript_id)
+
+    def delete(self, transcript_id: str) -> bool:
+        directory = self._dir(transcript_id)
+        size = _tree_size(directory)
+        deleted = self._remove(transcript_id, directory)
+        with self._size_lock:
+            if self._bytes is not None:
+                self._bytes -= size
+        return bool(deleted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()
+        return {
+            "transcripts": count,
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+_transcript_store: Optional[TranscriptStore] = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> Optional[TranscriptStore]:
+    """Return the shared transcript store, or None when it is disabled."""
+    global _transcript_store
+    if not settings.transcript_store_enabled:
+        return None
+    with _store_lock:
+        if _transcript_store is None:
+            _transcript_store = TranscriptStore(
+                Path(settings.transcript_store_dir),
+                max_bytes=settings.transcript_store_max_bytes,
+                ttl_seconds=settings.transcript_store_ttl_seconds,
+            )
+        return _transcript_store
@@ -0,0 +1,176 @@
+"""Splitting long transcripts for formatting, and joining the results.
+
+Raw text is cut at paragraph boundaries, or at sentence boundaries inside
+paragraphs that are too long, into chunks under a token budget. Each chunk
+carries the last sentences of the previous one as context. The formatted
+chunks are merged back with one set of headings and without the sentences
+repeated at chunk boundaries.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Set, Tuple
+
+from app.services.tokens import TokenCounter
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+@dataclass
+class TextChunk:
+    index: int
+    text: str
+    # Tail of the previous chunk, given to the model for continuity only
+    context: str = ""
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END.split(text.strip()) if s]
+
+
+def _split_words(text: str, max_tokens: int, count_tokens: TokenCounter) -> List[str]:
+    """Cut text without sentence punctuation into pieces of at most ``max_tokens``."""
+    pieces: List[str] = []
+    current: List[str] = []
+    for word in text.split():
+        if current and count_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _pieces(text: str, max_tokens: int, count_tokens: TokenCounter) -> List[Tuple[str, bool, int]]:
+    """Paragraphs that fit the budget, else their sentences, as (text, starts_paragraph, tokens)."""
+    pieces: List[Tuple[str, bool, int]] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, True, tokens))
+            continue
+        first = True
+        for sentence in split_sentences(paragraph):
+            parts = [sentence]
+            if count_tokens(sentence) > max_tokens:
+                parts = _split_words(sentence, max_tokens, count_tokens)
+            for part in parts:
+                pieces.append((part, first, count_tokens(part)))
+                first = False
+    return pieces
+
+
+def _join(pieces: List[Tuple[str, bool, int]]) -> str:
+    text = ""
+    for piece, starts_paragraph, _ in pieces:
+        if text:
+            text += "\n\n" if starts_paragraph else " "
+        text += piece
+    return text
+
+
+def text_tail(text: str, max_tokens: int, count_tokens: TokenCounter) -> str:
+    """The last sentences of ``text`` that fit in ``max_tokens``."""
+    if max_tokens <= 0:
+        return ""
+    sentences = split_sentences(text)
+    kept: List[str] = []
+    for sentence in reversed(sentences):
+        if count_tokens(" ".join([sentence] + kept)) > max_tokens:
+            break
+        kept.insert(0, sentence)
+    if not kept and sentences:
+        words = sentences[-1].split()
+        kept = [" ".join(words[-max(1, int(max_tokens * 0.75)):])]
+    return " ".join(kept)
+
+
+def split_text(
+    text: str,
+    *,
+    max_tokens: int,
+    count_tokens: TokenCounter,
+    context_tokens: int = 0,
+) -> List[TextChunk]:
+    """Split ``text`` into chunks of at most ``max_tokens`` (as counted by ``count_tokens``).
+
+    Paragraphs are kept whole when they fit; longer ones are cut between
+    sentences, and run-on sentences between words. Every chunk after the
+    first gets up to ``context_tokens`` of the preceding text as context.
+    """
+    chunks: List[TextChunk] = []
+    current: List[Tuple[str, bool, int]] = []
+    used = 0
+    for piece in _pieces(text, max_tokens, count_tokens):
+        if current and used + piece[2] > max_tokens:
+            chunks.append(TextChunk(len(chunks), _join(current)))
+            current, used = [], 0
+        current.append(piece)
+        used += piece[2]
+    if current:
+        chunks.append(TextChunk(len(chunks), _join(current)))
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        chunk.context = text_tail(previous.text, context_tokens, count_tokens)
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def _drop_repeated_opening(previous: str, current: str, lookback: int = 3) -> str:
+    """Remove leading sentences of ``current`` that end ``previous`` as well."""
+    recent = {_normalize(s) for s in split_sentences(previous)[-lookback:]}
+    recent.discard("")
+    paragraphs = _PARAGRAPH_BREAK.split(current.strip())
+    if not paragraphs or _HEADING.match(paragraphs[0]):
+        return current
+    sentences = split_sentences(paragraphs[0])
+    while sentences and _normalize(sentences[0]) in recent:
+        sentences.pop(0)
+    paragraphs[0] = " ".join(sentences)
+    return "\n\n".join(p for p in paragraphs if p.strip())
+
+
+def merge_formatted_chunks(outputs: List[str]) -> str:
+    """Join separately formatted chunks into one document.
+
+    Only the first chunk keeps a top-level title; later level-1 headings
+    become section headings, headings already used are dropped, and
+    sentences repeated across a chunk boundary are kept once.
+    """
+    merged: List[str] = []
+    seen: Set[str] = set()
+    section_level = 2
+    for index, output in enumerate(outputs):
+        output = output.strip()
+        if not output:
+            continue
+        if merged:
+            output = _drop_repeated_opening(merged[-1], output)
+        lines: List[str] = []
+        for line in output.splitlines():
+            heading = _HEADING.match(line.strip())
+            if heading is None:
+                lines.append(line)
+                continue
+            level, title = len(heading.group(1)), heading.group(2)
+            key = _normalize(title)
+            if key in seen:
+                continue
+            seen.add(key)
+            if index == 0 and level > 1:
+                section_level = min(section_level, level)
+            elif index > 0 and level == 1:
+                level = section_level
+            lines.append(f"{'#' * level} {title}")
+        text = "\n".join(lines).strip()
+        if text:
+            merged.append(text)
+    return "\n\n".join(merged)
@@ -0,0 +1,68 @@
+"""Token count estimates used to size formatting requests.
+
+Each provider's own tokenizer is used when its package is installed
+(``tiktoken`` for OpenAI models, ``mistral-common`` for Mistral models);
+otherwise, and for self-hosted models, the count is estimated at about
+four characters per token, padded by ``ESTIMATE_MARGIN`` since text
+with many short words or non-English text runs fewer characters per token.
+"""
+import functools
+import logging
+import math
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+CHARS_PER_TOKEN = 4.0
+# Overestimating keeps a chunk under the budget when the guess is off
+ESTIMATE_MARGIN = 1.25
+
+
+def estimate_tokens_by_chars(text: str) -> int:
+    return math.ceil(len(text) * ESTIMATE_MARGIN / CHARS_PER_TOKEN)
+
+
+def _tiktoken_counter(model: str) -> Optional[TokenCounter]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use
+        logger.warning(f"Could not load tiktoken encoding for {model}: {e}")
+        return None
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _mistral_counter(model: str) -> Optional[TokenCounter]:
+    try:
+        from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
+    except ImportError:
+        return None
+    try:
+        tokenizer = MistralTokenizer.from_model(model).instruct_tokenizer.tokenizer
+    except Exception as e:
+        logger.debug(f"No mistral-common tokenizer for {model}: {e}")
+        return None
+    return lambda text: len(tokenizer.encode(text, bos=False, eos=False))
+
+
+@functools.lru_cache(maxsize=32)
+def get_token_counter(provider: str, model: str) -> TokenCounter:
+    """Return a function counting the tokens of a text for ``provider``'s ``model``."""
+    counter = None
+    if provider == "openai":
+        counter = _tiktoken_counter(model)
+    elif provider == "mistral":
+        counter = _mistral_counter(model)
+    if counter is None:
+        logger.debug(f"Estimating {provider}/{model} tokens from text length")
+        return estimate_tokens_by_chars
+    return counter
@@ -1,57 +1,576 @@
+import asyncio
 import logging
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 
-from app.clients.openai_client import get_openai_client
+from app.clients.local_client import get_local_client
+from app.clients.openai_client import get_async_openai_client
 from app.clients.mistral_client import get_mistral_client
 from app.config import settings
+from app.services.cache import DiskCache, LRUCache, TieredCache, make_cache_key, sha256_file
+from app.services.engines import (
+    TRANSCRIPTION,
+    Engine,
+    EngineCapabilities,
+    EngineSelectionError,
+    find_engine,
+    get_engine,
+    register_engine,
+)
+from app.services.preprocessor import (
+    SilenceMap,
+    detect_silences_async,
+    ensure_supported_or_convert_to_mp3_async,
+    plan_chunks,
+    split_audio_async,
+)
+from app.utils.execution import gather_or_cancel, run_io, run_sync
+from app.utils.limiter import run_limited
+from app.utils.resilience import call_with_resilience, provider_candidates
 
 logger = logging.getLogger(__name__)
 
-PROVIDER = settings.provider
+OPENAI_TRANSCRIPTION_MODEL = "whisper-1"
+MISTRAL_TRANSCRIPTION_MODEL = "voxtral-mini-latest"
+
+OPENAI_TRANSCRIPTION_MODELS = ("whisper-1", "gpt-4o-transcribe", "gpt-4o-mini-transcribe")
+MISTRAL_TRANSCRIPTION_MODELS = ("voxtral-mini-latest", "voxtral-mini-2507")
 
 def transcribe_audio_file_openai(file_path: Path, *, language: Optional[str] = None, temperature: float = 0.0) -> str:
-    logger.info(f"Starting OpenAI transcription: {file_path} (language={language}, temperature={temperature})")
-    client = get_openai_client()
-    model = "whisper-1"
-    with open(file_path, "rb") as f:
-        result = client.audio.transcriptions.create(
-            model=model,
-            file=f,
-            language=language,
-            temperature=temperature,
-        )
-    # SDK returns an object with .text
+    return run_sync(transcribe_audio_file_openai_async(file_path, language=language, temperature=temperature))
+
+def transcribe_audio_file_mistral(file_path: Path, *, language: Optional[str] = None, temperature: float = 0.0) -> str:
+    return run_sync(transcribe_audio_file_mistral_async(file_path, language=language, temperature=temperature))
+
+def transcribe_audio_file(file_path: Path, *, language: Optional[str], temperature: float):
+    return run_sync(transcribe_audio_file_async(file_path, language=language, temperature=temperature))
+
+
+async def transcribe_audio_file_openai_async(
+    file_path: Path,
+    *,
+    model: str = OPENAI_TRANSCRIPTION_MODEL,
+    language: Optional[str] = None,
+    temperature: float = 0.0,
+) -> str:
+    logger.info(
+        f"Starting OpenAI transcription: {file_path} (model={model}, language={language}, temperature={temperature})"
+    )
+    client = get_async_openai_client()
+    # Passing the path lets the SDK read the file without blocking the loop
+    result = await client.audio.transcriptions.create(
+        model=model,
+        file=file_path,
+        language=language,
+        temperature=temperature,
+    )
     text = getattr(result, "text", "")
     logger.info(f"OpenAI transcription completed. Text length: {len(text)} characters")
     return text
 
-def transcribe_audio_file_mistral(file_path: Path, *, language: Optional[str] = None, temperature: float = 0.0) -> str:
-    logger.info(f"Starting Mistral transcription: {file_path} (language={language}, temperature={temperature})")
+
+async def transcribe_audio_file_mistral_async(
+    file_path: Path,
+    *,
+    model: str = MISTRAL_TRANSCRIPTION_MODEL,
+    language: Optional[str] = None,
+    temperature: float = 0.0,
+) -> str:
+    logger.info(
+        f"Starting Mistral transcription: {file_path} (model={model}, language={language}, temperature={temperature})"
+    )
     client = get_mistral_client()
-    model = "voxtral-mini-latest"
-    with open(file_path, "rb") as f:
-        result = client.audio.transcriptions.complete(
+    content = await run_io(file_path.read_bytes)
+    result = await client.audio.transcriptions.complete_async(
+        model=model,
+        file={
+            "content": content,
+            "file_name": f"audio{file_path.suffix.lower()}",
+        },
+        language=language,
+        temperature=temperature,
+    )
+    text = getattr(result, "text", "")
+    logger.info(f"Mistral transcription completed. Text length: {len(text)} characters")
+    return text
+
+
+async def transcribe_audio_file_local_async(
+    file_path: Path,
+    *,
+    model: Optional[str] = None,
+    language: Optional[str] = None,
+    temperature: float = 0.0,
+) -> str:
+    """Transcribe on the self-hosted OpenAI-compatible server at ``LOCAL_BASE_URL``."""
+    model = model or settings.local_transcription_model
+    logger.info(
+        f"Starting local transcription: {file_path} (model={model}, language={language}, temperature={temperature})"
+    )
+    client = get_local_client()
+    result = await client.audio.transcriptions.create(
+        model=model,
+        file=file_path,
+        language=language,
+        temperature=temperature,
+    )
+    text = getattr(result, "text", "")
+    logger.info(f"Local transcription completed. Text length: {len(text)} characters")
+    return text
+
+
+# The engines call the module functions through lambdas so that reassigning
+# them (e.g. in tests) is picked up without re-registering.
+register_engine(Engine(
+    name="openai",
+    kind=TRANSCRIPTION,
+    default_model=OPENAI_TRANSCRIPTION_MODEL,
+    models=OPENAI_TRANSCRIPTION_MODELS,
+    capabilities=EngineCapabilities(
+        max_upload_bytes=25 * 1024 * 1024,
+        formats=frozenset({"flac", "m4a", "mp3", "mp4", "mpeg", "mpga", "oga", "ogg", "wav", "webm"}),
+        streaming=True,
+        timestamps=True,
+    ),
+    call=lambda *args, **kwargs: transcribe_audio_file_openai_async(*args, **kwargs),
+))
+register_engine(Engine(
+    name="mistral",
+    kind=TRANSCRIPTION,
+    default_model=MISTRAL_TRANSCRIPTION_MODEL,
+    models=MISTRAL_TRANSCRIPTION_MODELS,
+    capabilities=EngineCapabilities(
+        formats=frozenset({"flac", "m4a", "mp3", "ogg", "wav"}),
+        timestamps=True,
+    ),
+    call=lambda *args, **kwargs: transcribe_audio_file_mistral_async(*args, **kwargs),
+))
+register_engine(Engine(
+    name="local",
+    kind=TRANSCRIPTION,
+    # Any model the server serves; LOCAL_TRANSCRIPTION_MODEL by default
+    default_model=lambda: settings.local_transcription_model,
+    capabilities=EngineCapabilities(
+        max_upload_bytes=25 * 1024 * 1024,
+        formats=frozenset({"flac", "m4a", "mp3", "ogg", "wav", "webm"}),
+    ),
+    call=lambda *args, **kwargs: transcribe_audio_file_local_async(*args, **kwargs),
+))
+
+
+def get_transcription_engine(name: Optional[str] = None) -> Engine:
+    """The named transcription engine, or the configured ``PROVIDER``'s."""
+    return get_engine(TRANSCRIPTION, name or settings.provider)
+
+
+def _file_size(file_path: Path) -> Optional[int]:
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return None
+
+
+async def transcribe_audio_file_async(
+    file_path: Path,
+    *,
+    language: Optional[str],
+    temperature: float,
+    duration: Optional[float] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+) -> str:
+    """Native async counterpart of transcribe_audio_file.
+
+    ``engine`` and ``model`` select the transcription engine for this call
+    (default: ``PROVIDER`` and its default model). Each call is admitted by
+    the provider's limiter (``duration`` counts against its audio-seconds
+    budget). Transient failures are retried and may fail over to another
+    provider's engine, with that engine's default model, when it accepts
+    the file (see app.utils.resilience). A container the engine does not
+    take is converted to MP3 for it first; without ffmpeg, only failover
+    engines taking the file as-is are tried.
+    """
+    text, _, _ = await _transcribe_file_async(
+        file_path, language=language, temperature=temperature, duration=duration, engine=engine, model=model
+    )
+    return text
+
+
+async def _transcribe_file_async(
+    file_path: Path,
+    *,
+    language: Optional[str],
+    temperature: float,
+    duration: Optional[float] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Tuple[str, str, str]:
+    # transcribe_audio_file_async, also returning the engine and model that answered
+    primary = get_transcription_engine(engine)
+    primary_model = primary.resolve_model(model)
+    size = _file_size(file_path)
+    max_bytes = primary.capabilities.max_upload_bytes
+    if max_bytes is not None and size is not None and size > max_bytes:
+        raise EngineSelectionError(
+            f"Transcription engine {primary.name!r} does not accept {file_path.suffix or 'this'} files "
+            f"of {size} bytes"
+        )
+
+    converted: Optional[Path] = None
+    if not primary.capabilities.accepts(file_path) and shutil.which("ffmpeg") is not None:
+        converted = await ensure_supported_or_convert_to_mp3_async(file_path, formats=primary.capabilities.formats)
+        file_path, size = converted, _file_size(converted)
+    try:
+        candidates = []
+        for provider in provider_candidates(primary.provider_name):
+            candidate = primary if provider == primary.provider_name else find_engine(TRANSCRIPTION, provider)
+            if candidate is None or not candidate.capabilities.accepts(file_path, size):
+                continue
+            candidate_model = primary_model if candidate is primary else candidate.resolve_model(None)
+
+            async def call(candidate=candidate, candidate_model=candidate_model) -> Tuple[str, str, str]:
+                text = await run_limited(
+                    candidate.provider_name,
+                    lambda: candidate.call(
+                        file_path, model=candidate_model, language=language, temperature=temperature
+                    ),
+                    audio_seconds=duration,
+                )
+                return text, candidate.name, candidate_model
+            candidates.append((candidate.provider_name, call))
+        if not candidates:
+            raise EngineSelectionError(
+                f"Transcription engine {primary.name!r} does not accept {file_path.suffix or 'these'} files "
+                f"and ffmpeg is not available to convert them"
+            )
+        return await call_with_resilience("transcribe", candidates)
+    finally:
+        if converted is not None:
+            shutil.rmtree(converted.parent, ignore_errors=True)
+
+
+@dataclass
+class ChunkTranscript:
+    index: int
+    start: float
+    end: float
+    text: str
+    elapsed: float
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "start": round(self.start, 3),
+            "end": round(self.end, 3),
+            "elapsed": self.elapsed,
+            "chars": len(self.text),
+        }
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    chunks: List[ChunkTranscript] = field(default_factory=list)
+    cached: bool = False
+    # The engine and model that produced the text; None when unknown, or
+    # when failover had chunks transcribed by different engines
+    engine: Optional[str] = None
+    model: Optional[str] = None
+
+
+_WORD_NORMALIZE_RE = re.compile(r"[^\w']+")
+
+
+def _normalize_word(word: str) -> str:
+    return _WORD_NORMALIZE_RE.sub("", word.lower())
+
+
+def merge_overlapping_text(previous: str, current: str, *, max_words: int = 30) -> str:
+    """Drop the leading words of ``current`` that repeat the tail of ``previous``.
+
+    Used at hard chunk cuts, where both chunks contain the overlap audio.
+    Words are compared case- and punctuation-insensitively; the longest
+    matching run (up to ``max_words``) is removed.
+    """
+    prev_words = [_normalize_word(w) for w in previous.split()[-max_words:]]
+    cur_raw = current.split()
+    cur_words = [_normalize_word(w) for w in cur_raw[:max_words]]
+    for size in range(min(len(prev_words), len(cur_words)), 0, -1):
+        if prev_words[-size:] == cur_words[:size]:
+            return " ".join(cur_raw[size:])
+    return current
+
+
+async def _call_transcribe_fn(
+    transcribe_fn: Optional[Callable],
+    file_path: Path,
+    *,
+    duration: Optional[float] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    **kwargs,
+) -> Tuple[str, Optional[Tuple[str, str]]]:
+    # The text, and the (engine, model) that answered when known
+    if transcribe_fn is None:
+        text, answered_engine, answered_model = await _transcribe_file_async(
+            file_path, duration=duration, engine=engine, model=model, **kwargs
+        )
+        return text, (answered_engine, answered_model)
+    if asyncio.iscoroutinefunction(transcribe_fn):
+        return await transcribe_fn(file_path, **kwargs), None
+    return await run_io(transcribe_fn, file_path, **kwargs), None
+
+
+async def transcribe_audio_file_chunked_async(
+    file_path: Path,
+    *,
+    language: Optional[str],
+    temperature: float,
+    transcribe_fn: Optional[Callable[..., Union[str, Awaitable[str]]]] = None,
+    target_seconds: Optional[float] = None,
+    overlap_seconds: Optional[float] = None,
+    concurrency: Optional[int] = None,
+    duration: Optional[float] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    on_segment: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> TranscriptionResult:
+    """Transcribe a long recording as concurrently processed chunks.
+
+    The audio is cut at silences close to ``target_seconds`` (see
+    ``plan_chunks``), up to ``concurrency`` chunks are sent to the provider
+    at once, and the texts are stitched back in order. ``transcribe_fn``
+    defaults to transcribe_audio_file_async with the given ``engine`` and
+    ``model``, so each chunk is retried on its own; a plain function is run
+    on the I/O thread pool instead.
+    A known ``duration`` short enough for a single chunk skips silence
+    detection altogether.
+    ``on_segment`` is awaited with the stitched text of each chunk, in
+    order, as soon as it and every earlier chunk are transcribed, so a
+    later stage can start before the whole recording is done.
+    """
+    target_seconds = target_seconds or settings.chunk_target_seconds
+    overlap_seconds = settings.chunk_overlap_seconds if overlap_seconds is None else overlap_seconds
+    concurrency = max(1, concurrency or settings.chunk_concurrency)
+
+    if duration is not None and duration <= target_seconds * 1.25:
+        silence_map = SilenceMap(duration=duration)
+    else:
+        silence_map = await detect_silences_async(
+            file_path,
+            noise_db=settings.silence_noise_db,
+            min_silence=settings.silence_min_seconds,
+        )
+    spans = plan_chunks(silence_map, target_seconds=target_seconds, overlap_seconds=overlap_seconds)
+    if len(spans) <= 1:
+        logger.info(f"Recording is {silence_map.duration:.1f}s, transcribing in a single call")
+        start = time.perf_counter()
+        text, answered = await _call_transcribe_fn(
+            transcribe_fn,
+            file_path,
+            duration=silence_map.duration,
+            engine=engine,
             model=model,
-            file={
-                "content": f,
-                "file_name": "audio.mp3",
-            },
             language=language,
             temperature=temperature,
+        )
+        chunk = ChunkTranscript(0, 0.0, silence_map.duration, text, round(time.perf_counter() - start, 3))
+        if on_segment is not None and text.strip():
+            await on_segment(text.strip())
+        answered_engine, answered_model = answered or (None, None)
+        return TranscriptionResult(text=text, chunks=[chunk], engine=answered_engine, model=answered_model)
+
+    logger.info(
+        f"Transcribing {file_path} in {len(spans)} chunks "
+        f"(duration={silence_map.duration:.1f}s, concurrency={concurrency})"
+    )
+    parts: List[str] = []
+    finished: Dict[int, ChunkTranscript] = {}
+    stitched = 0
+    stitch_lock = asyncio.Lock()
+    answered_by: Set[Optional[Tuple[str, str]]] = set()
+
+    async def stitch(chunk: ChunkTranscript) -> None:
+        # Append finished chunks to the text in order, dropping repeated overlap words
+        nonlocal stitched
+        finished[chunk.index] = chunk
+        async with stitch_lock:
+            while stitched in finished:
+                text = finished.pop(stitched).text.strip()
+                if parts and spans[stitched].overlaps_previous:
+                    text = merge_overlapping_text(parts[-1], text)
+                stitched += 1
+                if text:
+                    parts.append(text)
+                    if on_segment is not None:
+                        await on_segment(text)
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="audio_chunks_"))
+    try:
+        chunk_paths = await split_audio_async(file_path, spans, tmp_dir)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def transcribe_chunk(index: int) -> ChunkTranscript:
+            async with slots:
+                start = time.perf_counter()
+                span = spans[index]
+                text, answered = await _call_transcribe_fn(
+                    transcribe_fn,
+                    chunk_paths[index],
+                    duration=span.end - span.start,
+                    engine=engine,
+                    model=model,
+                    language=language,
+                    temperature=temperature,
+                )
+                elapsed = round(time.perf_counter() - start, 3)
+            answered_by.add(answered)
+            span = spans[index]
+            logger.debug(f"Chunk {index} [{span.start:.1f}s-{span.end:.1f}s] transcribed in {elapsed}s")
+            chunk = ChunkTranscript(index, span.start, span.end, text, elapsed)
+            await stitch(chunk)
+            return chunk
+
+        # A failed chunk cancels the others before their files are removed below
+        chunks = await gather_or_cancel(transcribe_chunk(i) for i in range(len(spans)))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    text = " ".join(parts)
+    logger.info(f"Chunked transcription completed. Text length: {len(text)} characters")
+    answered_engine, answered_model = (answered_by.pop() or (None, None)) if len(answered_by) == 1 else (None, None)
+    return TranscriptionResult(text=text, chunks=chunks, engine=answered_engine, model=answered_model)
+
+
+_transcript_cache: Optional[TieredCache] = None
+
 
+def get_transcript_cache() -> Optional[TieredCache]:
+    """Return the shared transcript cache, or None when it is disabled."""
+    global _transcript_cache
+    if not settings.transcript_cache_enabled:
+        return None
+    if _transcript_cache is None:
+        ttl = settings.transcript_cache_ttl_seconds
+        _transcript_cache = TieredCache(
+            LRUCache(settings.transcript_cache_memory_entries, ttl_seconds=ttl),
+            DiskCache(
+                Path(settings.cache_dir) / "transcripts",
+                max_bytes=settings.transcript_cache_disk_bytes,
+                ttl_seconds=ttl,
+            ),
         )
-    text = getattr(result, "text", "")
-    logger.info(f"Mistral transcription completed. Text length: {len(text)} characters")
-    return text
+    return _transcript_cache
 
-def transcribe_audio_file(file_path: Path, *, language: Optional[str], temperature: float):
-    logger.debug(f"Transcribing with provider: {PROVIDER}")
-    if PROVIDER == "mistral":
-        return transcribe_audio_file_mistral(file_path, language=language, temperature=temperature)
-    elif PROVIDER == "openai":
-        return transcribe_audio_file_openai(file_path, language=language, temperature=temperature)
+
+def transcript_cache_key(
+    audio_sha256: str,
+    *,
+    provider: str,
+    model: str,
+    language: Optional[str],
+    temperature: float,
+    chunked: bool = False,
+) -> str:
+    return make_cache_key(
+        "transcript",
+        audio=audio_sha256,
+        provider=provider,
+        model=model,
+        language=language,
+        temperature=temperature,
+        chunked=chunked,
+    )
+
+
+async def transcribe_audio_file_cached_async(
+    file_path: Path,
+    *,
+    language: Optional[str],
+    temperature: float,
+    chunked: bool = False,
+    use_cache: bool = True,
+    audio_sha256: Optional[str] = None,
+    duration: Optional[float] = None,
+    engine: Optional[str] = None,
+    model: Optional[str] = None,
+    on_segment: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> TranscriptionResult:
+    """Transcribe ``file_path`` through the content-addressed transcript cache.
+
+    The key is the SHA-256 of the prepared audio plus engine, model,
+    language and temperature. Only deterministic requests
+    (``temperature == 0.0``) are cached. With ``use_cache=False`` the lookup
+    is skipped and the fresh transcript replaces any cached one.
+    ``audio_sha256`` and ``duration`` may be passed when already known.
+    Files larger than the engine's upload limit are transcribed in chunks.
+    Chunked transcriptions hand their text to ``on_segment`` as it arrives
+    (see transcribe_audio_file_chunked_async); cache hits do not.
+    """
+    selected = get_transcription_engine(engine)
+    model = selected.resolve_model(model)
+    max_bytes = selected.capabilities.max_upload_bytes
+    size = _file_size(file_path)
+    if not chunked and max_bytes is not None and size is not None and size > max_bytes:
+        logger.info(f"{file_path} is {size} bytes, over the {selected.name} upload limit; transcribing in chunks")
+        chunked = True
+
+    cache = get_transcript_cache()
+    key: Optional[str] = None
+    if cache is not None and temperature == 0.0:
+        audio_hash = audio_sha256 or await run_io(sha256_file, file_path)
+        key = transcript_cache_key(
+            audio_hash,
+            provider=selected.name,
+            model=model,
+            language=language,
+            temperature=temperature,
+            chunked=chunked,
+        )
+        cached = await run_io(cache.get, key) if use_cache else None
+        if cached is not None:
+            logger.info(f"Transcript cache hit for {file_path} ({len(cached)} characters)")
+            return TranscriptionResult(text=cached, cached=True, engine=selected.name, model=model)
+
+    if chunked:
+        result = await transcribe_audio_file_chunked_async(
+            file_path,
+            language=language,
+            temperature=temperature,
+            duration=duration,
+            engine=selected.name,
+            model=model,
+            on_segment=on_segment,
+        )
     else:
-        logger.error(f"Unknown provider: {PROVIDER}")
-        raise ValueError(f"Unknown provider: {PROVIDER}")
+        text, answered_engine, answered_model = await _transcribe_file_async(
+            file_path,
+            language=language,
+            temperature=temperature,
+            duration=duration,
+            engine=selected.name,
+            model=model,
+        )
+        result = TranscriptionResult(text=text, engine=answered_engine, model=answered_model)
 
+    if key is not None and result.text:
+        if result.engine is None:
+            logger.info(f"Chunks of {file_path} were transcribed by different engines, not caching the transcript")
+        else:
+            if (result.engine, result.model) != (selected.name, model):
+                # A failover engine answered: cache under its key, not the requested one's
+                key = transcript_cache_key(
+                    audio_hash,
+                    provider=result.engine,
+                    model=result.model,
+                    language=language,
+                    temperature=temperature,
+                    chunked=chunked,
+                )
+            await run_io(cache.set, key, result.text)
+    return result
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.utils.execution import run_io
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the per-file or per-request byte limit."""
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    path: Path
+    size: int
+    sha256: str
+
+
+def create_request_dir() -> Path:
+    """Create a private directory for one request's uploads.
+
+    Each request gets its own directory so two uploads sharing a filename
+    never overwrite each other's audio.
+    """
+    base = Path(settings.upload_dir)
+    base.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix="request_", dir=base))
+
+
+def cleanup_request_dir(path: Path) -> None:
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.warning(f"Failed to remove upload dir {path}")
+
+
+def _safe_filename(filename: Optional[str], index: int) -> str:
+    # Drop any client-supplied directory components and keep names unique
+    # within the request by prefixing the upload position.
+    name = Path(filename or "").name or "upload"
+    return f"{index:03d}_{name}"
+
+
+async def save_upload(
+    file: UploadFile,
+    dest: Path,
+    *,
+    chunk_size: int,
+    max_bytes: int,
+) -> StoredUpload:
+    """Copy an upload to ``dest`` in ``chunk_size`` pieces, hashing as it goes.
+
+    Raises UploadTooLargeError as soon as more than ``max_bytes`` have been
+    read; the partially written file is removed.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(
+            f"File {file.filename} is {file.size} bytes, limit is {max_bytes} bytes"
+        )
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with dest.open("wb") as out:
+
+            def write(chunk: bytes) -> None:
+                digest.update(chunk)
+                out.write(chunk)
+
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"File {file.filename} exceeds the limit of {max_bytes} bytes"
+                    )
+                # Hashing and writing a chunk blocks; keep it off the event loop
+                await run_io(write, chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+    logger.debug(f"Stored upload {file.filename} -> {dest} ({size} bytes)")
+    return StoredUpload(filename=file.filename or dest.name, path=dest, size=size, sha256=digest.hexdigest())
+
+
+async def save_uploads(files: List[UploadFile], dest_dir: Path) -> List[StoredUpload]:
+    """Stream every upload of a request into ``dest_dir``.
+
+    Enforces the per-file limit and the per-request total, rejecting the
+    request as soon as either is exceeded.
+    """
+    chunk_size = settings.upload_chunk_size
+    max_file_bytes = settings.max_upload_file_bytes
+    max_request_bytes = settings.max_upload_request_bytes
+
+    declared = sum(f.size or 0 for f in files)
+    if declared > max_request_bytes:
+        raise UploadTooLargeError(
+            f"Request is {declared} bytes, limit is {max_request_bytes} bytes"
+        )
+
+    stored: List[StoredUpload] = []
+    total = 0
+    for index, file in enumerate(files):
+        remaining = max_request_bytes - total
+        upload = await save_upload(
+            file,
+            dest_dir / _safe_filename(file.filename, index),
+            chunk_size=chunk_size,
+            max_bytes=min(max_file_bytes, remaining),
+        )
+        total += upload.size
+        stored.append(upload)
+
+    logger.info(f"Stored {len(stored)} upload(s), {total} bytes total")
+    return stored
+
+
+# Room for the multipart boundaries and part headers around the files themselves
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Answer 413 to an upload whose Content-Length is over ``MAX_UPLOAD_REQUEST_BYTES``.
+
+    Starlette reads and spools the whole multipart body before a handler
+    runs, so save_uploads can only refuse it afterwards. This checks the
+    declared length before any of the body is read; bodies sent without one
+    are still bounded by save_uploads.
+    """
+
+    def __init__(self, app, *, paths: Tuple[str, ...] = ("/transcribe",)):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"].startswith(self.paths):
+            declared = dict(scope["headers"]).get(b"content-length", b"")
+            limit = settings.max_upload_request_bytes + MULTIPART_OVERHEAD_BYTES
+            if declared.isdigit() and int(declared) > limit:
+                logger.warning(f"Rejected upload of {int(declared)} bytes to {scope['path']} before reading it")
+                response = JSONResponse(
+                    {"detail": f"Request is {int(declared)} bytes, limit is {settings.max_upload_request_bytes} bytes"},
+                    status_code=413,
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,103 @@
+"""Micro-batching of concurrent calls into one request.
+
+Items submitted under the same key within ``window_seconds`` (or until
+``max_size`` are waiting) are handed to the handler together; each caller
+gets the result at its own position. Used by the local engine to send
+concurrent formatting requests to the server as one batch.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _Batch(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher(Generic[K, T, R]):
+    """Groups concurrent ``submit`` calls and runs ``handler(key, items)`` once per batch.
+
+    The handler must return one result per item, in order; an exception
+    in place of a result is raised to that caller only. If the handler
+    raises, every caller in the batch gets the exception. Used from a
+    single event loop.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[K, List[T]], Awaitable[List[R]]],
+        *,
+        max_size: int,
+        window_seconds: float,
+    ):
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.window_seconds = max(0.0, window_seconds)
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._pending: Dict[K, _Batch[T]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: K, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch()
+            batch.timer = loop.call_later(self.window_seconds, self._flush, key)
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_size:
+            batch.timer.cancel()
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: K) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        task = asyncio.ensure_future(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: K, batch: _Batch[T]) -> None:
+        size = len(batch.items)
+        self.batches += 1
+        self.items += size
+        self.largest_batch = max(self.largest_batch, size)
+        logger.debug(f"Running batch of {size} for {key}")
+        try:
+            results = await self.handler(key, batch.items)
+            if len(results) != size:
+                raise RuntimeError(f"Batch handler returned {len(results)} results for {size} items")
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def to_dict(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "largestBatch": self.largest_batch,
+            "avgBatchSize": round(self.items / self.batches, 2) if self.batches else None,
+        }
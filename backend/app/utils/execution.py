@@ -0,0 +1,144 @@
+"""Shared execution layer keeping blocking work off the event loop.
+
+- ``run_io``: blocking I/O (file hashing, cache lookups, sync SDK calls)
+  on a dedicated thread pool sized by ``IO_THREAD_POOL_SIZE``.
+- ``run_cpu``: CPU-bound work (DOCX generation) on a process pool sized by
+  ``CPU_PROCESS_POOL_SIZE``; ``0`` runs it on the I/O pool instead.
+- ``run_subprocess``: external tools (ffmpeg) as asyncio subprocesses.
+- ``run_sync``: drive a coroutine to completion from synchronous code.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import subprocess
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Iterable, List, Optional, Sequence, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    with _lock:
+        if _io_executor is None:
+            size = max(1, settings.io_thread_pool_size)
+            logger.debug(f"Starting I/O thread pool with {size} workers")
+            _io_executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="io")
+        return _io_executor
+
+
+def get_cpu_executor() -> Executor:
+    global _cpu_executor
+    size = settings.cpu_process_pool_size
+    if size <= 0:
+        return get_io_executor()
+    with _lock:
+        if _cpu_executor is None:
+            logger.debug(f"Starting CPU process pool with {size} workers")
+            _cpu_executor = ProcessPoolExecutor(max_workers=size)
+        return _cpu_executor
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking, network-bound callable on the I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    # Carry context variables into the worker thread like asyncio.to_thread
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_io_executor(), call)
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-bound callable on the process pool.
+
+    ``func`` and its arguments must be picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_subprocess(cmd: Sequence[str]) -> subprocess.CompletedProcess:
+    """Run ``cmd`` as an asyncio subprocess, capturing stdout and stderr.
+
+    Mirrors ``subprocess.run(cmd, check=True, capture_output=True)``: a
+    non-zero exit raises ``subprocess.CalledProcessError``. If the awaiting
+    task is cancelled the child process is killed.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, list(cmd), output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(list(cmd), proc.returncode, stdout, stderr)
+
+
+async def gather_or_cancel(awaitables: Iterable[Awaitable[T]]) -> List[T]:
+    """Like ``asyncio.gather`` but cancels the siblings as soon as one fails.
+
+    Results keep the input order. The first exception is re-raised once all
+    cancelled siblings have finished unwinding.
+    """
+    tasks = [asyncio.ensure_future(a) for a in awaitables]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="sync-bridge", daemon=True).start()
+        return _sync_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run ``coro`` to completion from synchronous code and return its result.
+
+    Every call shares one background event loop rather than a fresh
+    ``asyncio.run`` loop, so the pooled async SDK clients (bound to the
+    loop that first used them) stay usable across calls.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_sync_loop())
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def shutdown_executors() -> None:
+    global _io_executor, _cpu_executor
+    with _lock:
+        if _io_executor is not None:
+            _io_executor.shutdown(wait=False, cancel_futures=True)
+            _io_executor = None
+        if _cpu_executor is not None:
+            _cpu_executor.shutdown(wait=False, cancel_futures=True)
+            _cpu_executor = None
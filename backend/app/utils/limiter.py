@@ -0,0 +1,225 @@
+"""Per-provider admission control shared by every provider call.
+
+Each provider gets token buckets for requests/min and audio-seconds/min
+plus an AIMD concurrency window: the window grows by about one slot per
+window's worth of successes and halves on 429/503 or timeouts. Time spent
+waiting for admission is recorded for ``GET /metrics``.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+import openai
+
+from app.config import settings
+from app.utils.resilience import status_code_of
+
+T = TypeVar("T")
+
+_OVERLOAD_STATUS = {429, 503}
+_TIMEOUT_ERRORS = (httpx.TimeoutException, openai.APITimeoutError, asyncio.TimeoutError)
+
+
+def is_overload(exc: BaseException) -> bool:
+    return isinstance(exc, _TIMEOUT_ERRORS) or status_code_of(exc) in _OVERLOAD_STATUS
+
+
+class TokenBucket:
+    """Refills ``per_minute`` tokens per minute, holding at most a minute's worth.
+
+    Callers reserve tokens up front (the balance may go negative) and sleep
+    off the deficit, so waiters are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens and return how long to wait before using them."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AIMDWindow:
+    """Concurrency limit with additive increase and multiplicative decrease.
+
+    Used from a single event loop; slots are handed to waiters in order.
+    """
+
+    # Several calls failing together should halve the window only once
+    DECREASE_COOLDOWN = 1.0
+
+    def __init__(self, initial: int, *, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit / 2)
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class LimiterStats:
+    def __init__(self):
+        self.calls = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.overloads = 0
+
+    def record_wait(self, seconds: float) -> None:
+        self.calls += 1
+        if seconds > 0.001:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+class ProviderLimiter:
+    def __init__(
+        self,
+        name: str,
+        *,
+        requests_per_minute: float,
+        audio_seconds_per_minute: float,
+        initial_concurrency: int,
+        min_concurrency: int,
+        max_concurrency: int,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.audio = TokenBucket(audio_seconds_per_minute) if audio_seconds_per_minute > 0 else None
+        self.window = AIMDWindow(initial_concurrency, minimum=min_concurrency, maximum=max_concurrency)
+        self.stats = LimiterStats()
+
+    async def acquire(self, *, audio_seconds: float = 0.0) -> None:
+        """Wait for admission. Every ``acquire`` must be paired with a ``release``."""
+        start = time.monotonic()
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.audio is not None and audio_seconds > 0:
+            await self.audio.acquire(audio_seconds)
+        await self.window.acquire()
+        self.stats.record_wait(time.monotonic() - start)
+
+    def release(self, error: Optional[BaseException] = None) -> None:
+        """Free the slot and adapt the window to the call's outcome (``error`` if it failed)."""
+        if error is not None and is_overload(error):
+            self.stats.overloads += 1
+            self.window.on_overload()
+        self.window.release()
+        if error is None:
+            self.window.on_success()
+
+    async def run(self, call: Callable[[], Awaitable[T]], *, audio_seconds: float = 0.0) -> T:
+        """Wait for admission, run ``call`` and adapt the window to its outcome."""
+        await self.acquire(audio_seconds=audio_seconds)
+        try:
+            result = await call()
+        except BaseException as e:
+            self.release(e)
+            raise
+        self.release()
+        return result
+
+    def to_dict(self) -> dict:
+        stats = self.stats
+        return {
+            "concurrencyLimit": round(self.window.limit, 2),
+            "inFlight": self.window.in_flight,
+            "queued": len(self.window._waiters),
+            "calls": stats.calls,
+            "waits": stats.waits,
+            "waitSeconds": round(stats.wait_seconds, 3),
+            "maxWaitSeconds": round(stats.max_wait_seconds, 3),
+            "avgWaitSeconds": round(stats.wait_seconds / stats.calls, 3) if stats.calls else 0.0,
+            "overloads": stats.overloads,
+        }
+
+
+_lock = threading.Lock()
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    with _lock:
+        if provider not in _limiters:
+            _limiters[provider] = ProviderLimiter(
+                provider,
+                requests_per_minute=settings.provider_requests_per_minute(provider),
+                audio_seconds_per_minute=settings.provider_audio_seconds_per_minute(provider),
+                initial_concurrency=settings.provider_concurrency_initial,
+                min_concurrency=settings.provider_concurrency_min,
+                max_concurrency=settings.provider_concurrency_max,
+            )
+        return _limiters[provider]
+
+
+async def run_limited(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    *,
+    audio_seconds: Optional[float] = None,
+) -> T:
+    return await get_limiter(provider).run(call, audio_seconds=audio_seconds or 0.0)
+
+
+def reset_limiters() -> None:
+    with _lock:
+        _limiters.clear()
+
+
+def limiter_stats() -> dict:
+    with _lock:
+        limiters = dict(_limiters)
+    return {name: limiter.to_dict() for name, limiter in limiters.items()}
@@ -0,0 +1,341 @@
+"""Resilience layer for provider calls.
+
+- jittered exponential retries on transient errors (429, 5xx, timeouts,
+  connection failures), honouring ``Retry-After``;
+- optional hedging: a second identical request once the first has been
+  running longer than a latency percentile of recent calls;
+- a circuit breaker per provider, and failover to the other configured
+  provider while the primary's breaker is open or its retries run out.
+"""
+import asyncio
+import email.utils
+import inspect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import httpx
+import openai
+from mistralai.models import NoResponseError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROVIDERS: Tuple[str, ...] = ("mistral", "openai")
+
+_RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+_CONNECTION_ERRORS = (
+    httpx.TransportError,
+    openai.APIConnectionError,
+    NoResponseError,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+
+class ProviderUnavailableError(Exception):
+    """Raised when every candidate provider is failing or has an open circuit."""
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, _CONNECTION_ERRORS):
+        return True
+    return status_code_of(exc) in _RETRYABLE_STATUS
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read ``Retry-After`` (or ``retry-after-ms``) from an SDK error's response."""
+    headers = getattr(exc, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    raw_ms = headers.get("retry-after-ms")
+    if raw_ms:
+        try:
+            return max(0.0, float(raw_ms) / 1000)
+        except ValueError:
+            pass
+    raw = headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, *, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given zero-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open, calls are refused for ``reset_seconds``; then a single trial
+    call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, *, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Free a half-open trial whose call ended without telling anything about the provider."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[Tuple[str, str], LatencyTracker] = {}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                provider,
+                failure_threshold=settings.circuit_failure_threshold,
+                reset_seconds=settings.circuit_reset_seconds,
+            )
+        return _breakers[provider]
+
+
+def get_latency_tracker(operation: str, provider: str) -> LatencyTracker:
+    with _lock:
+        return _latencies.setdefault((operation, provider), LatencyTracker())
+
+
+def reset_state() -> None:
+    """Forget breaker and latency state (tests, configuration reloads)."""
+    with _lock:
+        _breakers.clear()
+        _latencies.clear()
+
+
+def breaker_stats() -> dict:
+    with _lock:
+        breakers = dict(_breakers)
+    return {name: breaker.to_dict() for name, breaker in breakers.items()}
+
+
+def provider_candidates(primary: str) -> List[str]:
+    """The primary provider, then the other one if failover is enabled and it has an API key.
+
+    Providers outside ``PROVIDERS`` (a self-hosted server) never fail over,
+    so their audio and transcripts are not sent to a hosted API.
+    """
+    candidates = [primary]
+    if settings.provider_failover and primary in PROVIDERS:
+        keys = {"mistral": settings.mistral_api_key, "openai": settings.openai_api_key}
+        candidates += [p for p in PROVIDERS if p != primary and keys.get(p)]
+    return candidates
+
+
+async def _discard(result) -> None:
+    """Close a response or stream that lost a hedge, so its connection goes back to the pool."""
+    close = getattr(result, "aclose", None) or getattr(result, "close", None)
+    if close is None:
+        return
+    try:
+        closing = close()
+        if inspect.isawaitable(closing):
+            await closing
+    except Exception as e:
+        logger.debug(f"Closing a discarded hedged result failed: {e}")
+
+
+async def _hedged(operation: str, provider: str, call: Callable[[], Awaitable[T]]) -> T:
+    tracker = get_latency_tracker(operation, provider)
+
+    async def timed() -> T:
+        start = time.perf_counter()
+        result = await call()
+        tracker.record(time.perf_counter() - start)
+        return result
+
+    threshold = None
+    if settings.hedge_percentile > 0 and len(tracker) >= settings.hedge_min_samples:
+        threshold = tracker.percentile(settings.hedge_percentile)
+    if threshold is None:
+        return await timed()
+
+    tasks = [asyncio.ensure_future(timed())]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=threshold)
+        if not done:
+            logger.info(f"{operation} on {provider} slower than {threshold:.1f}s, sending a hedged request")
+            tasks.append(asyncio.ensure_future(timed()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and winner is None:
+                    winner = task
+            if winner is not None:
+                return winner.result()
+            error = next(task.exception() for task in done)
+        raise error
+    finally:
+        losers = [task for task in tasks if task is not winner]
+        for task in losers:
+            if not task.done():
+                task.cancel()
+        # A loser may have finished alongside the winner, or despite its cancellation
+        await asyncio.gather(*losers, return_exceptions=True)
+        for task in losers:
+            if not task.cancelled() and task.exception() is None:
+                await _discard(task.result())
+
+
+async def _with_retries(operation: str, provider: str, call: Callable[[], Awaitable[T]]) -> T:
+    breaker = get_breaker(provider)
+    attempts = max(1, settings.retry_max_attempts)
+    for attempt in range(attempts):
+        try:
+            result = await _hedged(operation, provider, call)
+        except Exception as e:
+            if not is_transient(e):
+                # A client error says nothing about the provider's health
+                breaker.release_trial()
+                raise
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = backoff_delay(attempt, base=settings.retry_base_delay, cap=settings.retry_max_delay)
+            elif delay > settings.retry_max_delay:
+                # Waiting that long is worse than failing over
+                logger.warning(f"{provider} asked to retry {operation} after {delay:.0f}s, giving up on it")
+                raise
+            logger.warning(
+                f"{operation} on {provider} failed ({e}), retry {attempt + 1}/{attempts - 1} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            if not breaker.allow():
+                raise
+            continue
+        except BaseException:
+            # Cancelled: the trial slot must not stay taken
+            breaker.release_trial()
+            raise
+        breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+
+async def call_with_resilience(
+    operation: str,
+    candidates: Sequence[Tuple[str, Callable[[], Awaitable[T]]]],
+) -> T:
+    """Run ``operation`` on the first healthy provider in ``candidates``.
+
+    Each candidate is a ``(provider, call)`` pair where ``call`` starts a
+    fresh request. Transient failures are retried on the same provider;
+    once its retries are exhausted, or its circuit is open, the next
+    candidate is tried. Non-transient errors are raised immediately.
+    """
+    last_error: Optional[BaseException] = None
+    for provider, call in candidates:
+        breaker = get_breaker(provider)
+        if not breaker.allow():
+            logger.warning(f"Circuit for {provider} is open, skipping it for {operation}")
+            continue
+        try:
+            return await _with_retries(operation, provider, call)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            last_error = e
+            logger.warning(f"{operation} failed on {provider}: {e}")
+
+    if last_error is not None:
+        raise last_error
+    raise ProviderUnavailableError(f"No provider available for {operation}: all circuits are open")
@@ -0,0 +1,103 @@
+"""Wall-clock scaling of concatenate_multi_files with the number of inputs.
+
+Compares CONCAT_MODE=convert (serial and parallel per-file conversion) with
+the single-pass CONCAT_MODE=filter graph.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_concat                 # simulated ffmpeg
+    python -m benchmarks.bench_concat --real          # real ffmpeg on generated tones
+
+The simulated mode replaces each ffmpeg run with a fixed sleep so the
+scheduling gain is visible on any machine; ``--real`` needs ffmpeg on PATH
+and reflects the actual core count.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from app.services import preprocessor
+
+
+def _make_inputs(tmp: Path, count: int, seconds: int, real: bool):
+    paths = []
+    for i in range(count):
+        path = tmp / f"segment_{i:02d}.flac"
+        if real:
+            subprocess.run(
+                ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+                 "-i", f"sine=frequency={220 + 20 * i}:duration={seconds}",
+                 "-ar", "48000", "-ac", "2", str(path)],
+                check=True,
+            )
+        else:
+            path.write_bytes(b"fake")
+        paths.append(path)
+    return paths
+
+
+def _simulated_ffmpeg(seconds_per_run: float):
+    async def run(cmd):
+        if cmd[0] == "ffprobe":
+            # Unknown stream layout: forces the single-pass filter path
+            return subprocess.CompletedProcess(cmd, 0, b"{}", b"")
+        await asyncio.sleep(seconds_per_run)
+        out = Path(cmd[-1])
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.touch()
+        return subprocess.CompletedProcess(cmd, 0, b"", b"")
+    return run
+
+
+def _time_concat(paths, concurrency: int, mode: str = "convert") -> float:
+    env = {"FFMPEG_CONCURRENCY": str(concurrency), "CONCAT_MODE": mode}
+    with patch.dict(os.environ, env):
+        start = time.perf_counter()
+        result = asyncio.run(preprocessor.concatenate_multi_files_async(paths))
+        elapsed = time.perf_counter() - start
+    if result.parent.name.startswith("audio_concat_"):
+        shutil.rmtree(result.parent, ignore_errors=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="run real ffmpeg instead of a simulated one")
+    parser.add_argument("--counts", default="2,4,8,16", help="comma-separated input counts")
+    parser.add_argument("--seconds", type=int, default=60, help="tone length per input (--real)")
+    parser.add_argument("--sim-run-seconds", type=float, default=0.25, help="simulated ffmpeg run time")
+    args = parser.parse_args()
+
+    if args.real and shutil.which("ffmpeg") is None:
+        parser.error("--real needs ffmpeg on PATH")
+
+    cores = os.cpu_count() or 1
+    counts = [int(c) for c in args.counts.split(",")]
+    print(f"mode={'real' if args.real else 'simulated'} cores={cores}")
+    print(f"{'files':>5}  {'serial (s)':>10}  {'parallel (s)':>12}  {'speedup':>7}  {'single-pass (s)':>15}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            paths = _make_inputs(Path(tmp), count, args.seconds, args.real)
+            if args.real:
+                serial = _time_concat(paths, 1)
+                parallel = _time_concat(paths, cores)
+                single = _time_concat(paths, cores, mode="filter")
+            else:
+                fake = _simulated_ffmpeg(args.sim_run_seconds)
+                with patch.object(preprocessor, "run_subprocess", fake), \
+                        patch.object(preprocessor.shutil, "which", return_value="ffmpeg"):
+                    serial = _time_concat(paths, 1)
+                    parallel = _time_concat(paths, max(cores, 4))
+                    single = _time_concat(paths, max(cores, 4), mode="filter")
+            print(f"{count:>5}  {serial:>10.2f}  {parallel:>12.2f}  {serial / parallel:>6.1f}x  {single:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
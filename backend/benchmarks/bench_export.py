@@ -0,0 +1,137 @@
+"""Markdown to DOCX export time on long transcripts.
+
+Compares the current single-pass exporter with the previous regex-per-block
+implementation (kept below as ``legacy_export``), and reports how many
+runs each one writes.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_export                     # 10k paragraphs
+    python -m benchmarks.bench_export --paragraphs 1000,10000 --repeat 3
+"""
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from docx import Document
+
+from app.services import exporter
+
+
+def make_transcript(paragraphs: int) -> str:
+    blocks = ["# Procès-verbal de constat"]
+    for i in range(paragraphs):
+        if i % 25 == 0:
+            blocks.append(f"## Section {i // 25 + 1}")
+        if i % 10 == 9:
+            blocks.append("- Premier point relevé\n- Deuxième point, **important**\n- Troisième *point*")
+            continue
+        blocks.append(
+            f"Le {i % 28 + 1} mars, **Maître Dupont** a constaté que la partie *requérante* était présente. "
+            f"Les __pièces__ numéro {i} ont été remises, puis la séance s'est poursuivie sans incident."
+        )
+    return "\n\n".join(blocks)
+
+
+def legacy_export(md_text: str, output_path: str, language_code: str = 'fr-FR') -> str:
+    """The exporter before the single-pass tokenizer, for comparison."""
+    doc = Document()
+    exporter._set_document_language(doc, language_code)
+    if 'Normal' in doc.styles:
+        doc.styles['Normal'].font.language_id = language_code
+
+    for block in re.split(r'\n\s*\n', md_text.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        heading_match = re.match(r'^(#{1,6})\s+(.+)$', block, re.MULTILINE)
+        if heading_match:
+            heading = doc.add_heading(heading_match.group(2).strip(), level=min(len(heading_match.group(1)), 6))
+            for run in heading.runs:
+                run.font.language_id = language_code
+            continue
+        lines = [line.strip() for line in block.split('\n') if line.strip()]
+        if lines and all(re.match(r'^[\*\-\+]\s+|\d+\.\s+', line) for line in lines):
+            for line in lines:
+                para = doc.add_paragraph(style='List Bullet')
+                _legacy_add_formatted_text(para, re.sub(r'^[\*\-\+]\s+|\d+\.\s+', '', line), language_code)
+            continue
+        para = doc.add_paragraph()
+        _legacy_add_formatted_text(para, block, language_code)
+
+    doc.save(output_path)
+    return output_path
+
+
+def _legacy_add_formatted_text(paragraph, text: str, lang_code: str):
+    bold_pattern = r'(\*\*|__)(.+?)\1'
+    italic_pattern = r'(?<!\*)(?<![a-zA-Z0-9_])(\*|_)([^*_\s]+?)\1(?![*_])'
+    parts = []
+    last_end = 0
+    for match in re.finditer(bold_pattern, text):
+        if match.start() > last_end:
+            parts.append(('text', text[last_end:match.start()]))
+        parts.append(('bold', match.group(2)))
+        last_end = match.end()
+    if last_end < len(text):
+        parts.append(('text', text[last_end:]))
+    if not parts:
+        parts = [('text', text)]
+
+    for part_type, part_text in parts:
+        is_bold = part_type == 'bold'
+        last_italic_end = 0
+        for it_match in re.finditer(italic_pattern, part_text):
+            if it_match.start() > last_italic_end:
+                run = paragraph.add_run(part_text[last_italic_end:it_match.start()])
+                run.bold = is_bold
+                run.font.language_id = lang_code
+            run = paragraph.add_run(it_match.group(2))
+            run.bold = is_bold
+            run.italic = True
+            run.font.language_id = lang_code
+            last_italic_end = it_match.end()
+        if last_italic_end < len(part_text) or not part_text:
+            run = paragraph.add_run(part_text[last_italic_end:])
+            run.bold = is_bold
+            run.font.language_id = lang_code
+
+
+def _time_export(export, md_text: str, path: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export(md_text, str(path))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _count_runs(path: Path) -> int:
+    return sum(len(p.runs) for p in Document(str(path)).paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", default="10000", help="comma-separated paragraph counts")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    print(f"{'paragraphs':>10}  {'legacy (s)':>10}  {'current (s)':>11}  {'speedup':>7}  {'parse (s)':>9}  {'runs':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.docx"
+        current_path = Path(tmp) / "current.docx"
+        for count in (int(c) for c in args.paragraphs.split(",")):
+            md_text = make_transcript(count)
+            legacy = _time_export(legacy_export, md_text, legacy_path, args.repeat)
+            current = _time_export(exporter.export_md_to_docx, md_text, current_path, args.repeat)
+            start = time.perf_counter()
+            exporter.parse_markdown(md_text)
+            parse = time.perf_counter() - start
+            runs = f"{_count_runs(legacy_path)} -> {_count_runs(current_path)}"
+            print(f"{count:>10}  {legacy:>10.2f}  {current:>11.2f}  {legacy / current:>6.1f}x  {parse:>9.3f}  {runs:>13}")
+
+
+if __name__ == "__main__":
+    main()
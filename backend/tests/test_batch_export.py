@@ -0,0 +1,66 @@
+import asyncio
+import io
+import json
+import zipfile
+from unittest.mock import patch
+
+import httpx
+from docx import Document
+
+from app.services.batch_export import BatchExportItem, entry_names, export_batch_zip
+
+
+def test_entry_names_are_safe_and_unique():
+    """Test archive names drop path characters, end in .docx and never collide."""
+    assert entry_names(["Constat", "constat.docx", "../etc/passwd", "", "a/b"]) == [
+        "Constat.docx",
+        "constat (2).docx",
+        "_etc_passwd.docx",
+        "transcript_4.docx",
+        "a_b.docx",
+    ]
+
+
+@patch.dict("os.environ", {"CPU_PROCESS_POOL_SIZE": "0", "EXPORT_BATCH_CONCURRENCY": "2"})
+def test_export_batch_zip_streams_entries_and_reports_errors():
+    """Test documents are streamed in order and a failing item is only listed in the manifest."""
+    items = [
+        BatchExportItem("first", "# First"),
+        BatchExportItem("broken", "# Broken", letterhead="missing"),
+        BatchExportItem("third", "Third **text**.", language="de-DE"),
+    ]
+
+    async def collect():
+        return [chunk async for chunk in export_batch_zip(items)]
+
+    chunks = asyncio.run(collect())
+
+    assert len(chunks) > 1
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == ["first.docx", "third.docx", "manifest.json"]
+    assert Document(io.BytesIO(archive.read("third.docx"))).paragraphs[0].text == "Third text."
+    manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["items"] == [
+        {"name": "first", "file": "first.docx"},
+        {"name": "broken", "error": "Unknown letterhead: 'missing'"},
+        {"name": "third", "file": "third.docx"},
+    ]
+
+
+@patch.dict("os.environ", {"CPU_PROCESS_POOL_SIZE": "0", "EXPORT_BATCH_MAX_ITEMS": "2"})
+def test_export_batch_endpoint():
+    """Test POST /export/batch returns a ZIP and rejects empty or oversized batches."""
+    from app.main import app
+
+    async def post(items):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/export/batch", json={"items": items})
+
+    response = asyncio.run(post([{"name": "One", "content": "One."}, {"name": "Two", "content": "Two."}]))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == ["One.docx", "Two.docx", "manifest.json"]
+
+    assert asyncio.run(post([])).status_code == 400
+    assert asyncio.run(post([{"name": str(n), "content": "x"} for n in range(3)])).status_code == 400
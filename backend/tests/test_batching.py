@@ -0,0 +1,54 @@
+import asyncio
+
+from app.utils.batching import MicroBatcher
+
+
+def test_concurrent_items_are_batched_per_key():
+    """Test items submitted together share one handler call per key, results in order."""
+    calls = []
+
+    async def handler(key, items):
+        calls.append((key, list(items)))
+        return [f"{key}:{item}" for item in items]
+
+    batcher = MicroBatcher(handler, max_size=10, window_seconds=0.01)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit("a", 1), batcher.submit("b", 2), batcher.submit("a", 3)
+        )
+
+    assert asyncio.run(scenario()) == ["a:1", "b:2", "a:3"]
+    assert sorted(calls) == [("a", [1, 3]), ("b", [2])]
+    assert batcher.to_dict()["largestBatch"] == 2
+
+
+def test_full_batch_is_sent_without_waiting_for_window():
+    """Test reaching max_size flushes the batch immediately."""
+    async def handler(key, items):
+        return items
+
+    batcher = MicroBatcher(handler, max_size=2, window_seconds=10.0)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(batcher.submit("k", 1), batcher.submit("k", 2)), 1.0)
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_errors_reach_the_right_callers():
+    """Test a per-item exception fails only that caller and a handler error fails all."""
+    async def per_item(key, items):
+        return [ValueError("bad") if item == "bad" else item for item in items]
+
+    async def broken(key, items):
+        raise RuntimeError("server down")
+
+    async def scenario(handler):
+        batcher = MicroBatcher(handler, max_size=10, window_seconds=0.01)
+        return await asyncio.gather(batcher.submit("k", "ok"), batcher.submit("k", "bad"), return_exceptions=True)
+
+    ok, bad = asyncio.run(scenario(per_item))
+    assert ok == "ok"
+    assert isinstance(bad, ValueError)
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario(broken)))
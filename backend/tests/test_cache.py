@@ -0,0 +1,132 @@
+import time
+from unittest.mock import patch
+
+from app.services.cache import DiskCache, LRUCache, SQLiteCache, TieredCache, make_cache_key, sha256_file
+
+
+def test_make_cache_key_is_stable_and_parameter_sensitive():
+    """Test make_cache_key ignores parameter order but not parameter values."""
+    assert make_cache_key("ns", a=1, b="x") == make_cache_key("ns", b="x", a=1)
+    assert make_cache_key("ns", a=1) != make_cache_key("ns", a=2)
+    assert make_cache_key("ns", a=1) != make_cache_key("other", a=1)
+
+
+def test_sha256_file(tmp_path):
+    """Test sha256_file hashes file content."""
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"same")
+    b.write_bytes(b"same")
+    assert sha256_file(a) == sha256_file(b)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test LRUCache evicts the least recently used entry past max_entries."""
+    cache = LRUCache(2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats.evictions == 1
+    assert cache.stats.hits == 3
+    assert cache.stats.misses == 1
+
+
+def test_lru_cache_enforces_byte_limit():
+    """Test LRUCache evicts entries to stay under max_bytes."""
+    cache = LRUCache(100, max_bytes=10)
+    cache.set("a", "12345")
+    cache.set("b", "12345")
+    cache.set("c", "12345")
+    assert len(cache) == 2
+    assert cache.get("a") is None
+
+
+def test_lru_cache_expires_entries():
+    """Test LRUCache treats entries older than the TTL as misses."""
+    cache = LRUCache(10, ttl_seconds=60)
+    cache.set("a", "1", created=time.time() - 120)
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+
+
+def test_disk_cache_round_trip_and_ttl(tmp_path):
+    """Test DiskCache persists values across instances and honours the TTL."""
+    DiskCache(tmp_path, max_bytes=1_000_000).set("k" * 64, "value")
+    assert DiskCache(tmp_path, max_bytes=1_000_000).get("k" * 64) == "value"
+
+    expired = DiskCache(tmp_path, max_bytes=1_000_000, ttl_seconds=60)
+    with patch("app.services.cache.time.time", return_value=time.time() + 120):
+        assert expired.get("k" * 64) is None
+    assert expired.stats.expirations == 1
+
+
+def test_disk_cache_size_eviction(tmp_path):
+    """Test DiskCache removes least recently used files past max_bytes."""
+    cache = DiskCache(tmp_path, max_bytes=400)
+    for i in range(10):
+        cache.set(f"{i:02d}" + "0" * 62, "x" * 50)
+    assert cache.stats.evictions > 0
+    assert sum(p.stat().st_size for p in tmp_path.glob("*/*.json")) <= 400
+
+
+def test_disk_cache_overwrite_keeps_size_accurate(tmp_path):
+    """Test overwriting a key replaces its size instead of adding to it."""
+    cache = DiskCache(tmp_path, max_bytes=1_000_000)
+    cache.set("ab" * 32, "x" * 50)
+    for _ in range(3):
+        cache.set("cd" * 32, "y" * 50)
+    assert cache.to_dict()["bytes"] == sum(p.stat().st_size for p in tmp_path.glob("*/*.json"))
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    """Test TieredCache serves disk hits and promotes them into memory."""
+    DiskCache(tmp_path, max_bytes=1_000_000).set("ab" * 32, "value")
+    cache = TieredCache(LRUCache(10), DiskCache(tmp_path, max_bytes=1_000_000))
+
+    assert cache.get("ab" * 32) == "value"
+    assert cache.get("ab" * 32) == "value"
+    assert cache.memory.stats.hits == 1
+    assert cache.disk.stats.hits == 1
+
+
+def test_sqlite_cache_round_trip_and_persistence(tmp_path):
+    """Test SQLiteCache persists values across connections."""
+    path = tmp_path / "cache.sqlite3"
+    cache = SQLiteCache(path, max_entries=10)
+    cache.set("a", "value")
+    cache.close()
+
+    reopened = SQLiteCache(path, max_entries=10)
+    assert reopened.get("a") == "value"
+    assert reopened.get("missing") is None
+    assert reopened.to_dict()["entries"] == 1
+    assert reopened.stats.hits == 1
+    assert reopened.stats.misses == 1
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    """Test SQLiteCache evicts the least recently accessed row past max_entries."""
+    cache = SQLiteCache(tmp_path / "cache.sqlite3", max_entries=2)
+    with patch("app.services.cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats.evictions == 1
+
+
+def test_sqlite_cache_expires_entries(tmp_path):
+    """Test SQLiteCache treats rows older than the TTL as misses."""
+    cache = SQLiteCache(tmp_path / "cache.sqlite3", max_entries=10, ttl_seconds=60)
+    cache.set("a", "1")
+    with patch("app.services.cache.time.time", return_value=time.time() + 120):
+        assert cache.get("a") is None
+    assert cache.stats.expirations == 1
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.clients.registry import ClientRegistry, ConnectionStats, create_async_http_client, create_http_client
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_client_reuses_keepalive_connection(stub_server):
+    """Test consecutive requests reuse one pooled connection and are counted."""
+    stats = ConnectionStats()
+    with create_http_client(stats) as client:
+        for _ in range(3):
+            assert client.get(stub_server).text == "ok"
+
+    assert stats.to_dict() == {"requests": 3, "newConnections": 1, "reusedConnections": 2, "reuseRatio": 0.667}
+
+
+def test_async_http_client_reuses_keepalive_connection(stub_server):
+    """Test the async client shares the same reuse accounting."""
+    stats = ConnectionStats()
+
+    async def scenario():
+        async with create_async_http_client(stats) as client:
+            for _ in range(2):
+                await client.get(stub_server)
+
+    asyncio.run(scenario())
+    assert stats.new_connections == 1
+    assert stats.reused_connections == 1
+
+
+def test_http_client_uses_configured_timeouts(monkeypatch):
+    """Test connect and read timeouts come from the PROVIDER_* settings."""
+    monkeypatch.setenv("PROVIDER_CONNECT_TIMEOUT", "3")
+    monkeypatch.setenv("PROVIDER_READ_TIMEOUT", "45")
+    with create_http_client(ConnectionStats()) as client:
+        assert client.timeout.connect == 3.0
+        assert client.timeout.read == 45.0
+
+
+def test_registry_returns_shared_clients_until_closed(monkeypatch):
+    """Test the registry hands out one client per provider and rebuilds after aclose."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("MISTRAL_API_KEY", "test-key")
+    registry = ClientRegistry()
+
+    openai_client = registry.openai()
+    assert registry.openai() is openai_client
+    mistral_client = registry.mistral()
+    assert registry.mistral() is mistral_client
+
+    asyncio.run(registry.aclose())
+    assert registry.openai() is not openai_client
+    asyncio.run(registry.aclose())
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.engines import (
+    FORMATTING,
+    TRANSCRIPTION,
+    Engine,
+    EngineCapabilities,
+    EngineSelectionError,
+    engines_info,
+    get_engine,
+    load_builtin_engines,
+)
+
+load_builtin_engines()
+
+
+async def _noop(*args, **kwargs):
+    return ""
+
+
+def test_builtin_engines_are_registered():
+    """Test both providers are available for transcription and formatting."""
+    info = engines_info()
+    assert {e["name"] for e in info[TRANSCRIPTION]} >= {"mistral", "openai"}
+    assert {e["name"] for e in info[FORMATTING]} >= {"mistral", "openai"}
+    openai = get_engine(TRANSCRIPTION, "openai").to_dict()
+    assert openai["defaultModel"] == "whisper-1"
+    assert openai["capabilities"]["maxUploadBytes"] == 25 * 1024 * 1024
+
+
+def test_unknown_engine_is_rejected():
+    """Test an unknown engine name raises a selection error listing the available ones."""
+    with pytest.raises(EngineSelectionError, match="available transcription engines"):
+        get_engine(TRANSCRIPTION, "nope")
+
+
+def test_resolve_model_defaults_and_validates():
+    """Test an engine falls back to its default model and refuses models it does not list."""
+    engine = Engine("demo", TRANSCRIPTION, "small", _noop, models=("small", "large"))
+    assert engine.resolve_model(None) == "small"
+    assert engine.resolve_model("large") == "large"
+    with pytest.raises(EngineSelectionError):
+        engine.resolve_model("huge")
+    assert Engine("open", TRANSCRIPTION, "any", _noop).resolve_model("custom") == "custom"
+
+
+def test_capabilities_check_format_and_size():
+    """Test accepts() honours the supported formats and upload size limit."""
+    capabilities = EngineCapabilities(max_upload_bytes=100, formats=frozenset({"mp3", "ogg"}))
+    assert capabilities.accepts(Path("a.MP3"), 100)
+    assert not capabilities.accepts(Path("a.mp3"), 101)
+    assert not capabilities.accepts(Path("a.wav"), 10)
+    assert EngineCapabilities().accepts(Path("a.anything"), 10 ** 12)
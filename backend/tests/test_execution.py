@@ -0,0 +1,143 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services.preprocessor import PreparedAudio
+from app.utils.execution import gather_or_cancel, run_cpu, run_io, run_subprocess, run_sync
+
+
+def test_run_subprocess_captures_output():
+    """Test run_subprocess returns the completed process with captured output."""
+    result = asyncio.run(run_subprocess([sys.executable, "-c", "print('hello')"]))
+    assert result.returncode == 0
+    assert result.stdout.strip() == b"hello"
+
+
+def test_run_subprocess_raises_on_failure():
+    """Test run_subprocess raises CalledProcessError with stderr on non-zero exit."""
+    cmd = [sys.executable, "-c", "import sys; sys.stderr.write('boom'); sys.exit(3)"]
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        asyncio.run(run_subprocess(cmd))
+    assert exc_info.value.returncode == 3
+    assert exc_info.value.stderr == b"boom"
+
+
+def test_run_subprocess_kills_child_on_cancel():
+    """Test cancelling the awaiting task does not leave the child running."""
+    async def scenario():
+        task = asyncio.create_task(run_subprocess([sys.executable, "-c", "import time; time.sleep(30)"]))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        start = time.perf_counter()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return time.perf_counter() - start
+
+    assert asyncio.run(scenario()) < 5
+
+
+def test_gather_or_cancel_cancels_siblings_on_failure():
+    """Test gather_or_cancel cancels pending siblings when one awaitable fails."""
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(gather_or_cancel([slow(), failing()]))
+    assert cancelled == [True]
+
+
+def test_gather_or_cancel_keeps_input_order():
+    """Test gather_or_cancel returns results in input order."""
+    async def value(v, delay):
+        await asyncio.sleep(delay)
+        return v
+
+    assert asyncio.run(gather_or_cancel([value(1, 0.03), value(2, 0.0), value(3, 0.01)])) == [1, 2, 3]
+
+
+def test_run_io_runs_off_the_event_loop_thread():
+    """Test run_io executes the callable on a worker thread."""
+    async def scenario():
+        return await run_io(threading.get_ident)
+
+    assert asyncio.run(scenario()) != threading.get_ident()
+
+
+def test_run_cpu_returns_result():
+    """Test run_cpu returns the callable's result from the process pool."""
+    assert asyncio.run(run_cpu(pow, 2, 10)) == 1024
+
+
+def test_run_sync_reuses_one_event_loop():
+    """Test run_sync returns results and raises errors on a loop shared by every call."""
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    async def failing():
+        raise ValueError("boom")
+
+    assert run_sync(current_loop()) is run_sync(current_loop())
+    with pytest.raises(ValueError, match="boom"):
+        run_sync(failing())
+
+
+@patch("app.services.pipeline.format_transcript_cached_async")
+@patch("app.services.transcriber._transcribe_file_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_health_stays_responsive_during_slow_pipeline(
+    mock_preprocess, mock_transcribe, mock_format, tmp_path, monkeypatch
+):
+    """Test /health answers quickly while a slow transcription is in flight."""
+    from app.main import app
+
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setenv("TRANSCRIPT_CACHE_ENABLED", "false")
+    monkeypatch.setenv("TRANSCRIPT_STORE_ENABLED", "false")
+    mock_preprocess.return_value = PreparedAudio(Path("prepared.mp3"), "abc123")
+    async def slow_transcribe(*args, **kwargs):
+        await asyncio.sleep(1.0)
+        return "Raw text", "mistral", "voxtral-mini-latest"
+
+    mock_transcribe.side_effect = slow_transcribe
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.create_task(
+                client.post(
+                    "/transcribe?format_output=false",
+                    files={"files": ("a.mp3", b"fake audio data", "audio/mpeg")},
+                )
+            )
+            await asyncio.sleep(0.2)  # let the pipeline reach the slow provider call
+
+            start = time.perf_counter()
+            health = await client.get("/health")
+            health_elapsed = time.perf_counter() - start
+
+            assert not slow.done()
+            response = await slow
+            return health, health_elapsed, response
+
+    health, health_elapsed, response = asyncio.run(scenario())
+    assert health.status_code == 200
+    assert health_elapsed < 0.5
+    assert response.status_code == 200
+    assert response.json()["text"] == "Raw text"
@@ -1,11 +1,27 @@
+import asyncio
+import io
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
+import httpx
 import pytest
 from docx import Document
 
-from app.services.exporter import export_md_to_docx
+from app.services.exporter import (
+    HEADING,
+    LIST_ITEM,
+    PARAGRAPH,
+    Block,
+    Span,
+    UnknownLetterheadError,
+    export_md_to_docx,
+    export_md_to_docx_bytes,
+    get_base_template,
+    load_letterheads,
+    parse_inline,
+    parse_markdown,
+)
 
 
 def test_export_md_to_docx_success():
@@ -112,3 +128,137 @@ def test_export_md_to_docx_error_propagation():
         with pytest.raises(PermissionError, match="Permission denied"):
             export_md_to_docx(md_text, "/some/path/output.docx")
 
+
+
+
+def test_parse_markdown_blocks():
+    """Test headings, list blocks and paragraphs are tokenized in order."""
+    blocks = parse_markdown("# Title\n## Section\nFirst line\nsecond line\n\n- One\n2. Paid 3. Then\n\n- Item\nnot an item")
+
+    assert [(b.kind, b.level) for b in blocks] == [
+        (HEADING, 1), (HEADING, 2), (PARAGRAPH, 0), (LIST_ITEM, 0), (LIST_ITEM, 0), (PARAGRAPH, 0)
+    ]
+    assert blocks[2].spans == [Span("First line\nsecond line")]
+    assert blocks[4].spans == [Span("Paid 3. Then")]
+    assert blocks[5].spans == [Span("- Item\nnot an item")]
+
+
+def test_parse_inline_spans_and_coalescing():
+    """Test bold, italic inside bold, and merging of adjacent spans with the same formatting."""
+    assert parse_inline("a **bold *word* end** and _it_ x*y*") == [
+        Span("a "),
+        Span("bold ", bold=True),
+        Span("word", bold=True, italic=True),
+        Span(" end", bold=True),
+        Span(" and "),
+        Span("it", italic=True),
+        Span(" x*y*"),
+    ]
+    assert parse_inline("**one****two**") == [Span("onetwo", bold=True)]
+
+
+def test_parse_inline_italic_right_after_bold():
+    """Test a bold run's closing delimiter does not stop the italic run that follows it."""
+    assert parse_inline("**bold***italic*") == [Span("bold", bold=True), Span("italic", italic=True)]
+    assert parse_inline("__bold___italic_ x") == [
+        Span("bold", bold=True), Span("italic", italic=True), Span(" x")
+    ]
+
+
+def test_parse_markdown_keeps_paragraph_whitespace():
+    """Test lines inside a paragraph keep their whitespace; only the block's ends are trimmed."""
+    blocks = parse_markdown("  Total:\n 1. \n\tend  ")
+
+    assert blocks == [Block(PARAGRAPH, [Span("Total:\n 1. \n\tend")])]
+
+
+def test_parse_markdown_empty_heading_takes_next_line():
+    """Test a heading marker without text heads the next line, and is plain text at the end of a block."""
+    blocks = parse_markdown("## \nContent\nmore\n\ntext\n#")
+
+    assert blocks == [
+        Block(HEADING, [Span("Content")], level=2),
+        Block(PARAGRAPH, [Span("more")]),
+        Block(PARAGRAPH, [Span("text\n#")]),
+    ]
+
+
+def test_export_md_to_docx_sets_language_once():
+    """Test runs carry no language of their own; the document default holds it."""
+    with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as tmp_file:
+        output_path = tmp_file.name
+
+    try:
+        export_md_to_docx("# Titre\n\nDu **texte** en *français*.", output_path, language_code="fr-FR")
+
+        doc = Document(output_path)
+        runs = [run for para in doc.paragraphs for run in para.runs]
+        assert [run.text for run in runs] == ["Titre", "Du ", "texte", " en ", "français", "."]
+        assert "w:lang" not in doc.element.body.xml
+        assert 'w:val="fr-FR"' in doc.styles.element.xml
+        assert doc.paragraphs[0].style.name == "Heading 1"
+    finally:
+        Path(output_path).unlink(missing_ok=True)
+
+
+def test_export_md_to_docx_writes_to_stream():
+    """Test export writes to a binary stream and the bytes helper returns the same document."""
+    buffer = io.BytesIO()
+
+    assert export_md_to_docx("# Title\n\nSome text.", buffer) is buffer
+
+    doc = Document(io.BytesIO(buffer.getvalue()))
+    assert [p.text for p in doc.paragraphs] == ["Title", "Some text."]
+    assert Document(io.BytesIO(export_md_to_docx_bytes("Some text."))).paragraphs[0].text == "Some text."
+
+
+@patch.dict("os.environ", {"CPU_PROCESS_POOL_SIZE": "0"})
+def test_export_endpoint_returns_docx_without_temp_files(tmp_path):
+    """Test POST /export answers with the document bytes and leaves nothing in the temp directory."""
+    from app.main import app
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/export", json={"content": "# Title\n\nSome **text**."})
+
+    with patch("tempfile.tempdir", str(tmp_path)):
+        response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(response.content))
+    assert response.headers["content-disposition"] == 'attachment; filename="transcript.docx"'
+    assert Document(io.BytesIO(response.content)).paragraphs[0].text == "Title"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_base_template_is_built_once_per_language():
+    """Test exports reuse the serialized base template of their language."""
+    get_base_template.cache_clear()
+
+    export_md_to_docx_bytes("One.", "fr-FR")
+    export_md_to_docx_bytes("Two.", "fr-FR")
+    data = export_md_to_docx_bytes("Three.", "de-DE")
+
+    assert get_base_template.cache_info().misses == 2
+    assert 'w:val="de-DE"' in Document(io.BytesIO(data)).styles.element.xml
+
+
+def test_export_md_to_docx_with_letterhead(tmp_path):
+    """Test a letterhead from LETTERHEAD_DIR is the starting document and unknown names are rejected."""
+    letterhead = Document()
+    letterhead.sections[0].header.paragraphs[0].text = "Étude Dupont"
+    letterhead.save(str(tmp_path / "dupont.docx"))
+    (tmp_path / "broken.docx").write_bytes(b"not a docx")
+
+    try:
+        assert list(load_letterheads(str(tmp_path))) == ["dupont"]
+
+        doc = Document(io.BytesIO(export_md_to_docx_bytes("# Constat", letterhead="dupont")))
+        assert doc.sections[0].header.paragraphs[0].text == "Étude Dupont"
+        assert doc.paragraphs[-1].text == "Constat"
+
+        with pytest.raises(UnknownLetterheadError):
+            export_md_to_docx_bytes("# Constat", letterhead="other")
+    finally:
+        load_letterheads("")
@@ -1,29 +1,42 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
+from app.services.cache import LRUCache
 from app.services.formatter import (
+    FormatStream,
+    SegmentFormatter,
+    format_cache_key,
     format_transcript,
+    format_transcript_async,
+    format_transcript_cached_async,
     format_transcript_mistral,
+    format_transcript_mistral_stream,
     format_transcript_openai,
 )
+from app.utils.limiter import get_limiter, reset_limiters
+from app.utils.resilience import get_latency_tracker, reset_state
 
 
-@patch("app.services.formatter.get_openai_client")
+def _chat_response(content):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    return response
+
+
+@patch("app.services.formatter.get_async_openai_client")
 def test_format_transcript_openai_success(mock_get_client):
     """Test format_transcript_openai successfully formats text."""
     mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_chat_response("Formatted text"))
     mock_get_client.return_value = mock_client
-    
-    mock_response = MagicMock()
-    mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message = MagicMock()
-    mock_response.choices[0].message.content = "Formatted text"
-    
-    mock_client.chat.completions.create.return_value = mock_response
-    
+
     result = format_transcript_openai("Raw text")
-    
+
     assert result == "Formatted text"
     mock_client.chat.completions.create.assert_called_once()
     call_args = mock_client.chat.completions.create.call_args
@@ -32,51 +45,39 @@ def test_format_transcript_openai_success(mock_get_client):
     assert len(call_args.kwargs["messages"]) == 2
 
 
-@patch("app.services.formatter.get_openai_client")
+@patch("app.services.formatter.get_async_openai_client")
 def test_format_transcript_openai_empty_text(mock_get_client):
     """Test format_transcript_openai returns empty string for empty input."""
     result = format_transcript_openai("")
     assert result == ""
-    
+
     result = format_transcript_openai("   ")
     assert result == ""
-    
+
     mock_get_client.assert_not_called()
 
 
-@patch("app.services.formatter.get_openai_client")
+@patch("app.services.formatter.get_async_openai_client")
 def test_format_transcript_openai_custom_model_and_temperature(mock_get_client):
     """Test format_transcript_openai uses custom model and temperature."""
     mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_chat_response("Formatted"))
     mock_get_client.return_value = mock_client
-    
-    mock_response = MagicMock()
-    mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message = MagicMock()
-    mock_response.choices[0].message.content = "Formatted"
-    
-    mock_client.chat.completions.create.return_value = mock_response
-    
+
     format_transcript_openai("Text", model="gpt-4", temperature=0.5)
-    
+
     call_args = mock_client.chat.completions.create.call_args
     assert call_args.kwargs["model"] == "gpt-4"
     assert call_args.kwargs["temperature"] == 0.5
 
 
-@patch("app.services.formatter.get_openai_client")
+@patch("app.services.formatter.get_async_openai_client")
 def test_format_transcript_openai_no_content(mock_get_client):
     """Test format_transcript_openai returns empty string when response has no content."""
     mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_chat_response(None))
     mock_get_client.return_value = mock_client
-    
-    mock_response = MagicMock()
-    mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message = MagicMock()
-    mock_response.choices[0].message.content = None
-    
-    mock_client.chat.completions.create.return_value = mock_response
-    
+
     result = format_transcript_openai("Text")
     assert result == ""
 
@@ -85,20 +86,14 @@ def test_format_transcript_openai_no_content(mock_get_client):
 def test_format_transcript_mistral_success(mock_get_client):
     """Test format_transcript_mistral successfully formats text."""
     mock_client = MagicMock()
+    mock_client.chat.complete_async = AsyncMock(return_value=_chat_response("Formatted text"))
     mock_get_client.return_value = mock_client
-    
-    mock_response = MagicMock()
-    mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message = MagicMock()
-    mock_response.choices[0].message.content = "Formatted text"
-    
-    mock_client.chat.complete.return_value = mock_response
-    
+
     result = format_transcript_mistral("Raw text")
-    
+
     assert result == "Formatted text"
-    mock_client.chat.complete.assert_called_once()
-    call_args = mock_client.chat.complete.call_args
+    mock_client.chat.complete_async.assert_called_once()
+    call_args = mock_client.chat.complete_async.call_args
     assert call_args.kwargs["model"] == "mistral-medium-latest"
     assert call_args.kwargs["temperature"] == 0.2
 
@@ -108,10 +103,10 @@ def test_format_transcript_mistral_empty_text(mock_get_client):
     """Test format_transcript_mistral returns empty string for empty input."""
     result = format_transcript_mistral("")
     assert result == ""
-    
+
     result = format_transcript_mistral("   ")
     assert result == ""
-    
+
     mock_get_client.assert_not_called()
 
 
@@ -119,65 +114,409 @@ def test_format_transcript_mistral_empty_text(mock_get_client):
 def test_format_transcript_mistral_custom_temperature(mock_get_client):
     """Test format_transcript_mistral uses custom temperature."""
     mock_client = MagicMock()
+    mock_client.chat.complete_async = AsyncMock(return_value=_chat_response("Formatted"))
     mock_get_client.return_value = mock_client
-    
-    mock_response = MagicMock()
-    mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message = MagicMock()
-    mock_response.choices[0].message.content = "Formatted"
-    
-    mock_client.chat.complete.return_value = mock_response
-    
+
     format_transcript_mistral("Text", temperature=0.7)
-    
-    call_args = mock_client.chat.complete.call_args
+
+    call_args = mock_client.chat.complete_async.call_args
     assert call_args.kwargs["temperature"] == 0.7
 
 
-@patch("app.services.formatter.PROVIDER", "openai")
-@patch("app.services.formatter.format_transcript_openai")
+@patch.dict("os.environ", {"PROVIDER": "openai"})
+@patch("app.services.formatter.format_transcript_openai_async")
 def test_format_transcript_openai_provider(mock_format_openai):
-    """Test format_transcript calls format_transcript_openai when provider is openai."""
+    """Test format_transcript runs the OpenAI engine when provider is openai."""
     mock_format_openai.return_value = "Formatted"
-    
-    # Need to reload the module or patch the function directly
-    from app.services import formatter
-    result = formatter.format_transcript("Raw text")
-    
+
+    result = format_transcript("Raw text")
+
     assert result == "Formatted"
-    mock_format_openai.assert_called_once_with("Raw text", temperature=0.2)
+    mock_format_openai.assert_called_once_with("Raw text", model="gpt-4o-mini", temperature=0.2)
 
 
-@patch("app.services.formatter.PROVIDER", "mistral")
-@patch("app.services.formatter.format_transcript_mistral")
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.formatter.format_transcript_mistral_async")
 def test_format_transcript_mistral_provider(mock_format_mistral):
-    """Test format_transcript calls format_transcript_mistral when provider is mistral."""
+    """Test format_transcript runs the Mistral engine when provider is mistral."""
     mock_format_mistral.return_value = "Formatted"
-    
-    from app.services import formatter
-    result = formatter.format_transcript("Raw text")
-    
+
+    result = format_transcript("Raw text")
+
     assert result == "Formatted"
-    mock_format_mistral.assert_called_once_with("Raw text", temperature=0.2)
+    mock_format_mistral.assert_called_once_with("Raw text", model="mistral-medium-latest", temperature=0.2)
 
 
-@patch("app.services.formatter.PROVIDER", "unknown")
+@patch.dict("os.environ", {"PROVIDER": "unknown"})
 def test_format_transcript_unknown_provider():
     """Test format_transcript raises ValueError for unknown provider."""
-    from app.services import formatter
-    
     with pytest.raises(ValueError, match="Unknown provider"):
-        formatter.format_transcript("Raw text")
+        format_transcript("Raw text")
 
 
-@patch("app.services.formatter.PROVIDER", "openai")
-@patch("app.services.formatter.format_transcript_openai")
-def test_format_transcript_custom_temperature(mock_format_openai):
-    """Test format_transcript passes custom temperature to provider function."""
-    mock_format_openai.return_value = "Formatted"
-    
-    from app.services import formatter
-    formatter.format_transcript("Raw text", temperature=0.5)
-    
-    mock_format_openai.assert_called_once_with("Raw text", temperature=0.5)
+@patch("app.services.formatter.format_transcript_async")
+def test_format_transcript_custom_temperature(mock_format_async):
+    """Test format_transcript passes custom temperature to the async path."""
+    mock_format_async.return_value = "Formatted"
+
+    assert format_transcript("Raw text", temperature=0.5) == "Formatted"
+
+    mock_format_async.assert_called_once_with("Raw text", temperature=0.5)
+
+
+def test_format_cache_key_changes_with_system_prompt():
+    """Test editing the system prompt changes the cache key."""
+    key = format_cache_key("Raw text", provider="openai", model="gpt-4o-mini", temperature=0.2)
+    with patch("app.services.formatter.SYSTEM_INSTRUCTION", "A different prompt"):
+        other = format_cache_key("Raw text", provider="openai", model="gpt-4o-mini", temperature=0.2)
+    assert key != other
+
+
+@patch.dict("os.environ", {"PROVIDER": "openai"})
+@patch("app.services.formatter.get_async_openai_client")
+def test_format_transcript_async_openai(mock_get_client):
+    """Test format_transcript_async awaits the async OpenAI client."""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(return_value=_chat_response("Formatted text"))
+    mock_get_client.return_value = mock_client
+
+    assert asyncio.run(format_transcript_async("Raw text")) == "Formatted text"
+    assert mock_client.chat.completions.create.call_args.kwargs["model"] == "gpt-4o-mini"
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.formatter.get_mistral_client")
+def test_format_transcript_async_mistral(mock_get_client):
+    """Test format_transcript_async uses Mistral complete_async and skips empty input."""
+    mock_client = MagicMock()
+    mock_client.chat.complete_async = AsyncMock(return_value=_chat_response("Formatted text"))
+    mock_get_client.return_value = mock_client
+
+    assert asyncio.run(format_transcript_async("Raw text", temperature=0.5)) == "Formatted text"
+    assert mock_client.chat.complete_async.call_args.kwargs["temperature"] == 0.5
+    assert asyncio.run(format_transcript_async("   ")) == ""
+    mock_client.chat.complete_async.assert_called_once()
+
+
+def _answering(text):
+    async def format_async(raw_text, *, engine, model, **kwargs):
+        return text, engine, model
+    return format_async
+
+
+@patch("app.services.formatter._format_async")
+@patch("app.services.formatter.get_format_cache")
+def test_format_transcript_cached_async_hits_on_identical_input(mock_get_cache, mock_format):
+    """Test the async cached formatter calls the provider once per identical input."""
+    mock_get_cache.return_value = LRUCache(10)
+    mock_format.side_effect = _answering("Formatted")
+
+    first = asyncio.run(format_transcript_cached_async("Raw text"))
+    second = asyncio.run(format_transcript_cached_async("Raw text"))
+
+    assert first == second == "Formatted"
+    mock_format.assert_called_once()
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.formatter._format_async")
+@patch("app.services.formatter.get_format_cache")
+def test_format_transcript_cached_async_keys_failover_on_answering_engine(mock_get_cache, mock_format):
+    """Test a failover result is cached under the engine and model that answered."""
+    mock_get_cache.return_value = LRUCache(10)
+    mock_format.return_value = ("From OpenAI", "openai", "gpt-4o-mini")
+
+    assert asyncio.run(format_transcript_cached_async("Raw text")) == "From OpenAI"
+    assert asyncio.run(format_transcript_cached_async("Raw text", engine="openai")) == "From OpenAI"
+    mock_format.assert_called_once()
+
+    asyncio.run(format_transcript_cached_async("Raw text"))
+    assert mock_format.call_count == 2
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.formatter.format_transcript_mistral_async")
+@patch("app.services.formatter.format_transcript_openai_async")
+@patch("app.services.formatter.get_format_cache")
+def test_format_transcript_cached_async_per_request_engine(mock_get_cache, mock_openai, mock_mistral):
+    """Test the requested engine and model are used and keyed separately in the cache."""
+    mock_get_cache.return_value = LRUCache(10)
+    mock_openai.return_value = "From OpenAI"
+
+    for model in ("gpt-4o", "gpt-4o", "gpt-4.1"):
+        result = asyncio.run(format_transcript_cached_async("Raw text", engine="openai", model=model))
+
+    assert result == "From OpenAI"
+    mock_mistral.assert_not_called()
+    assert mock_openai.call_count == 2
+    assert mock_openai.call_args.kwargs["model"] == "gpt-4.1"
+
+
+def _fake_stream(*deltas):
+    async def stream(raw_text, *, model, temperature):
+        for delta in deltas:
+            await asyncio.sleep(0)
+            yield delta
+    return stream
+
+
+@patch.dict("os.environ", {"PROVIDER": "openai"})
+@patch("app.services.formatter.format_transcript_openai_stream")
+@patch("app.services.formatter.get_format_cache")
+def test_format_stream_yields_deltas_then_caches_full_text(mock_get_cache, mock_stream):
+    """Test streamed deltas arrive in order, report TTFT and the full text is cached."""
+    mock_get_cache.return_value = LRUCache(10)
+    mock_stream.side_effect = _fake_stream("Formal ", "observation.")
+
+    async def read(stream):
+        return [delta async for delta in stream.deltas()]
+
+    stream = FormatStream("Raw text")
+    assert asyncio.run(read(stream)) == ["Formal ", "observation."]
+    assert stream.text == "Formal observation."
+    assert stream.cached is False
+    assert stream.time_to_first_token is not None
+
+    again = FormatStream("Raw text")
+    assert asyncio.run(read(again)) == ["Formal observation."]
+    assert again.cached is True
+    mock_stream.assert_called_once_with("Raw text", model="gpt-4o-mini", temperature=0.2)
+    assert asyncio.run(format_transcript_cached_async("Raw text", engine="openai")) == "Formal observation."
+
+
+@patch.dict("os.environ", {"PROVIDER": "openai", "PROVIDER_CONCURRENCY_INITIAL": "4"})
+@patch("app.services.formatter.format_transcript_openai_stream")
+@patch("app.services.formatter.get_format_cache", return_value=None)
+def test_format_stream_holds_limiter_slot_until_drained(_, mock_stream):
+    """Test a stream keeps its limiter slot while it is read and reports an overload at the end."""
+    class Overloaded(Exception):
+        status_code = 429
+
+    async def deltas(fail):
+        yield "Formal "
+        if fail:
+            raise Overloaded()
+        yield "observation."
+
+    mock_stream.side_effect = [deltas(fail=False), deltas(fail=True)]
+
+    async def read():
+        limiter = get_limiter("openai")
+        in_flight = []
+        async for _ in FormatStream("Raw text").deltas():
+            in_flight.append(limiter.window.in_flight)
+        in_flight.append(limiter.window.in_flight)
+        with pytest.raises(Overloaded):
+            async for _ in FormatStream("Raw text").deltas():
+                pass
+        return in_flight, limiter
+
+    reset_limiters()
+    try:
+        in_flight, limiter = asyncio.run(read())
+    finally:
+        reset_limiters()
+
+    assert in_flight == [1, 1, 0]
+    assert limiter.window.in_flight == 0
+    assert limiter.stats.overloads == 1
+    assert limiter.window.limit < 4
+
+
+@patch.dict("os.environ", {"PROVIDER": "openai", "HEDGE_PERCENTILE": "95", "HEDGE_MIN_SAMPLES": "5"})
+@patch("app.services.formatter.format_transcript_openai_stream")
+@patch("app.services.formatter.get_format_cache", return_value=None)
+def test_format_stream_closes_hedged_loser(_, mock_stream):
+    """Test a stream that lost the hedge is closed once the winner is picked."""
+    reset_state()
+    tracker = get_latency_tracker("format", "openai")
+    for _ in range(5):
+        tracker.record(0.05)
+    closed = []
+
+    async def delayed(name, delay):
+        try:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # The first delta arrived just as the stream was cancelled
+                pass
+            yield name
+            yield " observation."
+        finally:
+            closed.append(name)
+
+    mock_stream.side_effect = [delayed("Slow", 2.0), delayed("Fast", 0.01)]
+
+    async def read():
+        stream = FormatStream("Raw text")
+        deltas = [delta async for delta in stream.deltas()]
+        return deltas, list(closed)
+
+    try:
+        deltas, closed_after_read = asyncio.run(read())
+    finally:
+        reset_state()
+
+    assert deltas == ["Fast", " observation."]
+    assert sorted(closed_after_read) == ["Fast", "Slow"]
+
+
+@patch("app.services.formatter.get_mistral_client")
+def test_format_transcript_mistral_stream_reads_events(mock_get_client):
+    """Test Mistral stream events are turned into text deltas and the response is closed."""
+    def event(content):
+        choice = MagicMock()
+        choice.delta.content = content
+        return MagicMock(data=MagicMock(choices=[choice]))
+
+    class FakeEventStream:
+        closed = False
+
+        def __init__(self, events):
+            self._events = iter(events)
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            FakeEventStream.closed = True
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self._events)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    mock_client = MagicMock()
+    mock_client.chat.stream_async = AsyncMock(return_value=FakeEventStream([event("Bon"), event(None), event("jour")]))
+    mock_get_client.return_value = mock_client
+
+    async def read():
+        return [delta async for delta in format_transcript_mistral_stream("Raw text")]
+
+    assert asyncio.run(read()) == ["Bon", "jour"]
+    assert FakeEventStream.closed
+
+
+@patch.dict("os.environ", {"PROVIDER": "openai"})
+@patch("app.services.formatter.format_transcript_openai_stream")
+@patch("app.services.formatter.get_format_cache")
+def test_format_stream_endpoint_sends_server_sent_events(mock_get_cache, mock_stream):
+    """Test POST /format/stream forwards deltas as SSE and ends with the full text."""
+    from app.main import app
+
+    mock_get_cache.return_value = None
+    mock_stream.side_effect = _fake_stream("Hello", " world")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/format/stream", json={"text": "Raw text"})
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    assert [name for name, _ in events] == ["start", "delta", "delta", "done"]
+    assert events[0][1] == {"engine": "openai", "model": "gpt-4o-mini"}
+    assert events[-1][1]["formattedText"] == "Hello world"
+    assert events[-1][1]["timeToFirstToken"] is not None
+
+
+def test_format_stream_endpoint_rejects_unknown_model():
+    """Test an invalid model is refused with 400 before streaming starts."""
+    from app.main import app
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/format/stream", json={"text": "Raw", "engine": "openai", "model": "nope"})
+
+    assert asyncio.run(scenario()).status_code == 400
+
+
+@patch.dict("os.environ", {"FORMAT_CHUNK_MAX_TOKENS": "12", "FORMAT_CHUNK_CONCURRENCY": "2"})
+@patch("app.services.formatter._format_async")
+@patch("app.services.formatter.get_format_cache")
+def test_format_transcript_cached_async_formats_long_text_in_chunks(mock_get_cache, mock_format):
+    """Test long text is formatted as concurrent chunks, merged and cached as a whole."""
+    cache = LRUCache(10)
+    mock_get_cache.return_value = cache
+    in_flight = []
+    peak = []
+
+    async def fake_format(text, **kwargs):
+        in_flight.append(text)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(text)
+        part = text.rsplit("Part to format:\n", 1)[1]
+        return f"# Title\n\n{part.upper()}", kwargs["engine"], kwargs["model"]
+
+    mock_format.side_effect = fake_format
+    raw_text = "\n\n".join(f"Paragraph {n} has exactly six words." for n in range(4))
+
+    result = asyncio.run(format_transcript_cached_async(raw_text, engine="local"))
+
+    assert mock_format.call_count == 4
+    assert max(peak) == 2
+    assert result.count("# Title") == 1
+    assert result.index("PARAGRAPH 0") < result.index("PARAGRAPH 3")
+    assert asyncio.run(format_transcript_cached_async(raw_text, engine="local")) == result
+    assert mock_format.call_count == 4
+
+
+@patch.dict("os.environ", {"FORMAT_CHUNK_MAX_TOKENS": "12"})
+@patch("app.services.formatter.format_transcript_local_stream")
+@patch("app.services.formatter._format_async")
+@patch("app.services.formatter.get_format_cache")
+def test_format_stream_formats_long_text_in_chunks(mock_get_cache, mock_format, mock_stream):
+    """Test long text is streamed chunk by chunk and cached like the chunked whole-text result."""
+    mock_get_cache.return_value = LRUCache(10)
+
+    async def fake_format(text, **kwargs):
+        part = text.rsplit("Part to format:\n", 1)[1]
+        return f"# Title\n\n{part.upper()}", kwargs["engine"], kwargs["model"]
+
+    mock_format.side_effect = fake_format
+    raw_text = "\n\n".join(f"Paragraph {n} has exactly six words." for n in range(4))
+
+    async def read(stream):
+        return [delta async for delta in stream.deltas()]
+
+    stream = FormatStream(raw_text, engine="local")
+    deltas = asyncio.run(read(stream))
+
+    assert len(deltas) == 4
+    assert "".join(deltas) == stream.text
+    assert stream.text.count("# Title") == 1
+    mock_stream.assert_not_called()
+    assert asyncio.run(format_transcript_cached_async(raw_text, engine="local")) == stream.text
+    assert mock_format.call_count == 4
+
+
+@patch("app.services.formatter._format_async")
+@patch("app.services.formatter.get_format_cache")
+def test_segment_formatter_formats_short_transcript_in_one_call(mock_get_cache, mock_format):
+    """Test segments that never outgrow one chunk are formatted whole and cached under the full text."""
+    mock_get_cache.return_value = LRUCache(10)
+    mock_format.side_effect = _answering("Formatted")
+
+    async def scenario():
+        segment_formatter = SegmentFormatter(engine="local")
+        await segment_formatter.add("First part.")
+        await segment_formatter.add("  ")
+        await segment_formatter.add("Second part.")
+        return await segment_formatter.finish()
 
+    assert asyncio.run(scenario()) == "Formatted"
+    assert mock_format.call_args.args == ("First part. Second part.",)
+    assert asyncio.run(format_transcript_cached_async("First part. Second part.", engine="local")) == "Formatted"
+    mock_format.assert_called_once()
@@ -0,0 +1,166 @@
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services import store
+from app.services.jobs import JobManager, JobQueueFullError, JobStatus
+from app.services.pipeline import PipelineResult
+
+
+@pytest.fixture(autouse=True)
+def transcript_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIPT_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(store, "_transcript_store", None)
+    yield
+    if store._transcript_store is not None:
+        store._transcript_store.close()
+
+
+async def _wait_finished(manager, job_id, timeout=5.0):
+    async def poll():
+        while not manager.get(job_id).is_finished:
+            await asyncio.sleep(0.01)
+        return manager.get(job_id)
+    return await asyncio.wait_for(poll(), timeout)
+
+
+@patch("app.services.jobs.run_pipeline")
+def test_job_completes_and_cleans_up(mock_run_pipeline):
+    """Test a submitted job reports its result and removes its upload dir."""
+    async def fake_pipeline(
+        src_paths, *, language, format_output, chunked, use_cache, trim_silence, engine, model,
+        format_engine, format_model, timings, on_stage, src_sha256s,
+    ):
+        on_stage("transcribe")
+        timings["transcribe"] = 0.1
+        return PipelineResult(text="Raw", formatted="Formatted", timings=timings)
+
+    mock_run_pipeline.side_effect = fake_pipeline
+    request_dir = Path(tempfile.mkdtemp())
+
+    async def scenario():
+        manager = JobManager(max_workers=1, max_queued=10, retention=10)
+        job = manager.submit([request_dir / "a.mp3"], request_dir, filenames=["a.mp3"])
+        assert job.status == JobStatus.QUEUED
+        return await _wait_finished(manager, job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == JobStatus.COMPLETED
+    transcript_id = job.result.pop("id")
+    assert store.get_transcript_store().read_formatted(transcript_id) == "Formatted"
+    assert job.result == {
+        "text": "Raw",
+        "formattedText": "Formatted",
+        "chunks": [],
+        "audio": None,
+        "silenceRemovedSeconds": 0.0,
+    }
+    assert job.to_dict()["timings"] == {"transcribe": 0.1}
+    assert not request_dir.exists()
+
+
+@patch("app.services.jobs.run_pipeline")
+def test_job_failure_is_reported(mock_run_pipeline):
+    """Test a failing pipeline marks the job failed with the error message."""
+    mock_run_pipeline.side_effect = RuntimeError("ffmpeg exploded")
+
+    async def scenario():
+        manager = JobManager(max_workers=1, max_queued=10, retention=10)
+        job = manager.submit([], Path(tempfile.mkdtemp()), filenames=[])
+        return await _wait_finished(manager, job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == JobStatus.FAILED
+    assert job.error == "ffmpeg exploded"
+
+
+@patch("app.services.jobs.run_pipeline")
+def test_concurrent_pipelines_are_capped(mock_run_pipeline):
+    """Test no more than max_workers pipelines run at the same time."""
+    running = 0
+    peak = 0
+
+    async def fake_pipeline(*args, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return PipelineResult(text="", formatted=None)
+
+    mock_run_pipeline.side_effect = fake_pipeline
+
+    async def scenario():
+        manager = JobManager(max_workers=2, max_queued=10, retention=10)
+        jobs = [manager.submit([], Path(tempfile.mkdtemp()), filenames=[]) for _ in range(6)]
+        for job in jobs:
+            await _wait_finished(manager, job.id)
+
+    asyncio.run(scenario())
+    assert peak == 2
+
+
+@patch("app.services.jobs.run_pipeline")
+def test_queue_full_is_rejected(mock_run_pipeline):
+    """Test submissions are refused once max_queued jobs are waiting."""
+    async def scenario():
+        release = asyncio.Event()
+
+        async def fake_pipeline(*args, **kwargs):
+            await release.wait()
+            return PipelineResult(text="", formatted=None)
+
+        mock_run_pipeline.side_effect = fake_pipeline
+        manager = JobManager(max_workers=1, max_queued=1, retention=10)
+        manager.submit([], Path(tempfile.mkdtemp()), filenames=[])
+        await asyncio.sleep(0.01)  # first job takes the only worker slot
+        manager.submit([], Path(tempfile.mkdtemp()), filenames=[])
+        with pytest.raises(JobQueueFullError):
+            manager.submit([], Path(tempfile.mkdtemp()), filenames=[])
+        release.set()
+        await manager.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_get_unknown_job_returns_none():
+    """Test get returns None for an unknown job id."""
+    manager = JobManager(max_workers=1, max_queued=1, retention=1)
+    assert manager.get("missing") is None
+
+
+@patch("app.routers.transcribe.run_pipeline")
+def test_sync_transcribe_waits_for_a_pipeline_slot(mock_run_pipeline):
+    """Test POST /transcribe holds one of the job manager's pipeline slots."""
+    from app.main import app
+
+    started = []
+
+    async def fake_pipeline(*args, **kwargs):
+        started.append(True)
+        return PipelineResult(text="Raw", formatted=None)
+
+    mock_run_pipeline.side_effect = fake_pipeline
+    manager = JobManager(max_workers=1, max_queued=10, retention=10)
+
+    async def scenario():
+        slots = manager.pipeline_slots()
+        await slots.acquire()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            request = asyncio.ensure_future(
+                client.post("/transcribe", files={"files": ("a.mp3", b"audio", "audio/mpeg")})
+            )
+            await asyncio.sleep(0.1)
+            assert started == []
+            slots.release()
+            return await request
+
+    with patch("app.routers.transcribe.job_manager", manager):
+        response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert started == [True]
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.limiter import AIMDWindow, ProviderLimiter, TokenBucket, limiter_stats, reset_limiters, run_limited
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters():
+    reset_limiters()
+    yield
+    reset_limiters()
+
+
+def _limiter(**overrides):
+    options = dict(
+        requests_per_minute=0,
+        audio_seconds_per_minute=0,
+        initial_concurrency=4,
+        min_concurrency=1,
+        max_concurrency=8,
+    )
+    options.update(overrides)
+    return ProviderLimiter("mistral", **options)
+
+
+def test_token_bucket_waits_once_empty():
+    """Test a drained bucket makes the next caller wait for the refill."""
+    bucket = TokenBucket(600)  # 10 tokens per second
+    assert bucket.reserve(600) == 0.0
+    assert bucket.reserve(1) == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve(1) == pytest.approx(0.2, abs=0.02)
+
+
+def test_window_caps_concurrency():
+    """Test no more calls than the window allows run at the same time."""
+    limiter = _limiter(initial_concurrency=2, max_concurrency=2)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(limiter.run(call) for _ in range(6)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    assert peak == 2
+    assert limiter.to_dict()["waits"] == 4
+
+
+def test_window_halves_on_overload_and_grows_on_success():
+    """Test a 429 halves the window and successes widen it again."""
+    limiter = _limiter(initial_concurrency=8, max_concurrency=16)
+
+    async def overloaded():
+        raise FakeStatusError(429)
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(FakeStatusError):
+        asyncio.run(limiter.run(overloaded))
+    assert limiter.window.limit == 4
+    assert limiter.to_dict()["overloads"] == 1
+
+    for _ in range(4):
+        asyncio.run(limiter.run(ok))
+    assert limiter.window.limit > 4.9
+
+
+def test_client_errors_do_not_shrink_window():
+    """Test non-overload errors leave the window unchanged."""
+    limiter = _limiter(initial_concurrency=8)
+
+    async def bad():
+        raise FakeStatusError(400)
+
+    with pytest.raises(FakeStatusError):
+        asyncio.run(limiter.run(bad))
+    assert limiter.window.limit == 8
+    assert limiter.window.in_flight == 0
+
+
+def test_window_respects_minimum():
+    """Test repeated overloads never shrink the window below its minimum."""
+    window = AIMDWindow(4, minimum=2, maximum=8)
+    window.DECREASE_COOLDOWN = 0
+    for _ in range(5):
+        window.on_overload()
+    assert window.limit == 2
+
+
+def test_run_limited_applies_rate_limit_and_reports_stats(monkeypatch):
+    """Test configured requests per minute delay calls and show up in limiter stats."""
+    monkeypatch.setenv("MISTRAL_REQUESTS_PER_MINUTE", "600")
+
+    async def call():
+        return "ok"
+
+    async def scenario():
+        for _ in range(600):
+            await run_limited("mistral", call)
+        start = time.perf_counter()
+        await run_limited("mistral", call)
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(scenario())
+
+    assert elapsed >= 0.05
+    stats = limiter_stats()["mistral"]
+    assert stats["calls"] == 601
+    assert stats["waits"] >= 1
+    assert stats["maxWaitSeconds"] > 0
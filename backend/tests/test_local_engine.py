@@ -0,0 +1,224 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.clients.registry import client_registry
+from app.services import formatter
+from app.services.formatter import FormatStream, format_transcript_async
+from app.services.transcriber import transcribe_audio_file_async
+from app.utils.limiter import reset_limiters
+from app.utils.resilience import reset_state
+
+
+class _StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible server recording the requests it receives."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append(self.path)
+        if self.path.endswith("completions") or self.path == "/tokenize":
+            self.server.bodies.append(json.loads(body))
+        if self.path == "/tokenize" and self.server.tokenize_payload is not None:
+            self._json(self.server.tokenize_payload, status=self.server.tokenize_status)
+        elif self.path == "/tokenize" and self.server.completions:
+            # A "chat template" whose tokens are the characters of the user message
+            text = json.loads(body)["messages"][-1]["content"]
+            self._json({"count": len(text), "max_model_len": 4096, "tokens": [ord(c) for c in text]})
+        elif self.path == "/v1/completions" and self.server.completions:
+            prompts = json.loads(body)["prompt"]
+            self.server.batches.append(len(prompts))
+            if self.server.batch_status != 200:
+                self._json({"error": {"message": "Bad request"}}, status=self.server.batch_status)
+                return
+            choices = [
+                {"index": i, "text": f"Formatted {''.join(map(chr, p))}", "finish_reason": "stop"}
+                for i, p in enumerate(prompts)
+            ]
+            self._json({"id": "cmpl", "object": "text_completion", "created": 0, "model": "m", "choices": choices})
+        elif self.path == "/v1/chat/completions" and json.loads(body).get("stream"):
+            text = json.loads(body)["messages"][-1]["content"]
+            self._stream(["Formatted", f" {text}"])
+        elif self.path == "/v1/chat/completions":
+            text = json.loads(body)["messages"][-1]["content"]
+            message = {"role": "assistant", "content": f"Formatted {text}"}
+            choice = {"index": 0, "message": message, "finish_reason": "stop"}
+            self._json({"id": "chat", "object": "chat.completion", "created": 0, "model": "m", "choices": [choice]})
+        elif self.path == "/v1/audio/transcriptions":
+            self.server.uploads.append(body)
+            self._json({"text": "Local transcript"})
+        else:
+            self._json({"error": {"message": "Not found"}}, status=404)
+
+    def _stream(self, deltas):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for delta in deltas:
+            chunk = {
+                "id": "chat", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def _json(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOpenAIHandler)
+    server.requests, server.batches, server.uploads, server.bodies = [], [], [], []
+    server.completions = True
+    server.batch_status = 200
+    server.tokenize_payload, server.tokenize_status = None, 200
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("LOCAL_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setenv("LOCAL_BATCH_WINDOW_MS", "50")
+    monkeypatch.setenv("OPENAI_API_KEY", "hosted-key")
+    monkeypatch.setenv("RETRY_BASE_DELAY", "0.001")
+    monkeypatch.setattr(formatter, "_local_batcher", None)
+    monkeypatch.setattr(formatter, "_local_completions_batching", True)
+    reset_limiters()
+    reset_state()
+    yield server
+    reset_limiters()
+    reset_state()
+    server.shutdown()
+    server.server_close()
+
+
+async def _closing(awaitable):
+    try:
+        return await awaitable
+    finally:
+        await client_registry.aclose()
+
+
+def test_local_formatting_batches_concurrent_requests(local_server):
+    """Test concurrent local formatting calls are sent as one /completions batch."""
+    texts = ["one", "two", "three"]
+
+    async def scenario():
+        return await asyncio.gather(*(format_transcript_async(t, engine="local") for t in texts))
+
+    results = asyncio.run(_closing(scenario()))
+
+    assert results == ["Formatted one", "Formatted two", "Formatted three"]
+    assert local_server.batches == [3]
+    assert "/v1/chat/completions" not in local_server.requests
+    assert local_server.requests.count("/tokenize") == 3
+
+
+def test_local_batch_prompts_match_chat_requests(local_server, monkeypatch):
+    """Test batched prompts are the chat template of the chat request's messages, with the same limits."""
+    async def scenario():
+        await asyncio.gather(*(format_transcript_async(t, engine="local") for t in ("one", "two")))
+
+    asyncio.run(_closing(scenario()))
+    tokenized = [body for body in local_server.bodies if "add_generation_prompt" in body]
+    batch = next(body for body in local_server.bodies if "prompt" in body)
+    local_server.bodies.clear()
+    monkeypatch.setenv("LOCAL_BATCH_MAX_SIZE", "1")
+    monkeypatch.setattr(formatter, "_local_batcher", None)
+
+    asyncio.run(_closing(format_transcript_async("one", engine="local")))
+
+    chat = local_server.bodies[0]
+    assert tokenized[0]["messages"] == chat["messages"]
+    assert batch["max_tokens"] == chat["max_tokens"]
+    assert batch["temperature"] == chat["temperature"]
+
+
+def test_local_formatting_falls_back_per_item_on_batch_error(local_server):
+    """Test a failed batch is retried as one chat request per transcript, keeping batching enabled."""
+    local_server.batch_status = 400
+
+    async def scenario():
+        return await asyncio.gather(*(format_transcript_async(t, engine="local") for t in ("a", "b")))
+
+    assert asyncio.run(_closing(scenario())) == ["Formatted a", "Formatted b"]
+    assert local_server.requests.count("/v1/chat/completions") == 2
+    assert formatter._local_completions_batching is True
+
+
+def test_local_formatting_falls_back_without_completions_endpoint(local_server):
+    """Test a server without /completions gets one chat request per transcript."""
+    local_server.completions = False
+
+    async def scenario():
+        return await asyncio.gather(*(format_transcript_async(t, engine="local") for t in ("a", "b")))
+
+    assert asyncio.run(_closing(scenario())) == ["Formatted a", "Formatted b"]
+    assert local_server.requests.count("/v1/chat/completions") == 2
+    assert formatter._local_completions_batching is False
+
+
+@pytest.mark.parametrize("status, payload", [
+    (400, {"error": {"message": "Unexpected field: messages"}}),
+    (200, {"count": 0}),
+])
+def test_local_formatting_stops_batching_on_unusable_tokenize(local_server, status, payload):
+    """Test a /tokenize answer that cannot be used disables batching instead of failing every batch."""
+    local_server.tokenize_status, local_server.tokenize_payload = status, payload
+
+    async def scenario():
+        return await asyncio.gather(*(format_transcript_async(t, engine="local") for t in ("a", "b")))
+
+    assert asyncio.run(_closing(scenario())) == ["Formatted a", "Formatted b"]
+    assert local_server.batches == []
+    assert formatter._local_completions_batching is False
+
+
+def test_single_local_formatting_uses_chat(local_server, monkeypatch):
+    """Test a lone request, or disabled batching, uses the chat endpoint."""
+    monkeypatch.setenv("LOCAL_BATCH_MAX_SIZE", "1")
+
+    result = asyncio.run(_closing(format_transcript_async("memo", engine="local", model="my-model")))
+
+    assert result == "Formatted memo"
+    assert local_server.requests == ["/v1/chat/completions"]
+
+
+def test_local_transcription_posts_to_base_url(local_server, tmp_path):
+    """Test the local engine uploads audio to the configured server with its default model."""
+    audio = tmp_path / "memo.mp3"
+    audio.write_bytes(b"fake audio")
+
+    result = asyncio.run(_closing(
+        transcribe_audio_file_async(audio, language="fr", temperature=0.0, engine="local")
+    ))
+
+    assert result == "Local transcript"
+    assert local_server.requests == ["/v1/audio/transcriptions"]
+    assert b"Voxtral-Mini" in local_server.uploads[0]
+    assert b"fake audio" in local_server.uploads[0]
+
+
+def test_local_formatting_streams_deltas(local_server, monkeypatch):
+    """Test the local engine streams chat deltas from the server."""
+    monkeypatch.setenv("FORMAT_CACHE_BACKEND", "none")
+    stream = FormatStream("memo", engine="local")
+
+    async def read():
+        return [delta async for delta in stream.deltas()]
+
+    assert asyncio.run(_closing(read())) == ["Formatted", " memo"]
+    assert stream.text == "Formatted memo"
+    assert local_server.requests == ["/v1/chat/completions"]
@@ -0,0 +1,154 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+from app.services.pipeline import run_pipeline
+from app.services.preprocessor import PreparedAudio, build_time_map
+from app.services.probe import AudioInfo
+from app.services.transcriber import ChunkTranscript, TranscriptionResult
+
+
+@patch("app.services.pipeline.format_transcript_cached_async")
+@patch("app.services.pipeline.transcribe_audio_file_cached_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_run_pipeline_records_stage_timings(mock_preprocess, mock_transcribe, mock_format):
+    """Test run_pipeline runs every stage in order and records their timings."""
+    mock_preprocess.return_value = PreparedAudio(Path("prepared.mp3"), "abc123")
+    mock_transcribe.return_value = TranscriptionResult(text="Raw text")
+    mock_format.return_value = "Formatted"
+    stages = []
+
+    result = asyncio.run(run_pipeline([Path("a.mp3")], language="fr", on_stage=stages.append))
+
+    assert result.text == "Raw text"
+    assert result.formatted == "Formatted"
+    assert stages == ["preprocess", "transcribe", "format"]
+    assert set(result.timings) == {"preprocess", "transcribe", "format"}
+    assert result.cached is False
+    mock_transcribe.assert_called_once_with(
+        Path("prepared.mp3"),
+        language="fr",
+        temperature=0.0,
+        chunked=False,
+        use_cache=True,
+        audio_sha256="abc123",
+        duration=None,
+        engine=None,
+        model=None,
+    )
+
+
+@patch("app.services.pipeline.format_transcript_cached_async")
+@patch("app.services.pipeline.transcribe_audio_file_cached_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_run_pipeline_skips_formatting(mock_preprocess, mock_transcribe, mock_format):
+    """Test run_pipeline skips formatting when disabled or the transcript is empty."""
+    mock_preprocess.return_value = PreparedAudio(Path("prepared.mp3"), "abc123")
+    mock_transcribe.return_value = TranscriptionResult(text="Raw text")
+
+    result = asyncio.run(run_pipeline([Path("a.mp3")], format_output=False))
+    assert result.formatted is None
+
+    mock_transcribe.return_value = TranscriptionResult(text="")
+    result = asyncio.run(run_pipeline([Path("a.mp3")]))
+    assert result.formatted is None
+    mock_format.assert_not_called()
+
+
+@patch("app.services.pipeline.format_transcript_cached_async")
+@patch("app.services.pipeline.transcribe_audio_file_cached_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_run_pipeline_passes_probed_duration(mock_preprocess, mock_transcribe, mock_format):
+    """Test run_pipeline hands the probed duration to transcription and reports the audio info."""
+    info = AudioInfo(container="mp3", codec="mp3", sample_rate=16000, channels=1, duration=42.5)
+    mock_preprocess.return_value = PreparedAudio(Path("prepared.mp3"), "abc123", info)
+    mock_transcribe.return_value = TranscriptionResult(text="Raw text")
+
+    result = asyncio.run(run_pipeline([Path("a.mp3")], format_output=False))
+
+    assert mock_transcribe.call_args.kwargs["duration"] == 42.5
+    assert result.audio["duration"] == 42.5
+    assert result.audio["codec"] == "mp3"
+
+
+@patch("app.services.pipeline.format_transcript_cached_async")
+@patch("app.services.pipeline.transcribe_audio_file_cached_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_run_pipeline_maps_chunks_back_after_trimming(mock_preprocess, mock_transcribe, mock_format):
+    """Test chunk offsets are reported on the original timeline after silence trimming."""
+    mock_preprocess.return_value = PreparedAudio(
+        Path("prepared.mp3"),
+        "abc123",
+        time_map=build_time_map([(10000, 16000)], frame_seconds=0.01),
+        removed_seconds=60.0,
+    )
+    mock_transcribe.return_value = TranscriptionResult(
+        text="One Two",
+        chunks=[ChunkTranscript(0, 0.0, 90.0, "One", 1.0), ChunkTranscript(1, 90.0, 150.0, "Two", 1.0)],
+    )
+
+    result = asyncio.run(run_pipeline([Path("a.mp3")], format_output=False, trim_silence=True))
+
+    mock_preprocess.assert_called_once_with([Path("a.mp3")], trim_silence=True, sha256s=None)
+    assert [(c["start"], c["end"]) for c in result.chunks] == [(0.0, 90.0), (90.0, 210.0)]
+    assert result.silence_removed_seconds == 60.0
+
+
+@patch("app.services.pipeline.format_transcript_cached_async")
+@patch("app.services.pipeline.transcribe_audio_file_cached_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_run_pipeline_passes_engine_selection(mock_preprocess, mock_transcribe, mock_format):
+    """Test per-request engines and models reach the transcription and formatting stages."""
+    mock_preprocess.return_value = PreparedAudio(Path("prepared.mp3"), "abc123")
+    mock_transcribe.return_value = TranscriptionResult(text="Raw text")
+    mock_format.return_value = "Formatted"
+
+    asyncio.run(run_pipeline(
+        [Path("a.mp3")],
+        engine="openai",
+        model="gpt-4o-transcribe",
+        format_engine="mistral",
+        format_model="mistral-small-latest",
+    ))
+
+    assert mock_transcribe.call_args.kwargs["engine"] == "openai"
+    assert mock_transcribe.call_args.kwargs["model"] == "gpt-4o-transcribe"
+    mock_format.assert_called_once_with(
+        "Raw text", use_cache=True, engine="mistral", model="mistral-small-latest"
+    )
+
+
+@patch.dict("os.environ", {"FORMAT_CHUNK_MAX_TOKENS": "10", "PIPELINE_QUEUE_SIZE": "1"})
+@patch("app.services.formatter.get_format_cache", return_value=None)
+@patch("app.services.formatter._format_async")
+@patch("app.services.pipeline.transcribe_audio_file_cached_async")
+@patch("app.services.pipeline.prepare_audio_async")
+def test_run_pipeline_formats_segments_while_transcribing(mock_preprocess, mock_transcribe, mock_format, _):
+    """Test chunked transcriptions are formatted as segments arrive and assembled in order."""
+    mock_preprocess.return_value = PreparedAudio(Path("prepared.mp3"), "abc123")
+    segments = [f"Segment number {n} is six words." for n in range(4)]
+    events = []
+
+    async def fake_transcribe(path, *, on_segment, **kwargs):
+        for segment in segments:
+            await on_segment(segment)
+            await asyncio.sleep(0.01)
+        events.append("transcribed")
+        return TranscriptionResult(text=" ".join(segments))
+
+    async def fake_format(text, **kwargs):
+        part = text.rsplit("Part to format:\n", 1)[1]
+        events.append(f"format {part[:16]}")
+        return f"# Title\n\n{part}", kwargs["engine"], kwargs["model"]
+
+    mock_transcribe.side_effect = fake_transcribe
+    mock_format.side_effect = fake_format
+
+    result = asyncio.run(run_pipeline([Path("a.mp3")], chunked=True, format_engine="local"))
+
+    assert events.index("format Segment number 0") < events.index("transcribed")
+    assert result.formatted.count("# Title") == 1
+    assert [result.formatted.index(segment) for segment in segments] == sorted(
+        result.formatted.index(segment) for segment in segments
+    )
+    assert set(result.timings) == {"preprocess", "transcribe", "format"}
@@ -1,16 +1,35 @@
+import asyncio
+import json
+import re
+import shutil
+import subprocess
 import tempfile
+from dataclasses import replace
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from app.services.preprocessor import (
+    ENCODING_PROFILES,
     SUPPORTED_AUDIO_EXTS,
+    SilenceMap,
     ensure_supported_or_convert_to_mp3,
     is_supported_audio,
     concatenate_multi_files,
+    concatenate_multi_files_async,
+    ensure_supported_or_convert_to_mp3_async,
+    get_encoding_profile,
+    normalize_audio_async,
+    build_time_map,
+    parse_silencedetect_output,
+    plan_chunks,
+    plan_silence_cuts,
+    prepare_audio_async,
     preprocess,
+    trim_silences_async,
 )
+from app.services.probe import AudioInfo, _probe_cache
 
 
 def test_is_supported_audio_supported_formats():
@@ -65,7 +84,7 @@ def test_ensure_supported_or_convert_to_mp3_ffmpeg_not_found(mock_which):
         src_path.unlink(missing_ok=True)
 
 
-@patch("app.services.preprocessor.subprocess.run")
+@patch("app.services.preprocessor.run_subprocess")
 @patch("app.services.preprocessor.shutil.which")
 def test_ensure_supported_or_convert_to_mp3_conversion_success(
     mock_which, mock_subprocess_run
@@ -77,7 +96,7 @@ def test_ensure_supported_or_convert_to_mp3_conversion_success(
         src_path = Path(tmp_file.name)
         tmp_file.write(b"fake audio data")
     
-    # Create a side effect that creates the output file when subprocess.run is called
+    # Create a side effect that creates the output file when run_subprocess is called
     def create_output_file(*args, **kwargs):
         # Extract the output file path from the command arguments
         cmd = args[0] if args else kwargs.get("args", [])
@@ -108,7 +127,7 @@ def test_ensure_supported_or_convert_to_mp3_conversion_success(
         src_path.unlink(missing_ok=True)
 
 
-@patch("app.services.preprocessor.subprocess.run")
+@patch("app.services.preprocessor.run_subprocess")
 @patch("app.services.preprocessor.shutil.which")
 def test_ensure_supported_or_convert_to_mp3_conversion_failure(
     mock_which, mock_subprocess_run
@@ -134,7 +153,7 @@ def test_ensure_supported_or_convert_to_mp3_conversion_failure(
         src_path.unlink(missing_ok=True)
 
 
-@patch("app.services.preprocessor.subprocess.run")
+@patch("app.services.preprocessor.run_subprocess")
 @patch("app.services.preprocessor.shutil.which")
 def test_ensure_supported_or_convert_to_mp3_output_file_missing(
     mock_which, mock_subprocess_run
@@ -171,7 +190,7 @@ def test_ensure_supported_or_convert_to_mp3_output_file_missing(
         src_path.unlink(missing_ok=True)
 
 
-@patch("app.services.preprocessor.subprocess.run")
+@patch("app.services.preprocessor.run_subprocess")
 def test_concatenate_multi_files_multiple_files_success(mock_subprocess_run):
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tf1, tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tf2:
         p1 = Path(tf1.name); p2 = Path(tf2.name)
@@ -209,8 +228,8 @@ def test_concatenate_multi_files_single_file():
         p.unlink(missing_ok=True)
 
 
-@patch("app.services.preprocessor.ensure_supported_or_convert_to_mp3")
-@patch("app.services.preprocessor.subprocess.run")
+@patch("app.services.preprocessor.ensure_supported_or_convert_to_mp3_async")
+@patch("app.services.preprocessor.run_subprocess")
 def test_preprocess_with_multiple_files(mock_subprocess_run, mock_ensure):
     # Simulate per-file conversion to mp3 by ensure_supported_or_convert_to_mp3
     def ensure_side(src):
@@ -240,3 +259,478 @@ def test_preprocess_with_multiple_files(mock_subprocess_run, mock_ensure):
             import shutil
             shutil.rmtree(result.parent, ignore_errors=True)
 
+
+
+def test_parse_silencedetect_output():
+    stderr = (
+        "  Duration: 00:10:05.50, start: 0.000000, bitrate: 128 kb/s\n"
+        "[silencedetect @ 0x1] silence_start: 12.5\n"
+        "[silencedetect @ 0x1] silence_end: 14 | silence_duration: 1.5\n"
+        "[silencedetect @ 0x1] silence_start: 600.25\n"
+    )
+    result = parse_silencedetect_output(stderr)
+    assert result.duration == pytest.approx(605.5)
+    assert result.silences == [(12.5, 14.0), (600.25, 605.5)]
+
+
+def test_plan_chunks_cuts_at_nearest_silence():
+    silence_map = SilenceMap(duration=250.0, silences=[(40.0, 42.0), (98.0, 102.0), (190.0, 192.0)])
+    spans = plan_chunks(silence_map, target_seconds=100.0)
+
+    assert [(s.start, s.end) for s in spans] == [(0.0, 100.0), (100.0, 191.0), (191.0, 250.0)]
+    assert not any(s.overlaps_previous for s in spans)
+
+
+def test_plan_chunks_overlaps_hard_cuts_without_silence():
+    spans = plan_chunks(SilenceMap(duration=250.0), target_seconds=100.0, overlap_seconds=2.0)
+
+    assert [(s.start, s.end) for s in spans] == [(0.0, 100.0), (98.0, 198.0), (196.0, 250.0)]
+    assert [s.overlaps_previous for s in spans] == [False, True, True]
+
+
+def test_plan_chunks_short_recording_is_single_chunk():
+    spans = plan_chunks(SilenceMap(duration=110.0), target_seconds=100.0)
+    assert [(s.start, s.end) for s in spans] == [(0.0, 110.0)]
+
+
+def _fake_ffmpeg(delays=None, fail_on=None, log=None):
+    """Build a run_subprocess stand-in that sleeps per input and creates outputs."""
+    async def run(cmd):
+        src = cmd[cmd.index("-i") + 1]
+        if log is not None:
+            log.append(("start", src))
+        await asyncio.sleep((delays or {}).get(Path(src).stem, 0.01))
+        if fail_on and fail_on in src:
+            raise subprocess.CalledProcessError(1, cmd, stderr=b"bad input")
+        output_path = Path(cmd[-1])
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.touch()
+        if log is not None:
+            log.append(("end", src))
+        return MagicMock()
+    return run
+
+
+@patch("app.services.preprocessor.settings")
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_multi_files_converts_in_parallel_keeping_order(mock_run, mock_which, mock_settings, tmp_path):
+    mock_settings.concat_mode = "convert"
+    mock_settings.ffmpeg_concurrency = 4
+    srcs = [tmp_path / f"{name}.flac" for name in ("slow", "fast", "medium")]
+    for src in srcs:
+        src.write_bytes(b"fake")
+    log = []
+    mock_run.side_effect = _fake_ffmpeg({"slow": 0.2, "fast": 0.01, "medium": 0.05}, log=log)
+
+    result = asyncio.run(concatenate_multi_files_async(srcs))
+
+    # All conversions started before the slowest one finished
+    first_end = next(i for i, (kind, _) in enumerate(log) if kind == "end")
+    assert [kind for kind, _ in log[:first_end]].count("start") == 3
+    list_file = (result.parent / "inputs.txt").read_text()
+    assert [Path(line.split("'")[1]).stem for line in list_file.splitlines()] == ["slow", "fast", "medium"]
+
+
+@patch("app.services.preprocessor.settings")
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_multi_files_failure_cancels_siblings(mock_run, mock_which, mock_settings, tmp_path):
+    mock_settings.concat_mode = "convert"
+    mock_settings.ffmpeg_concurrency = 4
+    srcs = [tmp_path / f"{name}.flac" for name in ("broken", "slow")]
+    for src in srcs:
+        src.write_bytes(b"fake")
+    log = []
+    mock_run.side_effect = _fake_ffmpeg({"broken": 0.01, "slow": 5.0}, fail_on="broken", log=log)
+
+    with pytest.raises(RuntimeError, match="ffmpeg conversion failed"):
+        asyncio.run(asyncio.wait_for(concatenate_multi_files_async(srcs), timeout=2))
+    assert ("end", str(srcs[1])) not in log
+
+
+@patch("app.services.preprocessor.settings")
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_multi_files_bounds_concurrency(mock_run, mock_which, mock_settings, tmp_path):
+    mock_settings.concat_mode = "convert"
+    mock_settings.ffmpeg_concurrency = 2
+    srcs = [tmp_path / f"part{i}.flac" for i in range(6)]
+    for src in srcs:
+        src.write_bytes(b"fake")
+    running = 0
+    peak = 0
+    convert = _fake_ffmpeg()
+
+    async def tracking_run(cmd):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            return await convert(cmd)
+        finally:
+            running -= 1
+
+    mock_run.side_effect = tracking_run
+    asyncio.run(concatenate_multi_files_async(srcs))
+    # Conversions are capped at 2; the final concat runs alone
+    assert peak == 2
+
+
+@pytest.fixture(autouse=True)
+def clear_probe_cache():
+    _probe_cache.clear()
+    yield
+    _probe_cache.clear()
+
+
+def _fake_probe_and_ffmpeg(streams, calls, fail_copy=False):
+    """run_subprocess stand-in answering ffprobe from ``streams`` and recording ffmpeg calls."""
+    async def run(cmd):
+        if cmd[0] == "ffprobe":
+            stream = streams[Path(cmd[-1]).name]
+            return MagicMock(stdout=json.dumps({"streams": [stream]}).encode())
+        calls.append(cmd)
+        if fail_copy and "copy" in cmd:
+            raise subprocess.CalledProcessError(1, cmd, stderr=b"non-monotonic dts")
+        Path(cmd[-1]).touch()
+        return MagicMock()
+    return run
+
+
+@patch("app.services.preprocessor.settings")
+@patch("app.services.probe.run_subprocess")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_single_pass_for_mixed_inputs(mock_run, mock_probe_run, mock_settings, tmp_path):
+    mock_settings.concat_mode = "filter"
+    mock_settings.audio_profile = "mp3"
+    mock_settings.audio_bitrate = ""
+    streams = {
+        "a.wav": {"codec_name": "pcm_s16le", "sample_rate": "48000", "channels": 2},
+        "b.mp3": {"codec_name": "mp3", "sample_rate": "16000", "channels": 1},
+        "c.m4a": {"codec_name": "aac", "sample_rate": "44100", "channels": 2},
+    }
+    srcs = [tmp_path / name for name in streams]
+    for src in srcs:
+        src.write_bytes(src.name.encode())
+    calls = []
+    mock_run.side_effect = mock_probe_run.side_effect = _fake_probe_and_ffmpeg(streams, calls)
+
+    result = asyncio.run(concatenate_multi_files_async(srcs))
+
+    assert result.suffix == ".mp3"
+    assert len(calls) == 1
+    cmd = calls[0]
+    assert [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-i"] == [str(p) for p in srcs]
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "concat=n=3:v=0:a=1" in graph
+    assert graph.count("aresample=16000") == 3
+
+
+@patch("app.services.preprocessor.settings")
+@patch("app.services.probe.run_subprocess")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_single_pass_copies_compatible_streams(mock_run, mock_probe_run, mock_settings, tmp_path):
+    mock_settings.concat_mode = "filter"
+    mock_settings.audio_profile = "mp3"
+    mock_settings.audio_bitrate = ""
+    stream = {"codec_name": "mp3", "sample_rate": "16000", "channels": 1}
+    streams = {"a.mp3": stream, "b.mp3": stream}
+    srcs = [tmp_path / name for name in streams]
+    for src in srcs:
+        src.write_bytes(src.name.encode())
+    calls = []
+    mock_run.side_effect = mock_probe_run.side_effect = _fake_probe_and_ffmpeg(streams, calls)
+
+    result = asyncio.run(concatenate_multi_files_async(srcs))
+
+    assert result.suffix == ".mp3"
+    assert len(calls) == 1
+    assert "copy" in calls[0]
+    assert "-filter_complex" not in calls[0]
+
+
+@patch("app.services.preprocessor.settings")
+@patch("app.services.probe.run_subprocess")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_single_pass_falls_back_when_copy_fails(mock_run, mock_probe_run, mock_settings, tmp_path):
+    mock_settings.concat_mode = "filter"
+    mock_settings.audio_profile = "mp3"
+    mock_settings.audio_bitrate = ""
+    stream = {"codec_name": "mp3", "sample_rate": "16000", "channels": 1}
+    streams = {"a.mp3": stream, "b.mp3": stream}
+    srcs = [tmp_path / name for name in streams]
+    for src in srcs:
+        src.write_bytes(src.name.encode())
+    calls = []
+    mock_run.side_effect = mock_probe_run.side_effect = _fake_probe_and_ffmpeg(streams, calls, fail_copy=True)
+
+    result = asyncio.run(concatenate_multi_files_async(srcs))
+
+    assert result.exists()
+    assert len(calls) == 2
+    assert "-filter_complex" in calls[1]
+
+
+@patch("app.services.probe.sha256_file")
+@patch("app.services.preprocessor.tempfile.mkdtemp")
+@patch("app.services.preprocessor.settings")
+@patch("app.services.probe.run_subprocess")
+@patch("app.services.preprocessor.run_subprocess")
+def test_concatenate_single_pass_failure_removes_temp_dir(
+    mock_run, mock_probe_run, mock_settings, mock_mkdtemp, mock_sha256, tmp_path
+):
+    """Test a failed concat removes its temp dir and probes with the known upload hashes."""
+    mock_settings.concat_mode = "filter"
+    mock_settings.audio_profile = "mp3"
+    mock_settings.audio_bitrate = ""
+    streams = {
+        "a.wav": {"codec_name": "pcm_s16le", "sample_rate": "48000", "channels": 2},
+        "b.mp3": {"codec_name": "mp3", "sample_rate": "16000", "channels": 1},
+    }
+    srcs = [tmp_path / name for name in streams]
+    for src in srcs:
+        src.write_bytes(src.name.encode())
+    work_dir = tmp_path / "audio_concat_x"
+    work_dir.mkdir()
+    mock_mkdtemp.return_value = str(work_dir)
+    probe = _fake_probe_and_ffmpeg(streams, [])
+
+    async def run(cmd):
+        if cmd[0] == "ffprobe":
+            return await probe(cmd)
+        raise subprocess.CalledProcessError(1, cmd, stderr=b"invalid data")
+
+    mock_run.side_effect = mock_probe_run.side_effect = run
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(concatenate_multi_files_async(srcs, sha256s=["a" * 64, "b" * 64]))
+
+    assert not work_dir.exists()
+    mock_sha256.assert_not_called()
+
+
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.run_subprocess")
+def test_ensure_supported_remuxes_mp3_stream(mock_run, mock_which, tmp_path):
+    """Test an MP3 stream in an unsupported container is copied, not re-encoded."""
+    src = tmp_path / "voice.mka"
+    src.write_bytes(b"fake")
+    mock_run.side_effect = _fake_ffmpeg()
+    info = AudioInfo(container="matroska,webm", codec="mp3", sample_rate=16000, channels=1)
+
+    result = asyncio.run(ensure_supported_or_convert_to_mp3_async(src, info=info))
+
+    cmd = mock_run.call_args.args[0]
+    assert result.suffix == ".mp3"
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+    assert "libmp3lame" not in cmd
+
+
+@patch("app.services.probe.run_subprocess")
+def test_prepare_audio_probes_supported_input(mock_probe_run, tmp_path):
+    """Test prepare_audio_async hashes and probes the prepared file without converting it."""
+    src = tmp_path / "voice.mp3"
+    src.write_bytes(b"voice")
+    mock_probe_run.return_value = MagicMock(stdout=json.dumps({
+        "streams": [{"codec_name": "mp3", "sample_rate": "16000", "channels": 1}],
+        "format": {"format_name": "mp3", "duration": "12.5"},
+    }).encode())
+
+    prepared = asyncio.run(prepare_audio_async([src]))
+
+    assert prepared.path == src
+    assert len(prepared.sha256) == 64
+    assert prepared.duration == 12.5
+    assert prepared.temp_dirs == []
+
+
+def test_encoding_profile_matches_only_compact_streams():
+    """Test the mp3 profile accepts 16 kHz mono MP3 but not WAV or fat MP3."""
+    profile = ENCODING_PROFILES["mp3"]
+    assert profile.matches(AudioInfo(container="mp3", codec="mp3", sample_rate=16000, channels=1, bit_rate=32000))
+    assert not profile.matches(AudioInfo(container="mp3", codec="mp3", sample_rate=16000, channels=1, bit_rate=320000))
+    assert not profile.matches(AudioInfo(container="wav", codec="pcm_s16le", sample_rate=48000, channels=2))
+
+
+@patch("app.services.preprocessor.settings")
+def test_get_encoding_profile_applies_bitrate_override(mock_settings):
+    """Test AUDIO_BITRATE overrides the profile bitrate and "original" disables normalization."""
+    mock_settings.audio_profile = "opus"
+    mock_settings.audio_bitrate = "16k"
+    profile = get_encoding_profile()
+    assert profile.suffix == ".ogg"
+    assert profile.encode_args()[-2:] == ["-b:a", "16k"]
+
+    mock_settings.audio_profile = "original"
+    assert get_encoding_profile() is None
+
+    mock_settings.audio_profile = "wma"
+    with pytest.raises(ValueError, match="Unknown audio profile"):
+        get_encoding_profile()
+
+
+@patch("app.services.preprocessor.run_subprocess")
+def test_normalize_audio_encodes_to_profile(mock_run, tmp_path):
+    """Test a 48 kHz stereo WAV is encoded to the profile and matching input is kept."""
+    src = tmp_path / "phone.wav"
+    src.write_bytes(b"fake")
+    mock_run.side_effect = _fake_ffmpeg()
+    profile = ENCODING_PROFILES["opus"]
+    wav = AudioInfo(container="wav", codec="pcm_s16le", sample_rate=48000, channels=2)
+
+    result = asyncio.run(normalize_audio_async(src, profile, info=wav))
+
+    cmd = mock_run.call_args.args[0]
+    assert result.suffix == ".ogg"
+    assert cmd[cmd.index("-c:a") + 1] == "libopus"
+    assert cmd[cmd.index("-ar") + 1] == "16000"
+    shutil.rmtree(result.parent)
+
+    mock_run.reset_mock()
+    # ffprobe reports every Ogg Opus stream at 48 kHz, including the ones encoded at 16 kHz above
+    opus = AudioInfo(container="ogg", codec="opus", sample_rate=48000, channels=1, bit_rate=24000)
+    ogg = tmp_path / "memo.ogg"
+    assert asyncio.run(normalize_audio_async(ogg, profile, info=opus)) == ogg
+    mock_run.assert_not_called()
+
+    fat = AudioInfo(container="ogg", codec="opus", sample_rate=48000, channels=1, bit_rate=128000)
+    assert not profile.matches(fat)
+    assert not ENCODING_PROFILES["mp3"].matches(replace(opus, codec="mp3"))
+
+
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.settings")
+@patch("app.services.probe.run_subprocess")
+@patch("app.services.preprocessor.run_subprocess")
+def test_prepare_audio_normalizes_and_cleans_up(mock_run, mock_probe_run, mock_settings, mock_which, tmp_path):
+    """Test prepare_audio_async encodes a WAV upload and cleanup removes the output."""
+    mock_settings.audio_profile = "mp3"
+    mock_settings.audio_bitrate = ""
+    mock_settings.silence_trim = False
+    src = tmp_path / "phone.wav"
+    src.write_bytes(b"x" * 1000)
+    mock_probe_run.side_effect = _fake_probe_and_ffmpeg(
+        {
+            "phone.wav": {"codec_name": "pcm_s16le", "sample_rate": "48000", "channels": 2},
+            "phone.mp3": {"codec_name": "mp3", "sample_rate": "16000", "channels": 1},
+        },
+        [],
+    )
+    mock_run.side_effect = _fake_ffmpeg()
+
+    prepared = asyncio.run(prepare_audio_async([src]))
+
+    assert prepared.path.suffix == ".mp3"
+    assert prepared.info.codec == "mp3"
+    assert prepared.path.exists()
+    prepared.cleanup()
+    assert not prepared.path.exists()
+    assert src.exists()
+
+
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.settings")
+@patch("app.services.probe.run_subprocess")
+@patch("app.services.preprocessor.run_subprocess")
+def test_prepare_audio_keeps_concatenated_opus(mock_run, mock_probe_run, mock_settings, mock_which, tmp_path):
+    """Test opus written by the concat, which ffprobe reports at 48 kHz, is not encoded a second time."""
+    mock_settings.concat_mode = "filter"
+    mock_settings.audio_profile = "opus"
+    mock_settings.audio_bitrate = ""
+    mock_settings.silence_trim = False
+    streams = {
+        "a.wav": {"codec_name": "pcm_s16le", "sample_rate": "48000", "channels": 2},
+        "b.m4a": {"codec_name": "aac", "sample_rate": "44100", "channels": 2},
+        "concatenated.ogg": {"codec_name": "opus", "sample_rate": "48000", "channels": 1, "bit_rate": "24000"},
+    }
+    srcs = [tmp_path / "a.wav", tmp_path / "b.m4a"]
+    for src in srcs:
+        src.write_bytes(src.name.encode())
+    calls = []
+    mock_run.side_effect = mock_probe_run.side_effect = _fake_probe_and_ffmpeg(streams, calls)
+
+    prepared = asyncio.run(prepare_audio_async(srcs))
+
+    assert prepared.path.name == "concatenated.ogg"
+    assert len(calls) == 1
+    prepared.cleanup()
+
+
+def test_plan_silence_cuts_keeps_short_gap():
+    """Test only long silences are cut, leaving half the kept gap on each side."""
+    silence_map = SilenceMap(duration=100.0, silences=[(10.0, 11.0), (20.0, 30.0), (90.0, 100.0)])
+    cuts = plan_silence_cuts(silence_map, max_silence=2.0, keep_gap=0.5)
+    assert cuts == [(20.25, 29.75), (90.25, 99.75)]
+
+
+def test_time_map_maps_trimmed_offsets_to_original():
+    """Test offsets after each removed frame range are shifted by the frames removed before them."""
+    time_map = build_time_map([(2025, 2975), (5000, 6000)], frame_seconds=0.01)
+    assert time_map.to_original(5.0) == 5.0
+    assert time_map.to_original(20.25) == pytest.approx(29.75)
+    assert time_map.to_original(30.0) == pytest.approx(39.5)
+    assert time_map.to_original(45.0) == pytest.approx(64.5)
+
+
+@patch("app.services.preprocessor.detect_silences_async")
+@patch("app.services.preprocessor.run_subprocess")
+def test_trim_silences_removes_long_silences(mock_run, mock_detect, tmp_path):
+    """Test trim_silences_async drops long silences in one encode and reports the removed time."""
+    src = tmp_path / "notary.wav"
+    src.write_bytes(b"fake")
+    mock_detect.return_value = SilenceMap(duration=120.0, silences=[(30.0, 60.0), (100.0, 101.0)])
+    mock_run.side_effect = _fake_ffmpeg()
+
+    trimmed = asyncio.run(trim_silences_async(src, ENCODING_PROFILES["mp3"], max_silence=2.0, keep_gap=0.5))
+
+    cmd = mock_run.call_args.args[0]
+    assert cmd[cmd.index("-af") + 1] == (
+        "aresample=16000,asetnsamples=n=160:p=0,aselect='not(between(n,3025,5974))',asetpts=N/SR/TB"
+    )
+    assert trimmed.path.suffix == ".mp3"
+    assert trimmed.removed_seconds == 29.5
+    assert trimmed.time_map.to_original(40.0) == pytest.approx(69.5)
+    shutil.rmtree(trimmed.path.parent)
+
+
+@patch("app.services.preprocessor.detect_silences_async")
+@patch("app.services.preprocessor.run_subprocess")
+def test_trim_silences_time_map_matches_dropped_frames(mock_run, mock_detect, tmp_path):
+    """Test the time map stays exact across hundreds of gaps, frame by frame, as aselect drops them."""
+    src = tmp_path / "long.wav"
+    src.write_bytes(b"fake")
+    silences = [(i * 17.0 + 5.0 + i * 0.0137, i * 17.0 + 11.0 + i * 0.0071) for i in range(300)]
+    mock_detect.return_value = SilenceMap(duration=300 * 17.0, silences=silences)
+    mock_run.side_effect = _fake_ffmpeg()
+
+    trimmed = asyncio.run(trim_silences_async(src, ENCODING_PROFILES["mp3"], max_silence=2.0, keep_gap=0.5))
+
+    cmd = mock_run.call_args.args[0]
+    graph = cmd[cmd.index("-af") + 1]
+    dropped = [tuple(map(int, m)) for m in re.findall(r"between\(n,(\d+),(\d+)\)", graph)]
+    assert len(dropped) == 300
+    # Replay the filter: 160-sample frames at 16 kHz, kept frames renumbered by asetpts
+    frame_seconds = 160 / 16000
+    edges = {n + d for first, last in dropped for n in (first, last + 1) for d in (-1, 0, 1)}
+    kept = 0
+    cut = 0
+    for n in range(int(300 * 17.0 / frame_seconds)):
+        while cut < len(dropped) and n > dropped[cut][1]:
+            cut += 1
+        if cut < len(dropped) and dropped[cut][0] <= n <= dropped[cut][1]:
+            continue
+        if n in edges or n % 97 == 0:
+            assert trimmed.time_map.to_original(kept * frame_seconds) == pytest.approx(n * frame_seconds, abs=1e-6)
+        kept += 1
+    assert trimmed.removed_seconds == pytest.approx(300 * 17.0 - kept * frame_seconds, abs=1e-3)
+    shutil.rmtree(trimmed.path.parent)
+
+
+@patch("app.services.preprocessor.run_subprocess")
+@patch("app.services.preprocessor.detect_silences_async")
+def test_trim_silences_without_long_silence_is_noop(mock_detect, mock_run, tmp_path):
+    """Test trim_silences_async returns None and skips ffmpeg when nothing needs trimming."""
+    mock_detect.return_value = SilenceMap(duration=60.0, silences=[(10.0, 11.0)])
+    assert asyncio.run(trim_silences_async(tmp_path / "a.mp3", ENCODING_PROFILES["mp3"])) is None
+    mock_run.assert_not_called()
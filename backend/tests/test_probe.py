@@ -0,0 +1,69 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.probe import AudioInfo, _probe_cache, parse_ffprobe_output, probe_audio
+
+
+FFPROBE_WAV = json.dumps({
+    "streams": [{"codec_name": "pcm_s16le", "sample_rate": "48000", "channels": 2, "bit_rate": "1536000"}],
+    "format": {"format_name": "wav", "duration": "61.250000", "bit_rate": "1536012", "size": "11760044"},
+}).encode()
+
+
+@pytest.fixture(autouse=True)
+def clear_probe_cache():
+    _probe_cache.clear()
+    yield
+    _probe_cache.clear()
+
+
+def test_parse_ffprobe_output():
+    """Test parse_ffprobe_output reads stream and format fields."""
+    info = parse_ffprobe_output(FFPROBE_WAV)
+    assert info == AudioInfo(
+        container="wav",
+        codec="pcm_s16le",
+        sample_rate=48000,
+        channels=2,
+        bit_rate=1536000,
+        duration=61.25,
+        size=11760044,
+    )
+    assert info.stream_signature == ("wav", "pcm_s16le", 48000, 2)
+
+
+def test_parse_ffprobe_output_without_audio_stream():
+    """Test parse_ffprobe_output rejects files without an audio stream."""
+    with pytest.raises(ValueError, match="No audio stream"):
+        parse_ffprobe_output(b'{"streams": [], "format": {}}')
+
+
+@patch("app.services.probe.run_subprocess")
+def test_probe_audio_caches_by_content_hash(mock_run, tmp_path):
+    """Test probe_audio runs ffprobe once per content hash."""
+    first = tmp_path / "a.wav"
+    second = tmp_path / "b.wav"
+    first.write_bytes(b"same audio")
+    second.write_bytes(b"same audio")
+    mock_run.return_value = MagicMock(stdout=FFPROBE_WAV)
+
+    info_a = asyncio.run(probe_audio(first))
+    info_b = asyncio.run(probe_audio(second))
+
+    assert info_a == info_b
+    assert info_a.duration == 61.25
+    mock_run.assert_called_once()
+
+
+@patch("app.services.probe.run_subprocess")
+def test_probe_audio_returns_none_on_failure(mock_run, tmp_path):
+    """Test probe_audio returns None when ffprobe fails."""
+    src = tmp_path / "broken.wav"
+    src.write_bytes(b"not audio")
+    mock_run.side_effect = FileNotFoundError("ffprobe")
+
+    assert asyncio.run(probe_audio(src)) is None
+    assert asyncio.run(probe_audio(tmp_path / "missing.wav")) is None
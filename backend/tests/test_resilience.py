@@ -0,0 +1,231 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.utils.resilience import (
+    CircuitBreaker,
+    ProviderUnavailableError,
+    call_with_resilience,
+    get_breaker,
+    get_latency_tracker,
+    is_transient,
+    provider_candidates,
+    reset_state,
+    retry_after_seconds,
+)
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = httpx.Headers(headers or {})
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setenv("RETRY_BASE_DELAY", "0.001")
+    monkeypatch.setenv("RETRY_MAX_ATTEMPTS", "3")
+    reset_state()
+    yield
+    reset_state()
+
+
+def _flaky(failures, result="ok", calls=None):
+    """Build a call factory that raises the given errors before succeeding."""
+    errors = list(failures)
+
+    async def call():
+        if calls is not None:
+            calls.append(time.perf_counter())
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call
+
+
+def test_is_transient_and_retry_after():
+    """Test 429/5xx and connection errors are transient and Retry-After is parsed."""
+    assert is_transient(FakeStatusError(429))
+    assert is_transient(FakeStatusError(503))
+    assert is_transient(httpx.ConnectError("refused"))
+    assert not is_transient(FakeStatusError(400))
+    assert not is_transient(ValueError("bad"))
+    assert retry_after_seconds(FakeStatusError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(FakeStatusError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(FakeStatusError(429)) is None
+
+
+def test_retries_transient_errors_then_succeeds():
+    """Test transient failures are retried on the same provider."""
+    calls = []
+    call = _flaky([FakeStatusError(503), FakeStatusError(429)], calls=calls)
+
+    result = asyncio.run(call_with_resilience("transcribe", [("mistral", call)]))
+
+    assert result == "ok"
+    assert len(calls) == 3
+    assert get_breaker("mistral").to_dict()["failures"] == 0
+
+
+@patch("app.utils.resilience.asyncio.sleep")
+def test_retry_honours_retry_after(mock_sleep):
+    """Test the delay before a retry follows the provider's Retry-After."""
+    call = _flaky([FakeStatusError(429, {"retry-after": "1.5"})])
+
+    asyncio.run(call_with_resilience("transcribe", [("mistral", call)]))
+
+    mock_sleep.assert_called_once_with(1.5)
+
+
+def test_non_transient_error_is_raised_immediately():
+    """Test client errors are neither retried nor failed over."""
+    calls = []
+    bad = _flaky([FakeStatusError(400)], calls=calls)
+    fallback = _flaky([], result="fallback")
+
+    with pytest.raises(FakeStatusError):
+        asyncio.run(call_with_resilience("format", [("mistral", bad), ("openai", fallback)]))
+    assert len(calls) == 1
+
+
+def test_fails_over_when_retries_are_exhausted():
+    """Test the next provider is used once the primary keeps failing."""
+    primary = _flaky([FakeStatusError(503)] * 3)
+    fallback = _flaky([], result="from openai")
+
+    result = asyncio.run(call_with_resilience("format", [("mistral", primary), ("openai", fallback)]))
+
+    assert result == "from openai"
+
+
+def test_open_circuit_skips_provider(monkeypatch):
+    """Test an open breaker routes calls straight to the fallback, or raises without one."""
+    monkeypatch.setenv("CIRCUIT_FAILURE_THRESHOLD", "2")
+    breaker = get_breaker("mistral")
+    breaker.record_failure()
+    breaker.record_failure()
+    calls = []
+    primary = _flaky([], calls=calls)
+
+    result = asyncio.run(
+        call_with_resilience("format", [("mistral", primary), ("openai", _flaky([], result="fallback"))])
+    )
+
+    assert result == "fallback"
+    assert calls == []
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(call_with_resilience("format", [("mistral", primary)]))
+
+
+def test_circuit_breaker_half_open_trial():
+    """Test a breaker lets one trial through after the reset period."""
+    breaker = CircuitBreaker("mistral", failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_released_on_client_error_and_cancellation():
+    """Test a trial ending in a non-transient error or cancellation does not lock the provider out."""
+    breaker = CircuitBreaker("mistral", failure_threshold=1, reset_seconds=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    with patch("app.utils.resilience.get_breaker", return_value=breaker):
+        with pytest.raises(FakeStatusError):
+            asyncio.run(call_with_resilience("format", [("mistral", _flaky([FakeStatusError(400)]))]))
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        async def cancelled():
+            task = asyncio.ensure_future(
+                call_with_resilience("format", [("mistral", lambda: asyncio.sleep(10))])
+            )
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancelled())
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        result = asyncio.run(call_with_resilience("format", [("mistral", _flaky([]))]))
+
+    assert result == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_request_wins_over_slow_call(monkeypatch):
+    """Test a second request is sent past the latency percentile and the first result wins."""
+    monkeypatch.setenv("HEDGE_PERCENTILE", "95")
+    monkeypatch.setenv("HEDGE_MIN_SAMPLES", "5")
+    tracker = get_latency_tracker("transcribe", "mistral")
+    for _ in range(5):
+        tracker.record(0.05)
+    delays = [2.0, 0.01]
+    started = []
+
+    async def call():
+        delay = delays.pop(0)
+        started.append(delay)
+        await asyncio.sleep(delay)
+        return f"slept {delay}"
+
+    start = time.perf_counter()
+    result = asyncio.run(call_with_resilience("transcribe", [("mistral", call)]))
+
+    assert result == "slept 0.01"
+    assert started == [2.0, 0.01]
+    assert time.perf_counter() - start < 1.0
+
+
+def test_hedged_loser_result_is_closed(monkeypatch):
+    """Test a response returned by the losing hedged call is closed rather than leaked."""
+    monkeypatch.setenv("HEDGE_PERCENTILE", "95")
+    monkeypatch.setenv("HEDGE_MIN_SAMPLES", "5")
+    tracker = get_latency_tracker("transcribe", "mistral")
+    for _ in range(5):
+        tracker.record(0.05)
+
+    class Response:
+        def __init__(self, name):
+            self.name = name
+            self.closed = False
+
+        async def aclose(self):
+            self.closed = True
+
+    slow = Response("slow")
+    plans = [(slow, 2.0), (Response("fast"), 0.01)]
+
+    async def call():
+        response, delay = plans.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # The request completed just as it was cancelled
+            pass
+        return response
+
+    result = asyncio.run(call_with_resilience("transcribe", [("mistral", call)]))
+
+    assert result.name == "fast"
+    assert not result.closed
+    assert slow.closed
+
+
+def test_provider_candidates_require_api_key(monkeypatch):
+    """Test failover only adds hosted providers that have an API key configured."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert provider_candidates("mistral") == ["mistral"]
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    assert provider_candidates("mistral") == ["mistral", "openai"]
+    assert provider_candidates("local") == ["local"]
+    monkeypatch.setenv("PROVIDER_FAILOVER", "false")
+    assert provider_candidates("mistral") == ["mistral"]
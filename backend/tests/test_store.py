@@ -0,0 +1,195 @@
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+from unittest.mock import patch
+
+import httpx
+import pytest
+from docx import Document
+
+from app.services import store
+from app.services.store import TranscriptNotFoundError, TranscriptStore
+from app.utils.execution import run_cpu
+
+
+@pytest.fixture
+def transcript_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIPT_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setenv("CPU_PROCESS_POOL_SIZE", "0")
+    monkeypatch.setattr(store, "_transcript_store", None)
+    yield store.get_transcript_store()
+    store._transcript_store.close()
+
+
+def _request(method, url, **kwargs):
+    from app.main import app
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_transcript_store_round_trip(tmp_path):
+    """Test texts and metadata persist across store instances and re-formatting drops old exports."""
+    first = TranscriptStore(tmp_path)
+    created = first.create("raw text", "# Formatted", filenames=["a.mp3"], language="fr", metadata={"engine": "openai"})
+    first.put_artifact(created.id, "ab" * 16, b"docx")
+    first.close()
+
+    second = TranscriptStore(tmp_path)
+    loaded = second.get(created.id)
+    assert loaded == created
+    assert second.read_text(created.id) == "raw text"
+    assert second.read_formatted(created.id) == "# Formatted"
+    assert second.get_artifact(created.id, "ab" * 16) == b"docx"
+
+    updated = second.set_formatted(created.id, "# Again", metadata={"formatModel": "m"})
+    assert updated.metadata == {"engine": "openai", "formatModel": "m"}
+    assert second.read_formatted(created.id) == "# Again"
+    assert second.get_artifact(created.id, "ab" * 16) is None
+
+    with pytest.raises(TranscriptNotFoundError):
+        second.get("../../etc/passwd")
+    assert second.delete(created.id) is True
+    with pytest.raises(TranscriptNotFoundError):
+        second.read_text(created.id)
+    second.close()
+
+
+def test_transcript_store_evicts_least_recently_used(tmp_path):
+    """Test the store is trimmed to 90% of max_bytes, dropping the transcripts used longest ago first."""
+    transcript_store = TranscriptStore(tmp_path, max_bytes=2500)
+    first = transcript_store.create("a" * 1000)
+    second = transcript_store.create("b" * 1000)
+    os.utime(transcript_store._dir(second.id), (1, 1))
+    os.utime(transcript_store._dir(first.id), (2, 2))
+
+    third = transcript_store.create("c" * 1000)
+
+    with pytest.raises(TranscriptNotFoundError):
+        transcript_store.get(second.id)
+    assert not transcript_store._dir(second.id).exists()
+    assert transcript_store.read_text(first.id) == "a" * 1000
+    assert transcript_store.read_text(third.id) == "c" * 1000
+    assert transcript_store.to_dict()["bytes"] == 2000
+    assert transcript_store.evictions == 1
+    transcript_store.close()
+
+
+def test_transcript_store_expires_old_transcripts(tmp_path):
+    """Test transcripts past ttl_seconds are not found and are removed on the next write."""
+    transcript_store = TranscriptStore(tmp_path, ttl_seconds=60)
+    old = transcript_store.create("old")
+    stale = transcript_store.create("stale")
+
+    with patch("app.services.store.time.time", return_value=time.time() + 120):
+        with pytest.raises(TranscriptNotFoundError):
+            transcript_store.get(old.id)
+        transcript_store.create("new")
+
+    assert not transcript_store._dir(old.id).exists()
+    assert not transcript_store._dir(stale.id).exists()
+    assert transcript_store.expirations == 2
+    transcript_store.close()
+
+
+def test_export_by_id_is_cached_with_etag(transcript_store):
+    """Test a stored transcript exports once, then serves the stored DOCX and answers If-None-Match with 304."""
+    transcript = transcript_store.create("raw", "# Constat\n\nTexte.")
+
+    with patch("app.routers.export.run_cpu", wraps=run_cpu) as render:
+        first = _request("GET", f"/export/{transcript.id}")
+        second = _request("POST", "/export", json={"transcript_id": transcript.id})
+        revalidated = _request("GET", f"/export/{transcript.id}", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert Document(io.BytesIO(first.content)).paragraphs[0].text == "Constat"
+    assert second.headers["etag"] == first.headers["etag"]
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert render.call_count == 1
+
+    other = _request("GET", f"/export/{transcript.id}", params={"language": "en-GB"})
+    assert other.headers["etag"] != first.headers["etag"]
+    assert _request("GET", f"/export/{'0' * 32}").status_code == 404
+    assert _request("POST", "/export", json={}).status_code == 400
+
+
+def test_export_by_id_etag_follows_the_text_rendered(transcript_store):
+    """Test a re-format between reading the metadata and the text cannot pair the old ETag with the new text."""
+    transcript = transcript_store.create("raw", "# Old")
+    original = transcript_store.get
+    reformatted = []
+
+    def get_then_reformat(transcript_id):
+        loaded = original(transcript_id)
+        if not reformatted:
+            reformatted.append(True)
+            transcript_store.set_formatted(transcript_id, "# New")
+        return loaded
+
+    with patch.object(transcript_store, "get", side_effect=get_then_reformat):
+        response = _request("GET", f"/export/{transcript.id}")
+    current = _request("GET", f"/export/{transcript.id}")
+
+    assert Document(io.BytesIO(response.content)).paragraphs[0].text == "New"
+    assert response.headers["etag"] == current.headers["etag"]
+    assert current.content == response.content
+
+
+def test_export_batch_lists_unknown_transcripts_in_manifest(transcript_store):
+    """Test an unknown transcript id in a batch becomes a manifest error while the other items export."""
+    transcript = transcript_store.create("raw", "# Stored")
+    items = [
+        {"name": "stored", "transcript_id": transcript.id},
+        {"name": "missing", "transcript_id": "0" * 32},
+        {"name": "inline", "content": "Inline."},
+    ]
+
+    response = _request("POST", "/export/batch", json={"items": items})
+
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["stored.docx", "inline.docx", "manifest.json"]
+    assert json.loads(archive.read("manifest.json"))["items"] == [
+        {"name": "stored", "file": "stored.docx"},
+        {"name": "missing", "error": f"Unknown transcript: {'0' * 32}"},
+        {"name": "inline", "file": "inline.docx"},
+    ]
+
+
+@patch("app.routers.format.format_transcript_cached_async")
+def test_format_by_id_updates_stored_transcript(mock_format, transcript_store):
+    """Test re-formatting a stored transcript uses its raw text and replaces the formatted text."""
+    transcript = transcript_store.create("raw words", "# Old")
+    mock_format.return_value = "# New"
+
+    response = _request("POST", "/format", json={"transcript_id": transcript.id, "engine": "openai"})
+
+    assert response.json() == {"id": transcript.id, "formattedText": "# New"}
+    assert mock_format.call_args.args == ("raw words",)
+    stored = _request("GET", f"/transcripts/{transcript.id}").json()
+    assert stored["formattedText"] == "# New"
+    assert stored["metadata"]["formatEngine"] == "openai"
+    assert stored["metadata"]["formatModel"] == "gpt-4o-mini"
+    assert _request("POST", "/format", json={}).status_code == 400
+
+
+@patch("app.routers.format.format_transcript_cached_async")
+def test_transcript_evicted_mid_request_is_not_found(mock_format, transcript_store):
+    """Test a transcript deleted or evicted between its lookup and a later store call answers 404."""
+    transcript = transcript_store.create("raw words", "# Old")
+    mock_format.return_value = "# New"
+
+    with patch.object(transcript_store, "read_text", side_effect=FileNotFoundError()):
+        assert _request("GET", f"/transcripts/{transcript.id}").status_code == 404
+    with patch.object(transcript_store, "set_formatted", side_effect=TranscriptNotFoundError(transcript.id)):
+        response = _request("POST", "/format", json={"transcript_id": transcript.id})
+    assert response.status_code == 404
@@ -0,0 +1,77 @@
+from app.services.text_chunking import merge_formatted_chunks, split_sentences, split_text
+from app.services.tokens import estimate_tokens_by_chars, get_token_counter
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_split_text_keeps_paragraphs_whole_under_budget():
+    """Test paragraphs are packed into chunks without being cut."""
+    text = "one two three.\n\nfour five six.\n\nseven eight nine."
+
+    chunks = split_text(text, max_tokens=6, count_tokens=count_words)
+
+    assert [chunk.text for chunk in chunks] == ["one two three.\n\nfour five six.", "seven eight nine."]
+    assert [chunk.index for chunk in chunks] == [0, 1]
+
+
+def test_split_text_cuts_long_paragraphs_between_sentences():
+    """Test a paragraph over the budget is split at sentence boundaries."""
+    text = "Alpha beta gamma. Delta epsilon zeta. Eta theta iota."
+
+    chunks = split_text(text, max_tokens=4, count_tokens=count_words)
+
+    assert [chunk.text for chunk in chunks] == ["Alpha beta gamma.", "Delta epsilon zeta.", "Eta theta iota."]
+    assert all(count_words(chunk.text) <= 4 for chunk in chunks)
+
+
+def test_split_text_cuts_run_on_sentences_between_words():
+    """Test text without punctuation still respects the budget."""
+    chunks = split_text(" ".join(["word"] * 10), max_tokens=3, count_tokens=count_words)
+
+    assert [count_words(chunk.text) for chunk in chunks] == [3, 3, 3, 1]
+
+
+def test_split_text_adds_preceding_sentences_as_context():
+    """Test each chunk after the first carries the tail of the previous one."""
+    text = "First one here. Second one here.\n\nThird one here."
+
+    chunks = split_text(text, max_tokens=6, count_tokens=count_words, context_tokens=3)
+
+    assert chunks[0].context == ""
+    assert chunks[1].context == "Second one here."
+
+
+def test_split_sentences():
+    """Test sentences are split after terminal punctuation."""
+    assert split_sentences("Yes. Really? Indeed!  ") == ["Yes.", "Really?", "Indeed!"]
+
+
+def test_merge_formatted_chunks_keeps_one_title_and_unique_headings():
+    """Test later titles become sections and repeated headings are dropped."""
+    outputs = [
+        "# Observation\n\n## Context\n\nThe meeting started.",
+        "# Discussion\n\n## Context\n\nThe parties agreed.",
+    ]
+
+    merged = merge_formatted_chunks(outputs)
+
+    assert merged.count("# Observation") == 1
+    assert "## Discussion" in merged
+    assert merged.count("## Context") == 1
+    assert merged.endswith("The parties agreed.")
+
+
+def test_merge_formatted_chunks_drops_sentences_repeated_at_boundary():
+    """Test a sentence repeated from the previous chunk is kept once."""
+    merged = merge_formatted_chunks(["The meeting started. The notary arrived.", "The notary arrived. Everyone sat."])
+
+    assert merged == "The meeting started. The notary arrived.\n\nEveryone sat."
+
+
+def test_token_counter_falls_back_to_character_estimate():
+    """Test engines without a tokenizer are estimated at four characters per token plus a margin."""
+    assert get_token_counter("local", "any-model") is estimate_tokens_by_chars
+    assert estimate_tokens_by_chars("a" * 16) == 5
+    assert estimate_tokens_by_chars("a" * 17) == 6
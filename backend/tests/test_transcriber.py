@@ -1,17 +1,29 @@
+import asyncio
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.services.cache import LRUCache, TieredCache, sha256_file
+from app.services.engines import EngineSelectionError
+from app.services.preprocessor import SilenceMap
 from app.services.transcriber import (
+    TranscriptionResult,
+    merge_overlapping_text,
     transcribe_audio_file,
+    transcribe_audio_file_async,
+    transcribe_audio_file_cached_async,
+    transcribe_audio_file_chunked_async,
     transcribe_audio_file_mistral,
+    transcribe_audio_file_mistral_async,
     transcribe_audio_file_openai,
+    transcribe_audio_file_openai_async,
+    transcript_cache_key,
 )
 
 
-@patch("app.services.transcriber.get_openai_client")
+@patch("app.services.transcriber.get_async_openai_client")
 def test_transcribe_audio_file_openai_success(mock_get_client):
     """Test transcribe_audio_file_openai successfully transcribes audio."""
     mock_client = MagicMock()
@@ -20,7 +32,7 @@ def test_transcribe_audio_file_openai_success(mock_get_client):
     mock_result = MagicMock()
     mock_result.text = "Transcribed text"
     
-    mock_client.audio.transcriptions.create.return_value = mock_result
+    mock_client.audio.transcriptions.create = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -39,7 +51,7 @@ def test_transcribe_audio_file_openai_success(mock_get_client):
         file_path.unlink(missing_ok=True)
 
 
-@patch("app.services.transcriber.get_openai_client")
+@patch("app.services.transcriber.get_async_openai_client")
 def test_transcribe_audio_file_openai_with_language(mock_get_client):
     """Test transcribe_audio_file_openai uses language parameter."""
     mock_client = MagicMock()
@@ -48,7 +60,7 @@ def test_transcribe_audio_file_openai_with_language(mock_get_client):
     mock_result = MagicMock()
     mock_result.text = "Transcribed text"
     
-    mock_client.audio.transcriptions.create.return_value = mock_result
+    mock_client.audio.transcriptions.create = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -63,7 +75,7 @@ def test_transcribe_audio_file_openai_with_language(mock_get_client):
         file_path.unlink(missing_ok=True)
 
 
-@patch("app.services.transcriber.get_openai_client")
+@patch("app.services.transcriber.get_async_openai_client")
 def test_transcribe_audio_file_openai_with_temperature(mock_get_client):
     """Test transcribe_audio_file_openai uses temperature parameter."""
     mock_client = MagicMock()
@@ -72,7 +84,7 @@ def test_transcribe_audio_file_openai_with_temperature(mock_get_client):
     mock_result = MagicMock()
     mock_result.text = "Transcribed text"
     
-    mock_client.audio.transcriptions.create.return_value = mock_result
+    mock_client.audio.transcriptions.create = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -87,7 +99,7 @@ def test_transcribe_audio_file_openai_with_temperature(mock_get_client):
         file_path.unlink(missing_ok=True)
 
 
-@patch("app.services.transcriber.get_openai_client")
+@patch("app.services.transcriber.get_async_openai_client")
 def test_transcribe_audio_file_openai_no_text_attribute(mock_get_client):
     """Test transcribe_audio_file_openai returns empty string when result has no text."""
     mock_client = MagicMock()
@@ -96,7 +108,7 @@ def test_transcribe_audio_file_openai_no_text_attribute(mock_get_client):
     mock_result = MagicMock()
     del mock_result.text  # Remove text attribute
     
-    mock_client.audio.transcriptions.create.return_value = mock_result
+    mock_client.audio.transcriptions.create = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -118,7 +130,7 @@ def test_transcribe_audio_file_mistral_success(mock_get_client):
     mock_result = MagicMock()
     mock_result.text = "Transcribed text"
     
-    mock_client.audio.transcriptions.complete.return_value = mock_result
+    mock_client.audio.transcriptions.complete_async = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -128,8 +140,8 @@ def test_transcribe_audio_file_mistral_success(mock_get_client):
         result = transcribe_audio_file_mistral(file_path)
         
         assert result == "Transcribed text"
-        mock_client.audio.transcriptions.complete.assert_called_once()
-        call_args = mock_client.audio.transcriptions.complete.call_args
+        mock_client.audio.transcriptions.complete_async.assert_called_once()
+        call_args = mock_client.audio.transcriptions.complete_async.call_args
         assert call_args.kwargs["model"] == "voxtral-mini-latest"
         assert call_args.kwargs["language"] is None
         assert call_args.kwargs["temperature"] == 0.0
@@ -138,6 +150,21 @@ def test_transcribe_audio_file_mistral_success(mock_get_client):
         file_path.unlink(missing_ok=True)
 
 
+@patch("app.services.transcriber.get_mistral_client")
+def test_transcribe_audio_file_mistral_file_name_follows_container(mock_get_client, tmp_path):
+    """Test the Mistral upload file name carries the real container extension."""
+    mock_client = MagicMock()
+    mock_get_client.return_value = mock_client
+    mock_client.audio.transcriptions.complete_async = AsyncMock(return_value=MagicMock(text="Transcribed text"))
+    file_path = tmp_path / "prepared.ogg"
+    file_path.write_bytes(b"fake audio data")
+
+    transcribe_audio_file_mistral(file_path)
+
+    call_args = mock_client.audio.transcriptions.complete_async.call_args
+    assert call_args.kwargs["file"]["file_name"] == "audio.ogg"
+
+
 @patch("app.services.transcriber.get_mistral_client")
 def test_transcribe_audio_file_mistral_with_language(mock_get_client):
     """Test transcribe_audio_file_mistral uses language parameter."""
@@ -147,7 +174,7 @@ def test_transcribe_audio_file_mistral_with_language(mock_get_client):
     mock_result = MagicMock()
     mock_result.text = "Transcribed text"
     
-    mock_client.audio.transcriptions.complete.return_value = mock_result
+    mock_client.audio.transcriptions.complete_async = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -156,7 +183,7 @@ def test_transcribe_audio_file_mistral_with_language(mock_get_client):
     try:
         transcribe_audio_file_mistral(file_path, language="en")
         
-        call_args = mock_client.audio.transcriptions.complete.call_args
+        call_args = mock_client.audio.transcriptions.complete_async.call_args
         assert call_args.kwargs["language"] == "en"
     finally:
         file_path.unlink(missing_ok=True)
@@ -171,7 +198,7 @@ def test_transcribe_audio_file_mistral_no_text_attribute(mock_get_client):
     mock_result = MagicMock()
     del mock_result.text  # Remove text attribute
     
-    mock_client.audio.transcriptions.complete.return_value = mock_result
+    mock_client.audio.transcriptions.complete_async = AsyncMock(return_value=mock_result)
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
         tmp_file.write(b"fake audio data")
@@ -184,10 +211,10 @@ def test_transcribe_audio_file_mistral_no_text_attribute(mock_get_client):
         file_path.unlink(missing_ok=True)
 
 
-@patch("app.services.transcriber.PROVIDER", "openai")
-@patch("app.services.transcriber.transcribe_audio_file_openai")
+@patch.dict("os.environ", {"PROVIDER": "openai"})
+@patch("app.services.transcriber.transcribe_audio_file_openai_async")
 def test_transcribe_audio_file_openai_provider(mock_transcribe_openai):
-    """Test transcribe_audio_file calls transcribe_audio_file_openai when provider is openai."""
+    """Test transcribe_audio_file runs the OpenAI engine when provider is openai."""
     mock_transcribe_openai.return_value = "Transcribed"
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
@@ -200,16 +227,16 @@ def test_transcribe_audio_file_openai_provider(mock_transcribe_openai):
         
         assert result == "Transcribed"
         mock_transcribe_openai.assert_called_once_with(
-            file_path, language="fr", temperature=0.2
+            file_path, model="whisper-1", language="fr", temperature=0.2
         )
     finally:
         file_path.unlink(missing_ok=True)
 
 
-@patch("app.services.transcriber.PROVIDER", "mistral")
-@patch("app.services.transcriber.transcribe_audio_file_mistral")
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
 def test_transcribe_audio_file_mistral_provider(mock_transcribe_mistral):
-    """Test transcribe_audio_file calls transcribe_audio_file_mistral when provider is mistral."""
+    """Test transcribe_audio_file runs the Mistral engine when provider is mistral."""
     mock_transcribe_mistral.return_value = "Transcribed"
     
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
@@ -222,13 +249,13 @@ def test_transcribe_audio_file_mistral_provider(mock_transcribe_mistral):
         
         assert result == "Transcribed"
         mock_transcribe_mistral.assert_called_once_with(
-            file_path, language=None, temperature=0.0
+            file_path, model="voxtral-mini-latest", language=None, temperature=0.0
         )
     finally:
         file_path.unlink(missing_ok=True)
 
 
-@patch("app.services.transcriber.PROVIDER", "unknown")
+@patch.dict("os.environ", {"PROVIDER": "unknown"})
 def test_transcribe_audio_file_unknown_provider():
     """Test transcribe_audio_file raises ValueError for unknown provider."""
     with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
@@ -242,3 +269,444 @@ def test_transcribe_audio_file_unknown_provider():
     finally:
         file_path.unlink(missing_ok=True)
 
+
+def test_merge_overlapping_text_drops_repeated_words():
+    """Test merge_overlapping_text removes words repeated across a hard cut."""
+    previous = "The deed was signed on the fifth of March."
+    current = "fifth of march, in Paris, before witnesses."
+    assert merge_overlapping_text(previous, current) == "in Paris, before witnesses."
+
+
+def test_merge_overlapping_text_without_overlap():
+    """Test merge_overlapping_text keeps text unchanged when nothing repeats."""
+    assert merge_overlapping_text("First part.", "Second part.") == "Second part."
+
+
+@patch("app.services.transcriber.split_audio_async")
+@patch("app.services.transcriber.detect_silences_async")
+def test_transcribe_audio_file_chunked_stitches_in_order(mock_detect, mock_split):
+    """Test chunked transcription keeps chunk order and de-duplicates overlaps."""
+    mock_detect.return_value = SilenceMap(duration=250.0)
+    mock_split.side_effect = lambda src, spans, dest: [dest / f"chunk_{i}.mp3" for i in range(len(spans))]
+    texts = {
+        "chunk_0.mp3": "one two three four",
+        "chunk_1.mp3": "three four five six",
+        "chunk_2.mp3": "six seven",
+    }
+    transcribe_fn = MagicMock(side_effect=lambda path, **kwargs: texts[path.name])
+
+    result = asyncio.run(
+        transcribe_audio_file_chunked_async(
+            Path("long.mp3"),
+            language="fr",
+            temperature=0.0,
+            transcribe_fn=transcribe_fn,
+            target_seconds=100.0,
+            overlap_seconds=2.0,
+            concurrency=2,
+        )
+    )
+
+    assert result.text == "one two three four five six seven"
+    assert [c.index for c in result.chunks] == [0, 1, 2]
+    assert all(c.elapsed >= 0 for c in result.chunks)
+    assert transcribe_fn.call_count == 3
+    assert transcribe_fn.call_args.kwargs == {"language": "fr", "temperature": 0.0}
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+@patch("app.services.transcriber.split_audio_async")
+@patch("app.services.transcriber.detect_silences_async")
+def test_transcribe_audio_file_chunked_short_file_single_call(mock_detect, mock_split, mock_mistral):
+    """Test a short recording is sent whole to the configured provider."""
+    mock_detect.return_value = SilenceMap(duration=30.0)
+    mock_mistral.return_value = "Short memo"
+
+    result = asyncio.run(
+        transcribe_audio_file_chunked_async(Path("memo.mp3"), language=None, temperature=0.0, target_seconds=100.0)
+    )
+
+    assert result.text == "Short memo"
+    assert len(result.chunks) == 1
+    mock_split.assert_not_called()
+    mock_mistral.assert_called_once_with(
+        Path("memo.mp3"), model="voxtral-mini-latest", language=None, temperature=0.0
+    )
+
+
+@patch("app.services.transcriber.split_audio_async")
+@patch("app.services.transcriber.detect_silences_async")
+def test_transcribe_audio_file_chunked_known_short_duration_skips_detection(mock_detect, mock_split):
+    """Test a probed duration under one chunk skips silence detection."""
+    transcribe_fn = MagicMock(return_value="Short memo")
+
+    result = asyncio.run(
+        transcribe_audio_file_chunked_async(
+            Path("memo.mp3"), language=None, temperature=0.0,
+            transcribe_fn=transcribe_fn, target_seconds=100.0, duration=30.0,
+        )
+    )
+
+    assert result.text == "Short memo"
+    assert result.chunks[0].end == 30.0
+    mock_detect.assert_not_called()
+    mock_split.assert_not_called()
+
+
+def _answered_as_requested(text):
+    """_transcribe_file_async stand-in answering ``text`` from the requested engine and model."""
+    return lambda path, **kwargs: (text, kwargs["engine"], kwargs["model"])
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.transcriber._transcribe_file_async")
+@patch("app.services.transcriber.get_transcript_cache")
+def test_transcribe_audio_file_cached_hits_on_same_audio(mock_get_cache, mock_transcribe):
+    """Test identical audio and parameters are transcribed only once."""
+    mock_get_cache.return_value = TieredCache(LRUCache(10))
+    mock_transcribe.side_effect = _answered_as_requested("Transcribed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = Path(tmp) / "first.mp3"
+        second = Path(tmp) / "second.mp3"
+        first.write_bytes(b"same audio")
+        second.write_bytes(b"same audio")
+
+        miss = asyncio.run(transcribe_audio_file_cached_async(first, language="fr", temperature=0.0))
+        hit = asyncio.run(transcribe_audio_file_cached_async(second, language="fr", temperature=0.0))
+        other_language = asyncio.run(transcribe_audio_file_cached_async(second, language="en", temperature=0.0))
+
+    assert miss.cached is False
+    assert hit.cached is True
+    assert hit.text == "Transcribed"
+    assert other_language.cached is False
+    assert mock_transcribe.call_count == 2
+
+
+@patch("app.services.transcriber._transcribe_file_async")
+@patch("app.services.transcriber.get_transcript_cache")
+def test_transcribe_audio_file_cached_skips_non_deterministic(mock_get_cache, mock_transcribe):
+    """Test requests with a non-zero temperature bypass the cache."""
+    cache = TieredCache(LRUCache(10))
+    mock_get_cache.return_value = cache
+    mock_transcribe.side_effect = _answered_as_requested("Transcribed")
+
+    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
+        tmp_file.write(b"fake audio data")
+        file_path = Path(tmp_file.name)
+    try:
+        asyncio.run(transcribe_audio_file_cached_async(file_path, language=None, temperature=0.4))
+        asyncio.run(transcribe_audio_file_cached_async(file_path, language=None, temperature=0.4))
+    finally:
+        file_path.unlink(missing_ok=True)
+
+    assert mock_transcribe.call_count == 2
+    assert len(cache.memory) == 0
+
+
+@patch("app.services.transcriber.get_async_openai_client")
+def test_transcribe_audio_file_openai_async_success(mock_get_client, tmp_path):
+    """Test the async OpenAI variant awaits the async client with the file path."""
+    mock_client = MagicMock()
+    mock_client.audio.transcriptions.create = AsyncMock(return_value=MagicMock(text="Transcribed text"))
+    mock_get_client.return_value = mock_client
+    file_path = tmp_path / "audio.mp3"
+    file_path.write_bytes(b"fake audio data")
+
+    result = asyncio.run(transcribe_audio_file_openai_async(file_path, language="fr"))
+
+    assert result == "Transcribed text"
+    call_args = mock_client.audio.transcriptions.create.call_args
+    assert call_args.kwargs["model"] == "whisper-1"
+    assert call_args.kwargs["file"] == file_path
+    assert call_args.kwargs["language"] == "fr"
+
+
+@patch("app.services.transcriber.get_mistral_client")
+def test_transcribe_audio_file_mistral_async_success(mock_get_client, tmp_path):
+    """Test the async Mistral variant sends the file contents through complete_async."""
+    mock_client = MagicMock()
+    mock_client.audio.transcriptions.complete_async = AsyncMock(return_value=MagicMock(text="Transcribed text"))
+    mock_get_client.return_value = mock_client
+    file_path = tmp_path / "audio.ogg"
+    file_path.write_bytes(b"fake audio data")
+
+    result = asyncio.run(transcribe_audio_file_mistral_async(file_path))
+
+    assert result == "Transcribed text"
+    call_args = mock_client.audio.transcriptions.complete_async.call_args
+    assert call_args.kwargs["file"] == {"content": b"fake audio data", "file_name": "audio.ogg"}
+    mock_client.audio.transcriptions.complete.assert_not_called()
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+def test_transcribe_audio_file_async_keeps_many_calls_in_flight(mock_mistral, monkeypatch):
+    """Test concurrent async transcriptions overlap without holding worker threads."""
+    from app.utils.limiter import reset_limiters
+
+    # Open the provider's concurrency window so only the event loop limits overlap
+    monkeypatch.setenv("PROVIDER_CONCURRENCY_INITIAL", "100")
+    monkeypatch.setenv("PROVIDER_CONCURRENCY_MAX", "100")
+    reset_limiters()
+
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        return "text"
+
+    mock_mistral.side_effect = slow
+
+    async def scenario():
+        start = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(
+            transcribe_audio_file_async(Path(f"{i}.mp3"), language=None, temperature=0.0) for i in range(100)
+        ))
+        return results, asyncio.get_running_loop().time() - start
+
+    try:
+        results, elapsed = asyncio.run(scenario())
+    finally:
+        reset_limiters()
+    assert results == ["text"] * 100
+    assert elapsed < 1.0
+
+
+@patch.dict("os.environ", {"PROVIDER": "invalid_provider"})
+def test_transcribe_audio_file_async_invalid_provider():
+    """Test transcribe_audio_file_async raises ValueError for an unknown provider."""
+    with pytest.raises(ValueError, match="Unknown provider"):
+        asyncio.run(transcribe_audio_file_async(Path("a.mp3"), language=None, temperature=0.0))
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.transcriber.transcribe_audio_file_openai_async")
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+def test_transcribe_audio_file_async_fails_over_to_openai(mock_mistral, mock_openai, monkeypatch):
+    """Test a provider that keeps returning 503 fails over to the other configured provider."""
+    from app.utils.resilience import reset_state
+
+    class Unavailable(Exception):
+        status_code = 503
+
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    monkeypatch.setenv("RETRY_BASE_DELAY", "0.001")
+    reset_state()
+    mock_mistral.side_effect = Unavailable("overloaded")
+    mock_openai.return_value = "From OpenAI"
+
+    try:
+        result = asyncio.run(transcribe_audio_file_async(Path("a.mp3"), language="fr", temperature=0.0))
+    finally:
+        reset_state()
+
+    assert result == "From OpenAI"
+    assert mock_mistral.call_count == 3
+    mock_openai.assert_called_once_with(Path("a.mp3"), model="whisper-1", language="fr", temperature=0.0)
+
+
+@patch.dict("os.environ", {"PROVIDER": "mistral"})
+@patch("app.services.transcriber.transcribe_audio_file_openai_async")
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+def test_transcribe_audio_file_async_per_request_engine_and_model(mock_mistral, mock_openai):
+    """Test a request can pick another engine and model than the configured provider."""
+    mock_openai.return_value = "From OpenAI"
+
+    result = asyncio.run(transcribe_audio_file_async(
+        Path("a.mp3"), language=None, temperature=0.0, engine="openai", model="gpt-4o-mini-transcribe"
+    ))
+
+    assert result == "From OpenAI"
+    mock_mistral.assert_not_called()
+    assert mock_openai.call_args.kwargs["model"] == "gpt-4o-mini-transcribe"
+
+
+def test_transcribe_audio_file_async_rejects_unknown_model():
+    """Test a model the engine does not offer is refused before any call."""
+    with pytest.raises(EngineSelectionError, match="not available"):
+        asyncio.run(transcribe_audio_file_async(
+            Path("a.mp3"), language=None, temperature=0.0, engine="openai", model="voxtral-mini-latest"
+        ))
+
+
+@patch("app.services.transcriber._transcribe_file_async")
+@patch("app.services.transcriber.get_transcript_cache")
+def test_transcribe_audio_file_cached_keys_on_model(mock_get_cache, mock_transcribe, tmp_path):
+    """Test transcripts from different models are cached separately."""
+    mock_get_cache.return_value = TieredCache(LRUCache(10))
+    mock_transcribe.side_effect = _answered_as_requested("Transcribed")
+    file_path = tmp_path / "memo.mp3"
+    file_path.write_bytes(b"audio")
+
+    for model in ("whisper-1", "gpt-4o-transcribe", "whisper-1"):
+        asyncio.run(transcribe_audio_file_cached_async(
+            file_path, language=None, temperature=0.0, engine="openai", model=model
+        ))
+
+    assert mock_transcribe.call_count == 2
+    assert mock_transcribe.call_args.kwargs["model"] == "gpt-4o-transcribe"
+
+
+@patch("app.services.transcriber.transcribe_audio_file_chunked_async")
+@patch("app.services.transcriber.get_transcript_cache")
+def test_transcribe_audio_file_cached_chunks_files_over_upload_limit(mock_get_cache, mock_chunked, tmp_path):
+    """Test a file larger than the engine's upload limit is transcribed in chunks."""
+    mock_get_cache.return_value = None
+    mock_chunked.return_value = TranscriptionResult(text="Long")
+    file_path = tmp_path / "long.mp3"
+    file_path.write_bytes(b"\0" * (25 * 1024 * 1024 + 1))
+
+    result = asyncio.run(transcribe_audio_file_cached_async(file_path, language=None, temperature=0.0, engine="openai"))
+
+    assert result.text == "Long"
+    assert mock_chunked.call_args.kwargs["engine"] == "openai"
+
+
+@patch("app.services.transcriber.split_audio_async")
+@patch("app.services.transcriber.detect_silences_async")
+def test_transcribe_audio_file_chunked_emits_segments_in_order(mock_detect, mock_split):
+    """Test on_segment receives stitched chunk texts in order even when later chunks finish first."""
+    mock_detect.return_value = SilenceMap(duration=250.0)
+    mock_split.side_effect = lambda src, spans, dest: [dest / f"chunk_{i}.mp3" for i in range(len(spans))]
+    texts = {"chunk_0.mp3": "one two three four", "chunk_1.mp3": "three four five six", "chunk_2.mp3": "seven"}
+    delays = {"chunk_0.mp3": 0.05, "chunk_1.mp3": 0.0, "chunk_2.mp3": 0.0}
+    segments = []
+
+    async def transcribe_fn(path, **kwargs):
+        await asyncio.sleep(delays[path.name])
+        return texts[path.name]
+
+    async def on_segment(text):
+        segments.append(text)
+
+    result = asyncio.run(
+        transcribe_audio_file_chunked_async(
+            Path("long.mp3"),
+            language=None,
+            temperature=0.0,
+            transcribe_fn=transcribe_fn,
+            target_seconds=100.0,
+            overlap_seconds=2.0,
+            concurrency=3,
+            on_segment=on_segment,
+        )
+    )
+
+    assert segments == ["one two three four", "five six", "seven"]
+    assert result.text == " ".join(segments)
+
+
+@patch("app.services.transcriber.split_audio_async")
+@patch("app.services.transcriber.detect_silences_async")
+def test_transcribe_audio_file_chunked_failure_cancels_other_chunks(mock_detect, mock_split):
+    """Test a failing chunk cancels the chunks still in flight before the chunk files are removed."""
+    mock_detect.return_value = SilenceMap(duration=250.0)
+    mock_split.side_effect = lambda src, spans, dest: [dest / f"chunk_{i}.mp3" for i in range(len(spans))]
+    cancelled = []
+
+    async def transcribe_fn(path, **kwargs):
+        if path.name == "chunk_0.mp3":
+            raise RuntimeError("provider error")
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            cancelled.append(path.parent.exists())
+            raise
+        return "text"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            transcribe_audio_file_chunked_async(
+                Path("long.mp3"),
+                language=None,
+                temperature=0.0,
+                transcribe_fn=transcribe_fn,
+                target_seconds=100.0,
+                concurrency=3,
+            )
+        )
+
+    assert cancelled == [True, True]
+
+
+@patch("app.services.transcriber.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.preprocessor.run_subprocess")
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+def test_transcribe_audio_file_async_converts_webm_for_mistral(mock_mistral, mock_run, mock_which, _, tmp_path):
+    """Test a .webm upload is converted to MP3 for an engine that does not take WebM, then cleaned up."""
+    src = tmp_path / "memo.webm"
+    src.write_bytes(b"webm audio")
+
+    async def ffmpeg(cmd):
+        Path(cmd[-1]).write_bytes(b"mp3 audio")
+
+    mock_run.side_effect = ffmpeg
+    mock_mistral.return_value = "Transcribed"
+
+    result = asyncio.run(transcribe_audio_file_async(src, language=None, temperature=0.0, engine="mistral"))
+
+    assert result == "Transcribed"
+    sent = mock_mistral.call_args.args[0]
+    assert sent.suffix == ".mp3"
+    assert mock_run.call_args.args[0][mock_run.call_args.args[0].index("-i") + 1] == str(src)
+    assert not sent.parent.exists()
+
+
+@patch("app.services.transcriber.shutil.which", return_value=None)
+@patch("app.services.transcriber.transcribe_audio_file_openai_async")
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+def test_transcribe_audio_file_async_webm_without_ffmpeg_uses_compatible_engine(
+    mock_mistral, mock_openai, _, monkeypatch, tmp_path
+):
+    """Test without ffmpeg a .webm upload goes to a failover engine taking WebM, or is rejected."""
+    src = tmp_path / "memo.webm"
+    src.write_bytes(b"webm audio")
+    mock_openai.return_value = "From OpenAI"
+
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    result = asyncio.run(transcribe_audio_file_async(src, language=None, temperature=0.0, engine="mistral"))
+    assert result == "From OpenAI"
+    mock_mistral.assert_not_called()
+
+    monkeypatch.delenv("OPENAI_API_KEY")
+    with pytest.raises(EngineSelectionError, match="ffmpeg"):
+        asyncio.run(transcribe_audio_file_async(src, language=None, temperature=0.0, engine="mistral"))
+
+
+@patch("app.services.transcriber.transcribe_audio_file_openai_async")
+@patch("app.services.transcriber.transcribe_audio_file_mistral_async")
+@patch("app.services.transcriber.get_transcript_cache")
+def test_transcribe_audio_file_cached_keys_on_failover_engine(
+    mock_get_cache, mock_mistral, mock_openai, monkeypatch, tmp_path
+):
+    """Test a transcript produced by a failover engine is cached and labelled as that engine's."""
+    from app.utils.resilience import reset_state
+
+    class Unavailable(Exception):
+        status_code = 503
+
+    cache = TieredCache(LRUCache(10))
+    mock_get_cache.return_value = cache
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    monkeypatch.setenv("RETRY_BASE_DELAY", "0.001")
+    reset_state()
+    mock_mistral.side_effect = Unavailable("overloaded")
+    mock_openai.return_value = "From OpenAI"
+    file_path = tmp_path / "memo.mp3"
+    file_path.write_bytes(b"audio")
+
+    try:
+        result = asyncio.run(transcribe_audio_file_cached_async(
+            file_path, language=None, temperature=0.0, engine="mistral"
+        ))
+    finally:
+        reset_state()
+
+    assert (result.engine, result.model) == ("openai", "whisper-1")
+    audio_hash = sha256_file(file_path)
+    common = dict(language=None, temperature=0.0, chunked=False)
+    answered_key = transcript_cache_key(audio_hash, provider="openai", model="whisper-1", **common)
+    requested_key = transcript_cache_key(audio_hash, provider="mistral", model="voxtral-mini-latest", **common)
+    assert cache.get(answered_key) == "From OpenAI"
+    assert cache.get(requested_key) is None
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.uploads import (
+    UploadSizeLimitMiddleware,
+    UploadTooLargeError,
+    cleanup_request_dir,
+    create_request_dir,
+    save_upload,
+    save_uploads,
+)
+
+
+def _upload(data: bytes, filename: str = "audio.mp3", size=None) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename, size=size)
+
+
+def test_save_upload_streams_and_hashes():
+    """Test save_upload copies content in chunks and computes the SHA-256."""
+    data = b"x" * 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "out.mp3"
+        stored = asyncio.run(save_upload(_upload(data), dest, chunk_size=1024, max_bytes=20_000))
+
+        assert stored.size == len(data)
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert dest.read_bytes() == data
+
+
+def test_save_upload_rejects_oversized_stream():
+    """Test save_upload stops reading and removes the partial file past the limit."""
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "out.mp3"
+        with pytest.raises(UploadTooLargeError):
+            asyncio.run(save_upload(_upload(b"x" * 5000), dest, chunk_size=1024, max_bytes=2048))
+        assert not dest.exists()
+
+
+def test_save_upload_rejects_declared_size_early():
+    """Test save_upload rejects before reading when the declared size is too big."""
+    upload = _upload(b"", size=10_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "out.mp3"
+        with pytest.raises(UploadTooLargeError):
+            asyncio.run(save_upload(upload, dest, chunk_size=1024, max_bytes=2048))
+        assert not dest.exists()
+
+
+def test_save_uploads_same_filename_do_not_collide():
+    """Test two uploads with the same filename are stored separately."""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [_upload(b"first", "same.mp3"), _upload(b"second", "same.mp3")]
+        stored = asyncio.run(save_uploads(files, Path(tmp)))
+
+        assert stored[0].path != stored[1].path
+        assert stored[0].path.read_bytes() == b"first"
+        assert stored[1].path.read_bytes() == b"second"
+
+
+def test_save_uploads_strips_directory_components():
+    """Test client-supplied paths cannot escape the request directory."""
+    with tempfile.TemporaryDirectory() as tmp:
+        stored = asyncio.run(save_uploads([_upload(b"data", "../../evil.mp3")], Path(tmp)))
+        assert stored[0].path.parent == Path(tmp)
+        assert stored[0].path.name.endswith("evil.mp3")
+
+
+@patch("app.services.uploads.settings")
+def test_save_uploads_enforces_request_limit(mock_settings):
+    """Test the per-request total is enforced across files."""
+    mock_settings.upload_chunk_size = 1024
+    mock_settings.max_upload_file_bytes = 4000
+    mock_settings.max_upload_request_bytes = 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [_upload(b"a" * 3000, "a.mp3"), _upload(b"b" * 3000, "b.mp3")]
+        with pytest.raises(UploadTooLargeError):
+            asyncio.run(save_uploads(files, Path(tmp)))
+
+
+def test_create_and_cleanup_request_dir():
+    """Test each request gets its own directory which is removed afterwards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("app.services.uploads.settings") as mock_settings:
+            mock_settings.upload_dir = tmp
+            first = create_request_dir()
+            second = create_request_dir()
+
+        assert first != second
+        assert first.parent == Path(tmp)
+        cleanup_request_dir(first)
+        assert not first.exists()
+        cleanup_request_dir(first)  # already gone, must not raise
+
+
+@patch("app.services.uploads.settings")
+def test_upload_limit_middleware_rejects_declared_length_before_reading(mock_settings):
+    """Test an oversized Content-Length gets 413 without the app or the body being touched."""
+    mock_settings.max_upload_request_bytes = 1000
+    calls, sent = [], []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+
+    async def receive():
+        raise AssertionError("the body must not be read")
+
+    async def send(message):
+        sent.append(message)
+
+    def request(path, length):
+        scope = {"type": "http", "method": "POST", "path": path, "headers": [(b"content-length", length)]}
+        asyncio.run(UploadSizeLimitMiddleware(app)(scope, receive, send))
+
+    request("/transcribe/jobs", b"%d" % (10 * 1024 * 1024))
+    assert sent[0]["status"] == 413
+    assert calls == []
+
+    request("/transcribe", b"2000")
+    request("/export", b"%d" % (10 * 1024 * 1024))
+    assert calls == ["/transcribe", "/export"]
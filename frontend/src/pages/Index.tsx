@@ -16,6 +16,7 @@ import { Upload, Loader2, Download, AlertCircle } from "lucide-react";
 import FileList from "@/components/FileList";
 
 interface TranscriptionResponse {
+  id: string | null;
   text: string | null;
   formattedText: string | null;
 }
@@ -105,6 +106,9 @@ const Index = () => {
   const [isExporting, setIsExporting] = useState(false);
   const [rawTranscript, setRawTranscript] = useState<string>("");
   const [formattedTranscript, setFormattedTranscript] = useState<string>("");
+  // Server-side copy of the transcript; exports reference it while the text is unedited
+  const [transcriptId, setTranscriptId] = useState<string | null>(null);
+  const [storedFormatted, setStoredFormatted] = useState<string>("");
   const [error, setError] = useState<string>("");
   const fileInputRef = useRef<HTMLInputElement>(null);
   const { toast } = useToast();
@@ -171,6 +175,7 @@ const Index = () => {
     setError("");
     setRawTranscript("");
     setFormattedTranscript("");
+    setTranscriptId(null);
 
     try {
       const formData = new FormData();
@@ -195,6 +200,8 @@ const Index = () => {
 
       setRawTranscript(data.text || "");
       setFormattedTranscript(data.formattedText || "");
+      setTranscriptId(data.id);
+      setStoredFormatted(data.formattedText || "");
 
       toast({
         title: t.transcriptionCompleteTitle,
@@ -225,7 +232,11 @@ const Index = () => {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ content: formattedTranscript }),
+        body: JSON.stringify(
+          transcriptId && formattedTranscript === storedFormatted
+            ? { transcript_id: transcriptId }
+            : { content: formattedTranscript },
+        ),
       });
 
       if (!response.ok) {